@@ -17,14 +17,9 @@ from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
 from io import open
+import importlib
 import logging
-
-from fontTools.misc.py23 import tostr
-
-from glyphsLib.builder import to_ufos
-from glyphsLib.interpolation import interpolate, build_designspace
-from glyphsLib.parser import load, loads, dump, dumps
-from glyphsLib.util import write_ufo
+import sys
 
 
 __version__ = "1.8.0"
@@ -33,30 +28,107 @@ __version__ = "1.8.0"
 # "TypeError: Item in ``from list'' must be str, not unicode" on Python 2.
 # Thus we need to encode the unicode literals as ascii bytes.
 # https://bugs.python.org/issue21720
-__all__ = [tostr(s) for s in (
+__all__ = [str(s) for s in (
     "build_masters", "build_instances", "load_to_ufos",
     "load", "loads", "dump", "dumps",
 )]
 
 logger = logging.getLogger(__name__)
 
+# Names re-exported from submodules, which are only imported when one of
+# their names is first accessed, so that importing glyphsLib stays cheap.
+_lazy_attrs = {
+    "to_ufos": "glyphsLib.builder",
+    "iter_ufos": "glyphsLib.builder",
+    "glyph_hashes": "glyphsLib.incremental",
+    "write_ufo_incrementally": "glyphsLib.incremental",
+    "interpolate": "glyphsLib.interpolation",
+    "interpolate_in_memory": "glyphsLib.interpolation",
+    "build_designspace": "glyphsLib.interpolation",
+    "load": "glyphsLib.parser",
+    "loads": "glyphsLib.parser",
+    "dump": "glyphsLib.parser",
+    "dumps": "glyphsLib.parser",
+    "write_ufo": "glyphsLib.util",
+}
+
+# Submodules, which are also imported when first accessed as attributes
+_lazy_submodules = (
+    "anchors", "builder", "casting", "glyphdata", "glyphdata_generated",
+    "incremental", "interpolation", "kerning", "parser", "ufomodel", "util",
+    "writer",
+)
+
+
+def __getattr__(name):
+    if name in _lazy_submodules:
+        # importing a submodule sets it as an attribute of the package
+        return importlib.import_module("%s.%s" % (__name__, name))
+    module_name = _lazy_attrs.get(name)
+    if module_name is None:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(
+        set(globals()) | set(_lazy_attrs) | set(_lazy_submodules))
 
-def load_to_ufos(file_or_path, include_instances=False, family_name=None,
-                 debug=False):
-    """Load an unpacked .glyphs object to UFO objects."""
+
+if sys.version_info < (3, 7):
+    # module __getattr__ is only called from Python 3.7 on (PEP 562)
+    for _name in _lazy_attrs:
+        __getattr__(_name)
+    for _name in _lazy_submodules:
+        __getattr__(_name)
+
+
+def _load(file_or_path):
+    from glyphsLib.parser import load
 
     if hasattr(file_or_path, 'read'):
-        data = load(file_or_path)
-    else:
-        with open(file_or_path, 'r', encoding='utf-8') as ifile:
-            data = load(ifile)
+        return load(file_or_path)
+    with open(file_or_path, 'r', encoding='utf-8') as ifile:
+        return load(ifile)
+
+
+def load_to_ufos(file_or_path, include_instances=False, family_name=None,
+                 debug=False, workers=None, font_factory=None,
+                 include_backgrounds=True, glyph_data_files=None):
+    """Load an unpacked .glyphs object to UFO objects.
+
+    If workers is greater than 1, masters are built in parallel by up to that
+    many worker processes, or their glyphs are if there are fewer masters than
+    workers.
+
+    If font_factory is provided, it is used to create the UFOs instead of
+    defcon.Font, e.g. glyphsLib.ufomodel.Font.
+
+    If include_backgrounds is False, glyph background layers are left out of
+    the UFOs.
+
+    If glyph_data_files is provided, the glyphs of these GlyphData XML files
+    override the glyph data of glyphsLib.
+    """
+
+    from glyphsLib.builder import to_ufos
+
+    data = _load(file_or_path)
     logger.info('Loading to UFOs')
     return to_ufos(data, include_instances=include_instances,
-                   family_name=family_name, debug=debug)
+                   family_name=family_name, debug=debug, workers=workers,
+                   font_factory=font_factory,
+                   include_backgrounds=include_backgrounds,
+                   glyph_data_files=glyph_data_files)
 
 
 def build_masters(filename, master_dir, designspace_instance_dir=None,
-                  family_name=None):
+                  family_name=None, workers=None, incremental=False,
+                  fast_write=False, include_backgrounds=True,
+                  glyph_data_files=None):
     """Write and return UFOs from the masters defined in a .glyphs file.
 
     Args:
@@ -65,26 +137,87 @@ def build_masters(filename, master_dir, designspace_instance_dir=None,
             written alongside the master UFOs though no instances will be built.
         family_name: If provided, the master UFOs will be given this name and
             only instances with this name will be included in the designspace.
+        workers: If greater than 1, build masters in parallel using up to this
+            many worker processes.
+        incremental: If True, keep a manifest of the source glyphs next to
+            each master UFO, and on later builds only rewrite the files of
+            glyphs which changed (see glyphsLib.incremental).
+        fast_write: If True, write the .glif files of the masters directly,
+            instead of saving them through defcon (see glyphsLib.writer).
+            The written files are the same. Not used by incremental builds.
+        include_backgrounds: If False, leave glyph background layers out of
+            the masters.
+        glyph_data_files: If provided, project GlyphData XML files, whose
+            glyphs override the glyph data of glyphsLib.
 
     Returns:
         A list of master UFOs, and if designspace_instance_dir is provided, a
         path to a designspace and a list of (path, data) tuples with instance
         paths from the designspace and respective data from the Glyphs source.
+
+        Unless a designspace is written, masters are built and written one at
+        a time, and the returned UFOs are loaded back lazily from master_dir.
     """
 
-    ufos, instance_data = load_to_ufos(
-        filename, include_instances=True, family_name=family_name)
+    from glyphsLib.builder import to_ufos, iter_ufos, load_glyphinfo_data
+    from glyphsLib.interpolation import build_designspace
+
+    data = _load(filename)
+    logger.info('Loading to UFOs')
+    glyphinfo_data = load_glyphinfo_data(glyph_data_files)
+
     if designspace_instance_dir is not None:
+        ufos, instance_data = to_ufos(
+            data, include_instances=True, family_name=family_name,
+            workers=workers, include_backgrounds=include_backgrounds,
+            glyphinfo_data=glyphinfo_data)
+        write_masters = not (incremental or fast_write)
+        if not write_masters:
+            for master, ufo in zip(data['fontMaster'], ufos):
+                _write_master(ufo, master_dir, data, master['id'],
+                              incremental, fast_write, include_backgrounds,
+                              glyphinfo_data)
         designspace_path, instance_data = build_designspace(
-            ufos, master_dir, designspace_instance_dir, instance_data)
+            ufos, master_dir, designspace_instance_dir, instance_data,
+            write_masters=write_masters)
         return ufos, designspace_path, instance_data
-    else:
-        for ufo in ufos:
-            write_ufo(ufo, master_dir)
-        return ufos
 
+    from defcon import Font
+
+    ufos = []
+    masters = iter_ufos(data, family_name=family_name, workers=workers,
+                        include_backgrounds=include_backgrounds,
+                        glyphinfo_data=glyphinfo_data)
+    for master, ufo in zip(data['fontMaster'], masters):
+        path = _write_master(ufo, master_dir, data, master['id'],
+                             incremental, fast_write, include_backgrounds,
+                             glyphinfo_data)
+        # keep a handle on the written master only, defcon loads its glyphs
+        # on demand, so that a single built master is in memory at a time
+        ufos.append(Font(path))
+    return ufos
+
+
+def _write_master(ufo, master_dir, data, master_id, incremental, fast_write,
+                  include_backgrounds=True, glyphinfo_data=None):
+    from glyphsLib.incremental import glyph_hashes, write_ufo_incrementally
+    from glyphsLib.util import write_ufo
+    import glyphsLib.writer
 
-def build_instances(filename, master_dir, instance_dir, family_name=None):
+    if incremental:
+        return write_ufo_incrementally(
+            ufo, master_dir,
+            glyph_hashes(data, master_id, include_backgrounds,
+                         glyphinfo_data))
+    elif fast_write:
+        return glyphsLib.writer.write_ufo(ufo, master_dir)
+    return write_ufo(ufo, master_dir)
+
+
+def build_instances(filename, master_dir, instance_dir, family_name=None,
+                    workers=None, include_backgrounds=True,
+                    glyph_data_files=None, in_memory=False,
+                    incremental=False, fast_write=False):
     """Write and return UFOs from the instances defined in a .glyphs file.
 
     Args:
@@ -92,10 +225,38 @@ def build_instances(filename, master_dir, instance_dir, family_name=None):
         instance_dir: Directory where instances are written.
         family_name: If provided, the master UFOs will be given this name and
             only instances with this name will be built.
+        workers: If greater than 1, build masters in parallel using up to this
+            many worker processes.
+        include_backgrounds: If False, leave glyph background layers out of
+            the masters.
+        glyph_data_files: If provided, project GlyphData XML files, whose
+            glyphs override the glyph data of glyphsLib.
+        in_memory: If True, interpolate the instances from the masters in
+            memory. The masters are still written, but no designspace is, and
+            each instance is written once.
+        incremental, fast_write: How the masters are written, as in
+            build_masters.
     """
 
-    master_ufos, instance_data = load_to_ufos(
-        filename, include_instances=True, family_name=family_name)
+    from glyphsLib.builder import to_ufos, load_glyphinfo_data
+    from glyphsLib.interpolation import interpolate, interpolate_in_memory
+
+    data = _load(filename)
+    logger.info('Loading to UFOs')
+    glyphinfo_data = load_glyphinfo_data(glyph_data_files)
+    master_ufos, instance_data = to_ufos(
+        data, include_instances=True, family_name=family_name,
+        workers=workers, include_backgrounds=include_backgrounds,
+        glyphinfo_data=glyphinfo_data)
+    write_masters = not (incremental or fast_write or in_memory)
+    if not write_masters:
+        for master, ufo in zip(data['fontMaster'], master_ufos):
+            _write_master(ufo, master_dir, data, master['id'],
+                          incremental, fast_write, include_backgrounds,
+                          glyphinfo_data)
+    if in_memory:
+        return interpolate_in_memory(master_ufos, instance_dir, instance_data)
     instance_ufos = interpolate(
-        master_ufos, master_dir, instance_dir, instance_data)
+        master_ufos, master_dir, instance_dir, instance_data,
+        write_masters=write_masters)
     return instance_ufos
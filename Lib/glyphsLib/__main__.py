@@ -41,6 +41,29 @@ def parse_options(args):
                         help="Output and generate interpolated instances UFO "
                              "to folder INSTANCES. "
                              "(default: %(const)s)")
+    parser.add_argument("-j", "--jobs", metavar="JOBS", type=int, default=1,
+                        help="Build masters, or glyphs if there are fewer "
+                             "masters than JOBS, in parallel using up to JOBS "
+                             "worker processes. (default: %(default)s)")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="Only rewrite the master UFO files of glyphs "
+                             "which changed since the previous build.")
+    parser.add_argument("--fast-write", action="store_true",
+                        help="Write master UFO glyph files directly instead "
+                             "of saving them through defcon.")
+    parser.add_argument("--no-backgrounds", dest="include_backgrounds",
+                        action="store_false",
+                        help="Leave glyph background layers out of the "
+                             "master UFOs.")
+    parser.add_argument("--glyph-data", metavar="XML", action="append",
+                        dest="glyph_data_files",
+                        help="Project GlyphData XML file, whose glyphs "
+                             "override the glyph data of glyphsLib. Can be "
+                             "repeated, later files taking precedence.")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Interpolate instances from the masters in "
+                             "memory, without writing a designspace and "
+                             "reading the masters back.")
     options = parser.parse_args(args)
     return options
 
@@ -49,9 +72,18 @@ def main(args=None):
     opt = parse_options(args)
     if opt.glyphs is not None:
         if opt.instances is None:
-            glyphsLib.build_masters(opt.glyphs, opt.masters)
+            glyphsLib.build_masters(
+                opt.glyphs, opt.masters, workers=opt.jobs,
+                incremental=opt.incremental, fast_write=opt.fast_write,
+                include_backgrounds=opt.include_backgrounds,
+                glyph_data_files=opt.glyph_data_files)
         else:
-            glyphsLib.build_instances(opt.glyphs, opt.masters, opt.instances)
+            glyphsLib.build_instances(
+                opt.glyphs, opt.masters, opt.instances, workers=opt.jobs,
+                include_backgrounds=opt.include_backgrounds,
+                glyph_data_files=opt.glyph_data_files,
+                in_memory=opt.in_memory, incremental=opt.incremental,
+                fast_write=opt.fast_write)
 
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -16,82 +16,273 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
+import logging
+from bisect import bisect_left
+
 from fontTools.misc.transform import Transform
 
-__all__ = ['propagate_font_anchors']
+__all__ = ['propagate_font_anchors', 'propagate_masters_anchors',
+           'AnchorPlans']
+
+logger = logging.getLogger(__name__)
 
 
 def propagate_font_anchors(ufo):
-    """Copy anchors from parent glyphs' components to the parent."""
+    """Copy anchors from parent glyphs' components to the parent.
+
+    Glyphs are processed after the glyphs they use as components, so that
+    anchors propagate through nested components.
+    """
+
+    propagate_masters_anchors([ufo])
+
+
+def propagate_masters_anchors(ufos, plans=None):
+    """Copy anchors from parent glyphs' components to the parent, in each of
+    the masters of a font.
+
+    Which anchors a glyph gets, and from which components, only depends on
+    glyph names, component base glyphs and anchor names. This is worked out
+    once for masters which have the same ones, and only anchor positions are
+    computed for each master.
+
+    plans is an AnchorPlans object, for masters of a font which are built
+    and propagated separately to share what is worked out.
+    """
+
+    if plans is None:
+        if len(ufos) == 1:
+            # there is nothing to share the plans with
+            _propagate_and_plan(ufos)
+            return
+        plans = AnchorPlans()
+    plans.propagate(ufos)
+
 
+class AnchorPlans(object):
+    """The anchors to propagate to the glyphs of a font's masters, worked out
+    once for each group of masters with the same glyphs, components and
+    anchor names.
+    """
+
+    def __init__(self):
+        # (structure, [(glyph name, glyph_anchor_plan)]) of each group
+        self.groups = []
+
+    def propagate(self, ufos):
+        """Propagate anchors in UFOs, reusing the plans of earlier calls
+        for masters which have the same structure."""
+
+        for structure, masters in _group_by_anchor_structure(ufos):
+            glyph_plans = self.get(structure)
+            if glyph_plans is None:
+                self.groups.append((structure, _propagate_and_plan(masters)))
+                continue
+            for name, plan in glyph_plans:
+                for master in masters:
+                    apply_anchor_plan(master, master[name], plan)
+
+    def get(self, structure):
+        """Return the plans of masters with the given structure, or None."""
+
+        for group_structure, glyph_plans in self.groups:
+            if structure == group_structure:
+                return glyph_plans
+        return None
+
+
+def _propagate_and_plan(masters):
+    """Propagate anchors in masters with the same structure, and return the
+    plans worked out on the first one, as (glyph name, plan) in the order
+    they have to be applied."""
+
+    ufo = masters[0]
+    indexes = {}
     processed = set()
+    glyph_plans = []
+    for glyph in component_order(ufo):
+        plan = glyph_anchor_plan(ufo, glyph, indexes, processed)
+        if plan:
+            for master in masters:
+                apply_anchor_plan(master, master[glyph.name], plan)
+            glyph_plans.append((glyph.name, plan))
+        processed.add(glyph.name)
+    return glyph_plans
+
+
+def _group_by_anchor_structure(ufos):
+    """Group UFOs which have the same glyphs, components and anchor names, as
+    (structure, UFOs) pairs."""
+
+    groups = []
+    for ufo in ufos:
+        structure = {
+            glyph.name: ([a.name for a in glyph.anchors],
+                         [c.baseGlyph for c in glyph.components])
+            for glyph in ufo}
+        for group_structure, group in groups:
+            if structure == group_structure:
+                group.append(ufo)
+                break
+        else:
+            groups.append((structure, [ufo]))
+    return groups
+
+
+def component_order(ufo):
+    """Return the glyphs of an UFO, each after the glyphs it uses as
+    components.
+
+    Components of missing glyphs are reported and left out. Glyphs in a
+    component cycle are reported too, and ordered as if the component closing
+    the cycle was not there.
+    """
+
+    order = []
+    visiting, done = set(), set()
     for glyph in ufo:
-        propagate_glyph_anchors(ufo, glyph, processed)
+        if glyph.name in done:
+            continue
+        visiting.add(glyph.name)
+        # depth-first search, without recursion so that long chains of
+        # components don't hit the recursion limit
+        stack = [(glyph, iter(glyph.components))]
+        while stack:
+            glyph, components = stack[-1]
+            for component in components:
+                name = component.baseGlyph
+                if name in done:
+                    continue
+                if name in visiting:
+                    cycle = [g.name for g, _ in stack]
+                    cycle = cycle[cycle.index(name):] + [name]
+                    logger.warn(
+                        'Component cycle found (%s), anchors propagated to '
+                        'these glyphs may be incomplete.' % ' -> '.join(cycle))
+                elif name not in ufo:
+                    logger.warn(
+                        'Glyph %s has a component of missing glyph %s, which '
+                        'is ignored when propagating anchors.' %
+                        (glyph.name, name))
+                else:
+                    visiting.add(name)
+                    base_glyph = ufo[name]
+                    stack.append((base_glyph, iter(base_glyph.components)))
+                    break
+            else:
+                stack.pop()
+                visiting.remove(glyph.name)
+                done.add(glyph.name)
+                order.append(glyph)
+    return order
+
+
+class AnchorIndex(object):
+    """Anchor names of a glyph whose anchors are not going to change."""
+
+    __slots__ = ('names', 'first_by_name', 'is_mark')
 
+    def __init__(self, anchors):
+        self.names = [anchor.name for anchor in anchors]
+        # position of the first anchor with each name
+        self.first_by_name = {}
+        for i, name in enumerate(self.names):
+            self.first_by_name.setdefault(name, i)
+        self.is_mark = any(name.startswith('_') for name in self.first_by_name)
 
-def propagate_glyph_anchors(ufo, parent, processed):
-    """Propagate anchors for a single parent glyph."""
 
-    if parent.name in processed:
-        return
-    processed.add(parent.name)
+def glyph_anchor_plan(ufo, parent, indexes, processed):
+    """Return the anchors to propagate to a single parent glyph, as a list of
+    (anchor name, component index, position of the anchor in the component's
+    base glyph), sorted by anchor name.
+
+    indexes holds the AnchorIndex of glyphs in processed, the glyphs whose
+    anchors have already been propagated, and is updated as needed.
+    """
 
     base_components = []
     mark_components = []
     anchor_names = set()
-    to_add = {}
-    for component in parent.components:
-        glyph = ufo[component.baseGlyph]
-        propagate_glyph_anchors(ufo, glyph, processed)
-        if any(a.name.startswith('_') for a in glyph.anchors):
-            mark_components.append(component)
+    sources = {}
+    for i, component in enumerate(parent.components):
+        name = component.baseGlyph
+        index = indexes.get(name)
+        if index is None:
+            if name not in ufo:
+                continue
+            index = AnchorIndex(ufo[name].anchors)
+            # glyphs in a component cycle may still get anchors
+            if name in processed:
+                indexes[name] = index
+        if index.is_mark:
+            mark_components.append((i, index))
         else:
-            base_components.append(component)
-            anchor_names |= {a.name for a in glyph.anchors}
+            base_components.append((i, index))
+            anchor_names.update(index.first_by_name)
 
-    for anchor_name in anchor_names:
-        # don't add if parent already contains this anchor OR any associated
-        # ligature anchors (e.g. "top_1, top_2" for "top")
-        if not any(a.name.startswith(anchor_name) for a in parent.anchors):
-            get_anchor_data(to_add, ufo, base_components, anchor_name)
+    if anchor_names:
+        parent_names = sorted(a.name for a in parent.anchors)
+        for anchor_name in sorted(anchor_names):
+            # don't add if parent already contains this anchor OR any
+            # associated ligature anchors (e.g. "top_1, top_2" for "top")
+            if not _has_name_with_prefix(parent_names, anchor_name):
+                get_anchor_data(sources, base_components, anchor_name)
 
-    for component in mark_components:
-        adjust_anchors(to_add, ufo, component)
+    for i, index in mark_components:
+        adjust_anchors(sources, i, index)
 
     # we sort propagated anchors to append in a deterministic order
-    for name, (x, y) in sorted(to_add.items()):
+    return [(name, i, position)
+            for name, (i, position) in sorted(sources.items())]
+
+
+def apply_anchor_plan(ufo, glyph, plan):
+    """Append the anchors of a glyph_anchor_plan to a glyph."""
+
+    components = glyph.components
+    anchor_class = glyph.anchorClass
+    sources = {}
+    for name, i, position in plan:
+        source = sources.get(i)
+        if source is None:
+            component = components[i]
+            source = sources[i] = (ufo[component.baseGlyph].anchors,
+                                   Transform(*component.transformation))
+        base_anchors, transform = source
+        anchor = base_anchors[position]
+        x, y = transform.transformPoint((anchor.x, anchor.y))
         anchor_dict = {'name': name, 'x': x, 'y': y}
-        parent.appendAnchor(glyph.anchorClass(anchorDict=anchor_dict))
+        glyph.appendAnchor(anchor_class(anchorDict=anchor_dict))
 
 
-def get_anchor_data(anchor_data, ufo, components, anchor_name):
-    """Get data for an anchor from a list of components."""
+def _has_name_with_prefix(sorted_names, prefix):
+    """Return whether any of the sorted names starts with prefix."""
 
-    anchors = []
-    for component in components:
-        for anchor in ufo[component.baseGlyph].anchors:
-            if anchor.name == anchor_name:
-                anchors.append((anchor, component))
-                break
-    if len(anchors) > 1:
-        for i, (anchor, component) in enumerate(anchors):
-            t = Transform(*component.transformation)
-            name = '%s_%d' % (anchor.name, i + 1)
-            anchor_data[name] = t.transformPoint((anchor.x, anchor.y))
-    elif anchors:
-        anchor, component = anchors[0]
-        t = Transform(*component.transformation)
-        anchor_data[anchor.name] = t.transformPoint((anchor.x, anchor.y))
-
-
-def adjust_anchors(anchor_data, ufo, component):
+    i = bisect_left(sorted_names, prefix)
+    return i < len(sorted_names) and sorted_names[i].startswith(prefix)
+
+
+def get_anchor_data(anchor_data, components, anchor_name):
+    """Get the source of an anchor from a list of (component index,
+    AnchorIndex) of components."""
+
+    sources = []
+    for i, index in components:
+        position = index.first_by_name.get(anchor_name)
+        if position is not None:
+            sources.append((i, position))
+    if len(sources) > 1:
+        for n, source in enumerate(sources):
+            anchor_data['%s_%d' % (anchor_name, n + 1)] = source
+    elif sources:
+        anchor_data[anchor_name] = sources[0]
+
+
+def adjust_anchors(anchor_data, component_index, index):
     """Adjust anchors to which a mark component may have been attached."""
 
-    glyph = ufo[component.baseGlyph]
-    t = Transform(*component.transformation)
-    for anchor in glyph.anchors:
+    for position, name in enumerate(index.names):
         # only adjust if this anchor has data and the component also contains
         # the associated mark anchor (e.g. "_top" for "top")
-        if (anchor.name in anchor_data and
-            any(a.name == '_' + anchor.name for a in glyph.anchors)):
-            anchor_data[anchor.name] = t.transformPoint((anchor.x, anchor.y))
+        if name in anchor_data and '_' + name in index.first_by_name:
+            anchor_data[name] = (component_index, position)
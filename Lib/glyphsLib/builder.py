@@ -18,16 +18,21 @@ from __future__ import (print_function, division, absolute_import,
 
 from fontTools.misc.py23 import round, unicode
 
+import copy
 import logging
 import re
 from collections import deque
+from itertools import islice
 
-from glyphsLib.anchors import propagate_font_anchors
-from glyphsLib.util import clear_data, cast_to_number_or_bool, bin_to_int_list
+from glyphsLib.anchors import propagate_masters_anchors, AnchorPlans
+from glyphsLib.kerning import load_kerning
+from glyphsLib.util import (
+    unused_data, track_data, get_whole, mark_read, cast_to_number_or_bool,
+    bin_to_int_list, GlyphOrder)
 import glyphsLib.glyphdata
 
 __all__ = [
-    'to_ufos', 'set_custom_params', 'GLYPHS_PREFIX',
+    'to_ufos', 'iter_ufos', 'set_custom_params', 'GLYPHS_PREFIX',
 ]
 
 logger = logging.getLogger(__name__)
@@ -39,6 +44,13 @@ GLYPHLIB_PREFIX = GLYPHS_PREFIX + 'Glyphs.'
 ROBOFONT_PREFIX = 'com.typemytype.robofont.'
 UFO2FT_FILTERS_KEY = 'com.github.googlei18n.ufo2ft.filters'
 
+# node types which are UFO segment types; others are off-curve points
+SEGMENT_TYPES = frozenset(('line', 'curve', 'qcurve'))
+
+# glyphs are split in more chunks than there are workers, so that the work
+# stays balanced even if some chunks take longer to build than others
+CHUNKS_PER_WORKER = 4
+
 GLYPHS_COLORS = (
     '0.85,0.26,0.06,1',
     '0.99,0.62,0.11,1',
@@ -95,12 +107,16 @@ CODEPAGE_RANGES = {
 }
 
 
-def to_ufos(data, include_instances=False, family_name=None, debug=False):
+def to_ufos(data, include_instances=False, family_name=None, debug=False,
+            workers=None, font_factory=None, include_backgrounds=True,
+            glyph_data_files=None, glyphinfo_data=None):
     """Take .glyphs file data and load it into UFOs.
 
     Takes in data as a dictionary structured according to
     https://github.com/schriftgestalt/GlyphsSDK/blob/master/GlyphsFileFormat.md
-    and returns a list of UFOs, one per master.
+    and returns a list of UFOs, one per master. The data is left untouched, so
+    the same parsed data can be used for several builds; values such as lists
+    in user data may be shared with the resulting UFOs.
 
     If include_instances is True, also returns the parsed instance data.
 
@@ -108,15 +124,40 @@ def to_ufos(data, include_instances=False, family_name=None, debug=False):
     only instances with this name will be returned.
 
     If debug is True, returns unused input data instead of the resulting UFOs.
+    This is the data which the builder did not read, as recorded on a tracking
+    copy of the input.
+
+    If workers is greater than 1, masters are built in parallel by up to that
+    many worker processes, or their glyphs are if there are fewer masters than
+    workers. This is ignored in debug mode, since unused data can only be
+    collected from a single build.
+
+    If font_factory is provided, it is called without arguments to create each
+    UFO, instead of defcon.Font. glyphsLib.ufomodel.Font is a lighter choice
+    for fonts which are only written or compiled; see that module for the
+    interface the builder needs.
+
+    If include_backgrounds is False, background layers, including the layers
+    associated with masters, are not stored in the glyph libs. They are not
+    needed to compile fonts, and take most of the build time and memory of
+    sources which have many of them.
+
+    If glyph_data_files is provided, the glyphs of these project GlyphData
+    XML files override the glyph data of glyphsLib, which gives the production
+    names and categories of glyphs. The merged data is compiled once and
+    cached on disk, see glyphsLib.glyphdata.load_glyph_data. Callers which
+    already loaded it with load_glyphinfo_data can pass it as glyphinfo_data
+    instead.
     """
 
-    # check that source was generated with at least stable version 2.3
-    # https://github.com/googlei18n/glyphsLib/pull/65#issuecomment-237158140
-    if data.pop('.appVersion', 0) < 895:
-        logger.warn('This Glyphs source was generated with an outdated version '
-                    'of Glyphs. The resulting UFOs may be incorrect.')
+    if debug:
+        data = track_data(data)
+    if glyphinfo_data is None:
+        glyphinfo_data = load_glyphinfo_data(glyph_data_files)
+
+    check_app_version(data.get('.appVersion', 0))
 
-    source_family_name = data.pop('familyName')
+    source_family_name = data['familyName']
     if family_name is None:
         # use the source family name, and include all the instances
         family_name = source_family_name
@@ -132,125 +173,409 @@ def to_ufos(data, include_instances=False, family_name=None, debug=False):
         else:
             instance_family_name = family_name
 
+    if debug:
+        workers = None
+    if workers is not None and 1 < workers <= len(data['fontMaster']):
+        result = list(iter_master_ufos(
+            data, family_name, workers, font_factory, include_backgrounds,
+            glyphinfo_data))
+    else:
+        result = build_ufos(
+            data, family_name, font_factory, workers, include_backgrounds,
+            glyphinfo_data)
+    first_ufo = result[0]
+
+    # instances are not built here, unused instance data is reported by
+    # glyphsLib.interpolation.interpolate in debug mode
+    instances = get_whole(data, 'instances', [])
+    if do_filter_instances_by_family:
+        instances = list(filter_instances_by_family(instances,
+                                                    instance_family_name))
+    instance_data = {'data': instances}
+
+    # the 'Variation Font Origin' is a font-wide custom parameter, thus it is
+    # shared by all the master ufos; here we just get it from the first one
+    varfont_origin_key = "Variation Font Origin"
+    varfont_origin = first_ufo.lib.get(GLYPHS_PREFIX + varfont_origin_key)
+    if varfont_origin:
+        instance_data[varfont_origin_key] = varfont_origin
+    if debug:
+        return unused_data(data)
+    elif include_instances:
+        return result, instance_data
+    return result
+
+
+def iter_ufos(data, family_name=None, workers=None, font_factory=None,
+              include_backgrounds=True, glyph_data_files=None,
+              glyphinfo_data=None):
+    """Take .glyphs file data and yield UFOs, one per master.
+
+    Unlike to_ufos, which keeps every master in memory until all of them are
+    built, each master is fully built before the next one is started. Callers
+    which write each UFO and drop it before asking for the next one only need
+    memory for a single master at a time.
+
+    If family_name is provided, the master UFOs will be given this name.
+
+    If workers is greater than 1, upcoming masters are built ahead by up to
+    that many worker processes, and still yielded in master order. If there
+    are fewer masters than workers, the glyphs of each master are built in
+    parallel instead.
+
+    font_factory, include_backgrounds, glyph_data_files and glyphinfo_data
+    are used as in to_ufos.
+    """
+
+    check_app_version(data.get('.appVersion', 0))
+    if family_name is None:
+        family_name = data['familyName']
+    if glyphinfo_data is None:
+        glyphinfo_data = load_glyphinfo_data(glyph_data_files)
+    for ufo in iter_master_ufos(data, family_name, workers, font_factory,
+                                include_backgrounds, glyphinfo_data):
+        yield ufo
+
+
+def load_glyphinfo_data(glyph_data_files):
+    """Return the glyph data overridden by project GlyphData files, or None
+    for the default glyph data if there are none."""
+
+    if not glyph_data_files:
+        return None
+    return glyphsLib.glyphdata.load_glyph_data(glyph_data_files)
+
+
+def check_app_version(app_version):
+    """Warn if a source was generated with an outdated version of Glyphs."""
+
+    # check that source was generated with at least stable version 2.3
+    # https://github.com/googlei18n/glyphsLib/pull/65#issuecomment-237158140
+    if app_version < 895:
+        logger.warn('This Glyphs source was generated with an outdated version '
+                    'of Glyphs. The resulting UFOs may be incorrect.')
+
+
+def build_ufos(data, family_name, font_factory=None, workers=None,
+               include_backgrounds=True, glyphinfo_data=None,
+               custom_params_plan=None, anchor_plans=None):
+    """Build a list of master UFOs from .glyphs data, in master order.
+
+    font_factory and include_backgrounds are used as in to_ufos. If workers
+    is greater than 1, glyphs are built in parallel by up to that many worker
+    processes. glyphinfo_data is the data source of glyphsLib.glyphdata
+    lookups, by default its default data.
+
+    custom_params_plan and anchor_plans are shared by the builds of the
+    masters of a font which are built separately: the font-level custom
+    parameters compiled by compile_font_custom_params, and the AnchorPlans
+    of anchor propagation.
+    """
+
     feature_prefixes, classes, features = [], [], []
     for f in data.get('featurePrefixes', []):
-        feature_prefixes.append((f.pop('name'), f.pop('code'),
-                                 f.pop('automatic', None)))
+        feature_prefixes.append((f['name'], f['code'], f.get('automatic')))
     for c in data.get('classes', []):
-        classes.append((c.pop('name'), c.pop('code'), c.pop('automatic', None)))
+        classes.append((c['name'], c['code'], c.get('automatic')))
     for f in data.get('features', []):
-        features.append((f.pop('name'), f.pop('code'), f.pop('automatic', None),
-                         f.pop('disabled', None), f.pop('notes', None)))
+        features.append((f['name'], f['code'], f.get('automatic'),
+                         f.get('disabled'), f.get('notes')))
     kerning_groups = {}
 
     # stores background data from "associated layers"
     supplementary_bg_data = []
 
-    #TODO(jamesgk) maybe create one font at a time to reduce memory usage
-    ufos, master_id_order = generate_base_fonts(data, family_name)
+    ufos, master_id_order = generate_base_fonts(
+        data, family_name, font_factory, custom_params_plan)
 
     # get the 'glyphOrder' custom parameter as stored in the lib.plist.
     # We assume it's the same for all ufos.
     first_ufo = ufos[master_id_order[0]]
     glyphOrder_key = PUBLIC_PREFIX + 'glyphOrder'
-    if glyphOrder_key in first_ufo.lib:
-        glyph_order = first_ufo.lib[glyphOrder_key]
-    else:
-        glyph_order = []
-    sorted_glyphset = set(glyph_order)
+    # the order is indexed once and shared by the builder stages below
+    glyph_order = GlyphOrder(first_ufo.lib.get(glyphOrder_key, ()))
 
+    glyph_layers = []
     for glyph in data['glyphs']:
         add_glyph_to_groups(kerning_groups, glyph)
 
-        glyph_name = glyph.pop('glyphname')
-        if glyph_name not in sorted_glyphset:
+        glyph_name = glyph['glyphname']
+        if glyph_name not in glyph_order:
             # glyphs not listed in the 'glyphOrder' custom parameter but still
             # in the font are appended after the listed glyphs, in the order
             # in which they appear in the source file
             glyph_order.append(glyph_name)
 
-        # pop glyph metadata only once, i.e. not when looping through layers
+        # read glyph metadata only once, i.e. not when looping through layers
         metadata_keys = ['unicode', 'color', 'export', 'lastChange',
                          'leftMetricsKey', 'note', 'production',
                          'rightMetricsKey', 'widthMetricsKey',
                          'category', 'subCategory']
-        glyph_data = {k: glyph.pop(k) for k in metadata_keys if k in glyph}
+        glyph_data = {k: glyph[k] for k in metadata_keys if k in glyph}
 
         for layer in glyph['layers']:
-            layer_id = layer.pop('layerId')
-            layer_name = layer.pop('name', None)
+            layer_id = layer['layerId']
+            layer_name = layer.get('name')
 
-            assoc_id = layer.pop('associatedMasterId', None)
+            assoc_id = layer.get('associatedMasterId')
             if assoc_id is not None:
-                if layer_name is not None:
+                if layer_name is not None and include_backgrounds:
                     supplementary_bg_data.append(
                         (assoc_id, glyph_name, layer_name, layer))
+                elif not include_backgrounds:
+                    mark_read(layer)
                 continue
 
-            ufo = ufos[layer_id]
-            glyph = ufo.newGlyph(glyph_name)
-            load_glyph(glyph, layer, glyph_data)
+            glyph_layers.append((layer_id, glyph_name, layer, glyph_data))
+
+    if workers is not None and workers > 1:
+        load_glyphs_in_parallel(ufos, glyph_layers, workers, font_factory,
+                                include_backgrounds, glyphinfo_data)
+    else:
+        for layer_id, glyph_name, layer, glyph_data in glyph_layers:
+            glyph = ufos[layer_id].newGlyph(glyph_name)
+            load_glyph(glyph, layer, glyph_data, include_backgrounds,
+                       glyphinfo_data)
 
     for layer_id, glyph_name, bg_name, bg_data in supplementary_bg_data:
         glyph = ufos[layer_id][glyph_name]
         set_robofont_glyph_background(glyph, bg_name, bg_data)
 
+    propagate_masters_anchors(
+        [ufos[master_id] for master_id in master_id_order], anchor_plans)
+
     for ufo in ufos.values():
-        ufo.lib[glyphOrder_key] = glyph_order
-        propagate_font_anchors(ufo)
-        add_features_to_ufo(ufo, feature_prefixes, classes, features)
+        # copy, as the custom parameter value is shared with the source data
+        ufo.lib[glyphOrder_key] = list(glyph_order)
+        add_features_to_ufo(ufo, feature_prefixes, classes, features,
+                            glyph_order, glyphinfo_data)
         add_groups_to_ufo(ufo, kerning_groups)
 
-    for master_id, kerning in data.pop('kerning', {}).items():
+    for master_id, kerning in data.get('kerning', {}).items():
         load_kerning(ufos[master_id], kerning)
 
-    result = [ufos[master_id] for master_id in master_id_order]
+    return [ufos[master_id] for master_id in master_id_order]
 
-    instances = data.pop('instances', [])
-    if do_filter_instances_by_family:
-        instances = list(filter_instances_by_family(instances,
-                                                    instance_family_name))
-    instance_data = {'data': instances}
 
-    # the 'Variation Font Origin' is a font-wide custom parameter, thus it is
-    # shared by all the master ufos; here we just get it from the first one
-    varfont_origin_key = "Variation Font Origin"
-    varfont_origin = first_ufo.lib.get(GLYPHS_PREFIX + varfont_origin_key)
-    if varfont_origin:
-        instance_data[varfont_origin_key] = varfont_origin
-    if debug:
-        return clear_data(data)
-    elif include_instances:
-        return result, instance_data
+def iter_master_ufos(data, family_name, workers=None, font_factory=None,
+                     include_backgrounds=True, glyphinfo_data=None):
+    """Build master UFOs from .glyphs data one at a time, and yield them in
+    master order.
+
+    If workers is greater than 1, masters are built by a pool of worker
+    processes, and sent back to this process as they are needed. If there are
+    fewer masters than workers, the glyphs of each master are built in
+    parallel instead.
+
+    The font-level custom parameters are compiled once for all masters, and
+    anchor propagation plans are shared by the masters built in the same
+    process.
+    """
+
+    custom_params_plan = compile_font_custom_params(
+        data, new_font(font_factory).info)
+    if workers is None or not 1 < workers <= len(data['fontMaster']):
+        anchor_plans = AnchorPlans()
+        for master in data['fontMaster']:
+            ufo, = build_ufos(master_data(data, master['id']), family_name,
+                              font_factory, workers, include_backgrounds,
+                              glyphinfo_data, custom_params_plan,
+                              anchor_plans)
+            yield ufo
+        return
+
+    from multiprocessing import Pool
+
+    jobs = ((master_data(data, master['id']), family_name, font_factory,
+             include_backgrounds, glyphinfo_data, custom_params_plan)
+            for master in data['fontMaster'])
+    pool = Pool(min(workers, len(data['fontMaster'])),
+                initializer=_init_master_worker)
+    try:
+        # at most `workers` masters are built or waiting to be yielded, so
+        # that the parent process never holds more of them than that
+        pending = deque(
+            pool.apply_async(_build_serialized_ufo, (job,))
+            for job in islice(jobs, workers))
+        while pending:
+            serialized = pending.popleft().get()
+            for job in islice(jobs, 1):
+                pending.append(
+                    pool.apply_async(_build_serialized_ufo, (job,)))
+            ufo = new_font(font_factory)
+            ufo.setDataFromSerialization(serialized)
+            del serialized
+            yield ufo
+    finally:
+        # don't wait for the remaining masters if the generator is closed
+        # early or a worker failed
+        pool.terminate()
+        pool.join()
+
+
+# anchor propagation plans shared by the masters built in a worker process
+_worker_anchor_plans = None
+
+
+def _init_master_worker():
+    global _worker_anchor_plans
+    _worker_anchor_plans = AnchorPlans()
+
+
+def _build_serialized_ufo(job):
+    """Build the single master in a worker process, and return it in a form
+    which can be sent back to the parent process.
+    """
+    (data, family_name, font_factory, include_backgrounds, glyphinfo_data,
+     custom_params_plan) = job
+    ufo, = build_ufos(data, family_name, font_factory,
+                      include_backgrounds=include_backgrounds,
+                      glyphinfo_data=glyphinfo_data,
+                      custom_params_plan=custom_params_plan,
+                      anchor_plans=_worker_anchor_plans)
+    return ufo.getDataForSerialization()
+
+
+def load_glyphs_in_parallel(ufos, glyph_layers, workers, font_factory=None,
+                            include_backgrounds=True, glyphinfo_data=None):
+    """Load glyph layers into their UFOs, using a pool of worker processes.
+
+    The layers are given as (layer_id, glyph_name, layer, glyph_data) tuples,
+    and are split into consecutive chunks of about the same cost. Glyphs are
+    added to the UFOs in the given order, as they would be by load_glyph.
+    """
+
+    from multiprocessing import Pool
+
+    chunks = chunk_glyph_layers(glyph_layers, workers * CHUNKS_PER_WORKER)
+    if not chunks:
+        return
+    postscriptNamesKey = PUBLIC_PREFIX + 'postscriptNames'
+    pool = Pool(min(workers, len(chunks)))
+    try:
+        built_chunks = pool.imap(
+            _build_serialized_glyphs,
+            [(chunk, font_factory, include_backgrounds, glyphinfo_data)
+             for chunk in chunks])
+        for chunk, built in zip(chunks, built_chunks):
+            for (layer_id, glyph_name, _, _), (serialized, production_name) \
+                    in zip(chunk, built):
+                ufo = ufos[layer_id]
+                glyph = ufo.newGlyph(glyph_name)
+                glyph.setDataFromSerialization(serialized)
+                if production_name is not None:
+                    if postscriptNamesKey not in ufo.lib:
+                        ufo.lib[postscriptNamesKey] = dict()
+                    ufo.lib[postscriptNamesKey][glyph_name] = production_name
+    finally:
+        pool.close()
+        pool.join()
+
+
+def chunk_glyph_layers(glyph_layers, count):
+    """Split glyph layers into at most `count` consecutive chunks of about
+    the same cost, counting the nodes and components of each layer.
+    """
+
+    costs = [
+        1 + len(layer.get('components', [])) +
+        sum(len(path.get('nodes', [])) for path in layer.get('paths', []))
+        for _, _, layer, _ in glyph_layers]
+    total = sum(costs)
+    chunks, chunk = [], []
+    cumulative_cost = 0
+    for glyph_layer, cost in zip(glyph_layers, costs):
+        chunk.append(glyph_layer)
+        cumulative_cost += cost
+        if cumulative_cost * count >= total * (len(chunks) + 1):
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _build_serialized_glyphs(job):
+    """Build a chunk of glyph layers in a worker process, and return each
+    glyph in a form which can be sent back to the parent process, along with
+    its production name if it has to be stored in the font.
+    """
+
+    chunk, font_factory, include_backgrounds, glyphinfo_data = job
+    font = new_font(font_factory)
+    postscriptNamesKey = PUBLIC_PREFIX + 'postscriptNames'
+    result = []
+    for _, glyph_name, layer, glyph_data in chunk:
+        glyph = font.newGlyph(glyph_name)
+        load_glyph(glyph, layer, glyph_data, include_backgrounds,
+                   glyphinfo_data)
+        production_name = font.lib.get(postscriptNamesKey, {}).pop(
+            glyph_name, None)
+        result.append((glyph.getDataForSerialization(), production_name))
+        del font[glyph_name]
+    return result
+
+
+def master_data(data, master_id):
+    """Return the part of .glyphs data needed to build a single master.
+
+    The builder does not modify its input, so everything but the lists which
+    are filtered down to the given master is shared with the original data.
+    """
+
+    result = dict(data)
+    result['fontMaster'] = [
+        master for master in data['fontMaster'] if master['id'] == master_id]
+    result['glyphs'] = glyphs = []
+    for glyph in data['glyphs']:
+        glyph = dict(glyph)
+        glyph['layers'] = [
+            layer for layer in glyph['layers']
+            if layer.get('associatedMasterId', layer['layerId']) == master_id]
+        glyphs.append(glyph)
+    kerning = data.get('kerning', {})
+    result['kerning'] = (
+        {master_id: kerning[master_id]} if master_id in kerning else {})
+    result.pop('instances', None)
     return result
 
 
-def generate_base_fonts(data, family_name):
-    """Generate a list of UFOs with metadata loaded from .glyphs data."""
-    from defcon import Font
+def new_font(font_factory=None):
+    """Return a new font created by font_factory, or a defcon font."""
+
+    if font_factory is None:
+        from defcon import Font
+        return Font()
+    return font_factory()
+
+
+def generate_base_fonts(data, family_name, font_factory=None,
+                        custom_params_plan=None):
+    """Generate a list of UFOs with metadata loaded from .glyphs data.
+
+    custom_params_plan holds the font-level custom parameters compiled by
+    compile_font_custom_params, which are compiled here by default.
+    """
 
     # "date" can be missing; Glyphs.app removes it on saving if it's empty:
     # https://github.com/googlei18n/glyphsLib/issues/134
-    date_created = data.pop('date', None)
+    date_created = data.get('date')
     if date_created is not None:
         date_created = to_ufo_time(date_created)
-    units_per_em = data.pop('unitsPerEm')
-    version_major = data.pop('versionMajor')
-    version_minor = data.pop('versionMinor')
-    user_data = data.pop('userData', {})
-    copyright = data.pop('copyright', None)
-    designer = data.pop('designer', None)
-    designer_url = data.pop('designerURL', None)
-    manufacturer = data.pop('manufacturer', None)
-    manufacturer_url = data.pop('manufacturerURL', None)
-
-    misc = ['DisplayStrings', 'disablesAutomaticAlignment', 'disablesNiceNames']
-    custom_params = parse_custom_params(data, misc)
+    units_per_em = data['unitsPerEm']
+    version_major = data['versionMajor']
+    version_minor = data['versionMinor']
+    user_data = get_whole(data, 'userData', {})
+    copyright = data.get('copyright')
+    designer = data.get('designer')
+    designer_url = data.get('designerURL')
+    manufacturer = data.get('manufacturer')
+    manufacturer_url = data.get('manufacturerURL')
 
     ufos = {}
     master_id_order = []
     for master in data['fontMaster']:
-        ufo = Font()
+        ufo = new_font(font_factory)
 
         if date_created is not None:
             ufo.info.openTypeHeadCreated = date_created
@@ -269,14 +594,14 @@ def generate_base_fonts(data, family_name):
         if manufacturer_url:
             ufo.info.openTypeNameManufacturerURL = manufacturer_url
 
-        ufo.info.ascender = master.pop('ascender')
-        ufo.info.capHeight = master.pop('capHeight')
-        ufo.info.descender = master.pop('descender')
-        ufo.info.xHeight = master.pop('xHeight')
+        ufo.info.ascender = master['ascender']
+        ufo.info.capHeight = master['capHeight']
+        ufo.info.descender = master['descender']
+        ufo.info.xHeight = master['xHeight']
 
-        horizontal_stems = master.pop('horizontalStems', None)
-        vertical_stems = master.pop('verticalStems', None)
-        italic_angle = -master.pop('italicAngle', 0)
+        horizontal_stems = master.get('horizontalStems')
+        vertical_stems = master.get('verticalStems')
+        italic_angle = -master.get('italicAngle', 0)
         if horizontal_stems:
             ufo.info.postscriptStemSnapH = horizontal_stems
         if vertical_stems:
@@ -287,9 +612,9 @@ def generate_base_fonts(data, family_name):
         else:
             is_italic = False
 
-        width = master.pop('width', '')
-        weight = master.pop('weight', '')
-        custom = master.pop('custom', '')
+        width = master.get('width', '')
+        weight = master.get('weight', '')
+        custom = master.get('custom', '')
         if weight:
             ufo.lib[GLYPHS_PREFIX + 'weight'] = weight
         if width:
@@ -309,12 +634,15 @@ def generate_base_fonts(data, family_name):
         ufo.info.styleMapFamilyName = styleMapFamilyName
         ufo.info.styleMapStyleName = styleMapStyleName
 
-        set_blue_values(ufo, master.pop('alignmentZones', []))
+        set_blue_values(ufo, master.get('alignmentZones', []))
         set_family_user_data(ufo, user_data)
-        set_master_user_data(ufo, master.pop('userData', {}))
+        set_master_user_data(ufo, get_whole(master, 'userData', {}))
         set_robofont_guidelines(ufo, master, is_global=True)
 
-        set_custom_params(ufo, parsed=custom_params)
+        if custom_params_plan is None:
+            # font-level parameters are the same for all masters
+            custom_params_plan = compile_font_custom_params(data, ufo.info)
+        apply_custom_params(ufo, custom_params_plan)
         # the misc attributes double as deprecated info attributes!
         # they are Glyphs-related, not OpenType-related, and don't go in info
         misc = ('customValue', 'weightValue', 'widthValue')
@@ -322,7 +650,7 @@ def generate_base_fonts(data, family_name):
 
         set_default_params(ufo)
 
-        master_id = master.pop('id')
+        master_id = master['id']
         ufo.lib[GLYPHS_PREFIX + 'fontMasterID'] = master_id
         master_id_order.append(master_id)
         ufos[master_id] = ufo
@@ -330,6 +658,14 @@ def generate_base_fonts(data, family_name):
     return ufos, master_id_order
 
 
+def compile_font_custom_params(data, info):
+    """Compile the font-level custom parameters of .glyphs data with
+    compile_custom_params, for UFOs with the given info."""
+
+    misc = ['DisplayStrings', 'disablesAutomaticAlignment', 'disablesNiceNames']
+    return compile_custom_params(parse_custom_params(data, misc), info)
+
+
 def _get_linked_style(style_name, is_bold, is_italic):
     # strip last occurrence of 'Regular', 'Bold', 'Italic' from style_name
     # depending on the values of is_bold and is_italic
@@ -381,9 +717,8 @@ def set_custom_params(ufo, parsed=None, data=None, misc_keys=(), non_info=()):
 
     Custom parameter data can be pre-parsed out of Glyphs data and provided via
     the `parsed` argument, otherwise `data` should be provided and will be
-    parsed. The `parsed` option is provided so that custom params can be popped
-    from Glyphs data once and used several times; in general this is used for
-    debugging purposes (to detect unused Glyphs data).
+    parsed. The `parsed` option is provided so that custom params can be parsed
+    from Glyphs data once and used several times.
 
     The `non_info` argument can be used to specify potential UFO info attributes
     which should not be put in UFO info.
@@ -394,91 +729,159 @@ def set_custom_params(ufo, parsed=None, data=None, misc_keys=(), non_info=()):
     else:
         assert data is None, "Shouldn't provide parsed data and data to parse."
 
-    fsSelection_flags = {'Use Typo Metrics', 'Has WWS Names'}
+    apply_custom_params(ufo, compile_custom_params(parsed, ufo.info, non_info))
+
+
+def compile_custom_params(parsed, info, non_info=()):
+    """Translate parsed custom parameters into a list of (kind, name, value)
+    operations for apply_custom_params, so that parameters shared by several
+    UFOs are only translated once.
+
+    `info` is the info object of one of the UFOs, used to find which
+    parameters are info attributes. Mutable values are copied by
+    apply_custom_params, so that they are not shared between UFOs.
+    """
+
+    operations = []
     for name, value in parsed:
-        name = normalize_custom_param_name(name)
+        name, converters = _translate_custom_param_name(name)
+        for converter in converters:
+            value = converter(value)
 
-        if name in fsSelection_flags:
+        if name in FS_SELECTION_BITS:
             if value:
-                if ufo.info.openTypeOS2Selection is None:
-                    ufo.info.openTypeOS2Selection = []
-                if name == 'Use Typo Metrics':
-                    ufo.info.openTypeOS2Selection.append(7)
-                elif name == 'Has WWS Names':
-                    ufo.info.openTypeOS2Selection.append(8)
-            continue
-
-        # deal with any Glyphs naming quirks here
-        if name == 'disablesNiceNames':
-            name = 'useNiceNames'
-            value = int(not value)
-
-        # convert code page numbers to OS/2 ulCodePageRange bits
-        if name == 'codePageRanges':
-            value = [CODEPAGE_RANGES[v] for v in value]
-
-        # convert Glyphs' GASP Table to UFO openTypeGaspRangeRecords
-        if name == 'GASP Table':
-            name = 'openTypeGaspRangeRecords'
-            # XXX maybe the parser should cast the gasp values to int?
-            value = {int(k): int(v) for k, v in value.items()}
-            gasp_records = []
-            # gasp range records must be sorted in ascending rangeMaxPPEM
-            for max_ppem, gasp_behavior in sorted(value.items()):
-                gasp_records.append({
-                    'rangeMaxPPEM': max_ppem,
-                    'rangeGaspBehavior': bin_to_int_list(gasp_behavior)})
-            value = gasp_records
-
-        opentype_attr_prefix_pairs = (
-            ('hhea', 'Hhea'), ('description', 'NameDescription'),
-            ('license', 'NameLicense'),
-            ('licenseURL', 'NameLicenseURL'),
-            ('preferredFamilyName', 'NamePreferredFamilyName'),
-            ('preferredSubfamilyName', 'NamePreferredSubfamilyName'),
-            ('compatibleFullName', 'NameCompatibleFullName'),
-            ('sampleText', 'NameSampleText'),
-            ('WWSFamilyName', 'NameWWSFamilyName'),
-            ('WWSSubfamilyName', 'NameWWSSubfamilyName'),
-            ('panose', 'OS2Panose'),
-            ('typo', 'OS2Typo'), ('unicodeRanges', 'OS2UnicodeRanges'),
-            ('codePageRanges', 'OS2CodePageRanges'),
-            ('weightClass', 'OS2WeightClass'),
-            ('widthClass', 'OS2WidthClass'),
-            ('win', 'OS2Win'), ('vendorID', 'OS2VendorID'),
-            ('versionString', 'NameVersion'), ('fsType', 'OS2Type'))
-        for glyphs_prefix, ufo_prefix in opentype_attr_prefix_pairs:
-            name = re.sub(
-                '^' + glyphs_prefix, 'openType' + ufo_prefix, name)
-
-        postscript_attrs = ('underlinePosition', 'underlineThickness')
-        if name in postscript_attrs:
-            name = 'postscript' + name[0].upper() + name[1:]
-
-        # enforce that winAscent/Descent are positive, according to UFO spec
-        if name.startswith('openTypeOS2Win') and value < 0:
-            value = -value
-
-        # The value of these could be a float, and ufoLib/defcon expect an int.
-        if name in ('openTypeOS2WeightClass', 'openTypeOS2WidthClass'):
-            value = int(value)
-
-        if name == 'glyphOrder':
+                operations.append(
+                    ('fsSelection', None, FS_SELECTION_BITS[name]))
+        elif name == 'glyphOrder':
             # store the public.glyphOrder in lib.plist
-            ufo.lib[PUBLIC_PREFIX + name] = value
+            operations.append(('lib', PUBLIC_PREFIX + name, value))
         elif name == 'Filter':
             filter_struct = parse_glyphs_filter(value)
-            if not filter_struct:
-                continue
-            if UFO2FT_FILTERS_KEY not in ufo.lib.keys():
-                ufo.lib[UFO2FT_FILTERS_KEY] = []
-            ufo.lib[UFO2FT_FILTERS_KEY].append(filter_struct)
-        elif hasattr(ufo.info, name) and name not in non_info:
+            if filter_struct:
+                operations.append(('filter', None, filter_struct))
+        elif name not in non_info and _is_info_attr(info, name):
             # most OpenType table entries go in the info object
-            setattr(ufo.info, name, value)
+            operations.append(('info', name, value))
         else:
             # everything else gets dumped in the lib
-            ufo.lib[GLYPHS_PREFIX + name] = value
+            operations.append(('lib', GLYPHS_PREFIX + name, value))
+    return operations
+
+
+def apply_custom_params(ufo, operations):
+    """Set custom parameters compiled by compile_custom_params in an UFO."""
+
+    info, lib = ufo.info, ufo.lib
+    for kind, name, value in operations:
+        if isinstance(value, (list, dict)):
+            value = copy.deepcopy(value)
+        if kind == 'info':
+            setattr(info, name, value)
+        elif kind == 'lib':
+            lib[name] = value
+        elif kind == 'fsSelection':
+            if info.openTypeOS2Selection is None:
+                info.openTypeOS2Selection = []
+            info.openTypeOS2Selection.append(value)
+        elif kind == 'filter':
+            if UFO2FT_FILTERS_KEY not in lib.keys():
+                lib[UFO2FT_FILTERS_KEY] = []
+            lib[UFO2FT_FILTERS_KEY].append(value)
+
+
+FS_SELECTION_BITS = {'Use Typo Metrics': 7, 'Has WWS Names': 8}
+
+OPENTYPE_ATTR_PREFIX_PAIRS = (
+    ('hhea', 'Hhea'), ('description', 'NameDescription'),
+    ('license', 'NameLicense'),
+    ('licenseURL', 'NameLicenseURL'),
+    ('preferredFamilyName', 'NamePreferredFamilyName'),
+    ('preferredSubfamilyName', 'NamePreferredSubfamilyName'),
+    ('compatibleFullName', 'NameCompatibleFullName'),
+    ('sampleText', 'NameSampleText'),
+    ('WWSFamilyName', 'NameWWSFamilyName'),
+    ('WWSSubfamilyName', 'NameWWSSubfamilyName'),
+    ('panose', 'OS2Panose'),
+    ('typo', 'OS2Typo'), ('unicodeRanges', 'OS2UnicodeRanges'),
+    ('codePageRanges', 'OS2CodePageRanges'),
+    ('weightClass', 'OS2WeightClass'),
+    ('widthClass', 'OS2WidthClass'),
+    ('win', 'OS2Win'), ('vendorID', 'OS2VendorID'),
+    ('versionString', 'NameVersion'), ('fsType', 'OS2Type'))
+
+POSTSCRIPT_ATTRS = ('underlinePosition', 'underlineThickness')
+
+# custom parameter name -> (UFO name, value converters)
+_custom_param_translations = {}
+
+# (info class, name) -> whether name is an attribute of the info
+_info_attrs = {}
+
+
+def _translate_custom_param_name(name):
+    """Return the UFO name of a custom parameter, and the functions converting
+    its value, in order."""
+
+    translation = _custom_param_translations.get(name)
+    if translation is not None:
+        return translation
+    glyphs_name = name
+    converters = []
+    name = normalize_custom_param_name(name)
+
+    # deal with any Glyphs naming quirks here
+    if name == 'disablesNiceNames':
+        name = 'useNiceNames'
+        converters.append(lambda value: int(not value))
+
+    # convert code page numbers to OS/2 ulCodePageRange bits
+    if name == 'codePageRanges':
+        converters.append(
+            lambda value: [CODEPAGE_RANGES[v] for v in value])
+
+    # convert Glyphs' GASP Table to UFO openTypeGaspRangeRecords
+    if name == 'GASP Table':
+        name = 'openTypeGaspRangeRecords'
+        converters.append(_gasp_range_records)
+
+    for glyphs_prefix, ufo_prefix in OPENTYPE_ATTR_PREFIX_PAIRS:
+        if name.startswith(glyphs_prefix):
+            name = 'openType' + ufo_prefix + name[len(glyphs_prefix):]
+
+    if name in POSTSCRIPT_ATTRS:
+        name = 'postscript' + name[0].upper() + name[1:]
+
+    # enforce that winAscent/Descent are positive, according to UFO spec
+    if name.startswith('openTypeOS2Win'):
+        converters.append(lambda value: -value if value < 0 else value)
+
+    # The value of these could be a float, and ufoLib/defcon expect an int.
+    if name in ('openTypeOS2WeightClass', 'openTypeOS2WidthClass'):
+        converters.append(int)
+
+    translation = _custom_param_translations[glyphs_name] = (
+        name, tuple(converters))
+    return translation
+
+
+def _gasp_range_records(value):
+    # XXX maybe the parser should cast the gasp values to int?
+    value = {int(k): int(v) for k, v in value.items()}
+    gasp_records = []
+    # gasp range records must be sorted in ascending rangeMaxPPEM
+    for max_ppem, gasp_behavior in sorted(value.items()):
+        gasp_records.append({
+            'rangeMaxPPEM': max_ppem,
+            'rangeGaspBehavior': bin_to_int_list(gasp_behavior)})
+    return gasp_records
+
+
+def _is_info_attr(info, name):
+    key = (type(info), name)
+    is_info_attr = _info_attrs.get(key)
+    if is_info_attr is None:
+        is_info_attr = _info_attrs[key] = hasattr(info, name)
+    return is_info_attr
 
 
 def parse_glyphs_filter(filter_str):
@@ -580,11 +983,11 @@ def set_robofont_guidelines(ufo_obj, glyphs_data, is_global=False):
 
     new_guidelines = []
     for guideline in guidelines:
-        x, y = guideline.pop('position')
-        angle = guideline.pop('angle', 0)
+        x, y = guideline['position']
+        angle = guideline.get('angle', 0)
         new_guideline = {'x': x, 'y': y, 'angle': angle, 'isGlobal': is_global}
 
-        locked = guideline.pop('locked', False)
+        locked = guideline.get('locked', False)
         if locked:
             new_guideline['locked'] = True
 
@@ -599,22 +1002,22 @@ def set_robofont_glyph_background(glyph, key, background):
         return
 
     new_background = {}
-    new_background['lib'] = background.pop('lib', {})
+    new_background['lib'] = get_whole(background, 'lib', {})
 
     anchors = []
     for anchor in background.get('anchors', []):
-        x, y = anchor.pop('position')
-        anchors.append({'x': x, 'y': y, 'name': anchor.pop('name')})
+        x, y = anchor['position']
+        anchors.append({'x': x, 'y': y, 'name': anchor['name']})
     new_background['anchors'] = anchors
 
     components = []
     for component in background.get('components', []):
         new_component = {
-            'baseGlyph': component.pop('name'),
-            'transformation': component.pop('transform', (1, 0, 0, 1, 0, 0))}
+            'baseGlyph': component['name'],
+            'transformation': component.get('transform', (1, 0, 0, 1, 0, 0))}
 
         for meta_attr in ['disableAlignment', 'locked']:
-            value = component.pop(meta_attr, False)
+            value = component.get(meta_attr, False)
             if value:
                 new_component[meta_attr] = True
 
@@ -624,16 +1027,16 @@ def set_robofont_glyph_background(glyph, key, background):
     contours = []
     for path in background.get('paths', []):
         points = []
-        for x, y, node_type, smooth in path.pop('nodes', []):
+        for x, y, node_type, smooth in path.get('nodes', []):
             point = {'x': x, 'y': y, 'smooth': smooth}
             if node_type in ['line', 'curve', 'qcurve']:
                 point['segmentType'] = node_type
             points.append(point)
         contours.append({'points': points})
-        path.pop('closed', None)  # not used, but remove for debug purposes
+        path.get('closed')  # not used, but read for debug purposes
     new_background['contours'] = contours
 
-    new_background['width'] = background.pop('width', glyph.width)
+    new_background['width'] = background.get('width', glyph.width)
     new_background['name'] = glyph.name
     new_background['unicodes'] = []
 
@@ -678,83 +1081,13 @@ def parse_custom_params(data, misc_keys):
 
     params = []
     for p in data.get('customParameters', []):
-        params.append((p.pop('name'), p.pop('value')))
+        params.append((p['name'], get_whole(p, 'value')))
     for key in misc_keys:
-        try:
-            val = data.pop(key)
-        except KeyError:
-            continue
-        params.append((key, val))
+        if key in data:
+            params.append((key, data[key]))
     return params
 
 
-def load_kerning(ufo, kerning_data):
-    """Add .glyphs kerning to an UFO."""
-
-    warning_msg = 'Non-existent glyph class %s found in kerning rules.'
-    class_glyph_pairs = []
-
-    for left, pairs in kerning_data.items():
-        match = re.match(r'@MMK_L_(.+)', left)
-        left_is_class = bool(match)
-        if left_is_class:
-            left = 'public.kern1.%s' % match.group(1)
-            if left not in ufo.groups:
-                logger.warn(warning_msg % left)
-                continue
-        for right, kerning_val in pairs.items():
-            match = re.match(r'@MMK_R_(.+)', right)
-            right_is_class = bool(match)
-            if right_is_class:
-                right = 'public.kern2.%s' % match.group(1)
-                if right not in ufo.groups:
-                    logger.warn(warning_msg % right)
-                    continue
-            if left_is_class != right_is_class:
-                if left_is_class:
-                    pair = (left, right, True)
-                else:
-                    pair = (right, left, False)
-                class_glyph_pairs.append(pair)
-            ufo.kerning[left, right] = kerning_val
-
-    seen = {}
-    for classname, glyph, is_left_class in reversed(class_glyph_pairs):
-        remove_rule_if_conflict(ufo, seen, classname, glyph, is_left_class)
-
-
-def remove_rule_if_conflict(ufo, seen, classname, glyph, is_left_class):
-    """Check if a class-to-glyph kerning rule has a conflict with any existing
-    rule in `seen`, and remove any conflicts if they exist.
-    """
-
-    original_pair = (classname, glyph) if is_left_class else (glyph, classname)
-    val = ufo.kerning[original_pair]
-    rule = original_pair + (val,)
-
-    old_glyphs = ufo.groups[classname]
-    new_glyphs = []
-    for member in old_glyphs:
-        pair = (member, glyph) if is_left_class else (glyph, member)
-        existing_rule = seen.get(pair)
-        if (existing_rule is not None and
-            existing_rule[-1] != val and
-            pair not in ufo.kerning):
-            logger.warn(
-                'Conflicting kerning rules found in %s master for glyph pair '
-                '"%s, %s" (%s and %s), removing pair from latter rule' %
-                ((ufo.info.styleName,) + pair + (existing_rule, rule)))
-        else:
-            new_glyphs.append(member)
-            seen[pair] = rule
-
-    if new_glyphs != old_glyphs:
-        del ufo.kerning[original_pair]
-        for member in new_glyphs:
-            pair = (member, glyph) if is_left_class else (glyph, member)
-            ufo.kerning[pair] = val
-
-
 def filter_instances_by_family(instances, family_name=None):
     """Yield instances whose 'familyName' custom parameter is
     equal to 'family_name'.
@@ -769,33 +1102,62 @@ def filter_instances_by_family(instances, family_name=None):
             yield instance
 
 
-def load_glyph_libdata(glyph, layer):
+def load_glyph_libdata(glyph, layer, include_background=True):
     """Add to a glyph's lib data."""
 
     set_robofont_guidelines(glyph, layer)
-    set_robofont_glyph_background(glyph, 'background', layer.get('background'))
+    if include_background:
+        set_robofont_glyph_background(
+            glyph, 'background', layer.get('background'))
+    else:
+        mark_read(layer.get('background'))
     for key in ['annotations', 'hints']:
-        try:
-            value = layer.pop(key)
-        except KeyError:
-            continue
-        glyph.lib[GLYPHS_PREFIX + key] = value
+        if key in layer:
+            glyph.lib[GLYPHS_PREFIX + key] = get_whole(layer, key)
 
     # data related to components stored in lists of booleans
     # each list's elements correspond to the components in order
     for key in ['disableAlignment', 'locked']:
-        values = [c.pop(key, False) for c in layer.get('components', [])]
+        values = [c.get(key, False) for c in layer.get('components', [])]
         if any(values):
             key = key[0].upper() + key[1:]
             glyph.lib['%scomponents%s' % (GLYPHS_PREFIX, key)] = values
 
 
-def load_glyph(glyph, layer, glyph_data):
-    """Add .glyphs metadata, paths, components, and anchors to a glyph."""
+def load_glyph(glyph, layer, glyph_data, include_background=True,
+               glyphinfo_data=None):
+    """Add .glyphs metadata, paths, components, and anchors to a glyph, and
+    its background layer if include_background is True. Production names and
+    categories are looked up in glyphinfo_data, as in build_ufos.
+
+    The glyph is expected to be new. The notifications of defcon glyphs are
+    held off while they are loaded, and observers are told about the change
+    once it is complete.
+    """
 
     uval = glyph_data.get('unicode')
     if uval is not None:
+        # set before disabling notifications, so that the layer's unicode
+        # data is kept up to date
         glyph.unicode = uval
+    if not hasattr(glyph, 'disableNotifications'):
+        # e.g. glyphsLib.ufomodel glyphs, which have no notifications
+        _load_glyph(glyph, layer, glyph_data, include_background,
+                    glyphinfo_data, bulk=False)
+        return
+    glyph.disableNotifications()
+    glyph.lib.disableNotifications()
+    try:
+        _load_glyph(glyph, layer, glyph_data, include_background,
+                    glyphinfo_data, bulk=True)
+    finally:
+        glyph.lib.enableNotifications()
+        glyph.enableNotifications()
+    glyph.dirty = True
+
+
+def _load_glyph(glyph, layer, glyph_data, include_background, glyphinfo_data,
+                bulk):
     note = glyph_data.get('note')
     if note is not None:
         glyph.note = note
@@ -809,7 +1171,9 @@ def load_glyph(glyph, layer, glyph_data):
     export = glyph_data.get('export')
     if export is not None:
         glyph.lib[GLYPHLIB_PREFIX + 'Export'] = export
-    glyphinfo = glyphsLib.glyphdata.get_glyph(glyph.name)
+    if glyphinfo_data is None:
+        glyphinfo_data = glyphsLib.glyphdata.DEFAULT_DATA
+    glyphinfo = glyphsLib.glyphdata.get_glyph(glyph.name, glyphinfo_data)
     production_name = glyph_data.get('production') or glyphinfo.production_name
     if production_name != glyph.name:
         postscriptNamesKey = PUBLIC_PREFIX + 'postscriptNames'
@@ -818,10 +1182,9 @@ def load_glyph(glyph, layer, glyph_data):
         glyph.font.lib[postscriptNamesKey][glyph.name] = production_name
 
     for key in ['leftMetricsKey', 'rightMetricsKey', 'widthMetricsKey']:
-        glyph_metrics_key = None
-        try:
-            glyph_metrics_key = layer.pop(key)
-        except KeyError:
+        if key in layer:
+            glyph_metrics_key = layer[key]
+        else:
             glyph_metrics_key = glyph_data.get(key)
         if glyph_metrics_key:
             glyph.lib[GLYPHLIB_PREFIX + key] = glyph_metrics_key
@@ -840,7 +1203,7 @@ def load_glyph(glyph, layer, glyph_data):
         glyph.lib[GLYPHLIB_PREFIX + 'subCategory'] = subCategory
 
     # load width before background, which is loaded with lib data
-    width = layer.pop('width')
+    width = layer['width']
     if category == 'Mark' and subCategory == 'Nonspacing' and width > 0:
         # zero the width of Nonspacing Marks like Glyphs.app does on export
         # TODO: check for customParameter DisableAllAutomaticBehaviour
@@ -848,52 +1211,194 @@ def load_glyph(glyph, layer, glyph_data):
         glyph.width = 0
     else:
         glyph.width = width
-    load_glyph_libdata(glyph, layer)
+    load_glyph_libdata(glyph, layer, include_background)
 
-    pen = glyph.getPointPen()
-    draw_paths(pen, layer.get('paths', []))
+    if bulk and BulkPointPen.supports(glyph):
+        pen = BulkPointPen(glyph)
+        draw_paths(pen, layer.get('paths', []))
+        pen.set_contours()
+    else:
+        pen = glyph.getPointPen()
+        draw_paths(pen, layer.get('paths', []))
     draw_components(pen, layer.get('components', []))
     add_anchors_to_glyph(glyph, layer.get('anchors', []))
 
 
 def draw_paths(pen, paths):
-    """Draw .glyphs paths onto a pen."""
+    """Draw .glyphs paths onto a pen.
+
+    Pens with an addContour method, taking a list of points as returned by
+    path_points, get each path in a single call.
+    """
 
+    add_contour = getattr(pen, 'addContour', None)
     for path in paths:
-        pen.beginPath()
-        nodes = path.get('nodes', [])
-        if not nodes:
-            pen.endPath()
+        points = path_points(path)
+        if add_contour is not None:
+            add_contour(points)
             continue
-        if not path.pop('closed', False):
-            x, y, node_type, smooth = nodes.pop(0)
-            assert node_type == 'line', 'Open path starts with off-curve points'
-            pen.addPoint((x, y), segmentType='move')
-        else:
-            # In Glyphs.app, the starting node of a closed contour is always
-            # stored at the end of the nodes list.
-            nodes.insert(0, nodes.pop())
-        for x, y, node_type, smooth in nodes:
-            if node_type not in ['line', 'curve', 'qcurve']:
-                node_type = None
-            pen.addPoint((x, y), segmentType=node_type, smooth=smooth)
+        pen.beginPath()
+        for x, y, segment_type, smooth in points:
+            pen.addPoint((x, y), segmentType=segment_type, smooth=smooth)
         pen.endPath()
 
 
+def path_points(path):
+    """Return the points of a .glyphs path as (x, y, segment_type, smooth)
+    tuples, in UFO order.
+    """
+
+    nodes = path.get('nodes', [])
+    if not nodes:
+        return []
+    if path.get('closed', False):
+        # In Glyphs.app, the starting node of a closed contour is always
+        # stored at the end of the nodes list.
+        start = -1
+    else:
+        start = 0
+    points = [
+        (x, y, node_type if node_type in SEGMENT_TYPES else None, smooth)
+        for x, y, node_type, smooth in (
+            nodes[i] for i in range(start, len(nodes) + start))]
+    if start == 0:
+        x, y, node_type, smooth = points[0]
+        assert node_type == 'line', 'Open path starts with off-curve points'
+        points[0] = (x, y, 'move', False)
+    return points
+
+
+class BulkPointPen(object):
+    """A point pen for adding outlines to a new defcon glyph in bulk.
+
+    Contours are collected in the form defcon uses for glyphs loaded from a
+    UFO, and set on the glyph at once by set_contours, so that no contour or
+    point objects are created (and no notifications posted) until the
+    glyph's contours are accessed. Components are built detached from the
+    glyph, and only added to it once complete.
+    """
+
+    def __init__(self, glyph):
+        self.glyph = glyph
+        self.contours = []
+
+    @staticmethod
+    def supports(glyph):
+        """Return whether contours can be set on a glyph in bulk.
+
+        This relies on defcon's private storage of lazily loaded contours,
+        which is checked once for each glyph class. Otherwise the glyph's own
+        point pen is to be used.
+        """
+        glyph_class = type(glyph)
+        supported = _bulk_support.get(glyph_class)
+        if supported is None:
+            supported = _bulk_support[glyph_class] = _check_bulk_support(
+                glyph_class)
+        return supported
+
+    def beginPath(self, identifier=None, **kwargs):
+        contour = {'points': []}
+        if identifier is not None:
+            contour['identifier'] = identifier
+        self.contours.append(contour)
+
+    def endPath(self):
+        pass
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None, **kwargs):
+        point_kwargs = {'segmentType': segmentType, 'smooth': smooth,
+                        'name': name}
+        if identifier is not None:
+            point_kwargs['identifier'] = identifier
+        self.contours[-1]['points'].append(((tuple(pt),), point_kwargs))
+
+    def addContour(self, points):
+        """Add a contour from a list of (x, y, segment_type, smooth)."""
+        self.contours.append({'points': [
+            (((x, y),), {'segmentType': segment_type, 'smooth': smooth,
+                         'name': None})
+            for x, y, segment_type, smooth in points]})
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None,
+                     **kwargs):
+        component = self.glyph.componentClass()
+        component.baseGlyph = baseGlyphName
+        component.transformation = transformation
+        component.identifier = identifier
+        self.glyph.appendComponent(component)
+
+    def set_contours(self):
+        """Add the collected contours to the glyph.
+
+        They are set in bulk if the glyph is still empty. Otherwise they are
+        drawn with the glyph's point pen, since setting them in bulk clears
+        the glyph first.
+        """
+        if not self.contours:
+            return
+        glyph = self.glyph
+        if _is_empty_glyph(glyph):
+            glyph.setDataFromSerialization(
+                {'_shallowLoadedContours': self.contours})
+            return
+        pen = glyph.getPointPen()
+        for contour in self.contours:
+            pen.beginPath(identifier=contour.get('identifier'))
+            for args, kwargs in contour['points']:
+                pen.addPoint(*args, **kwargs)
+            pen.endPath()
+
+
+# glyph class -> whether BulkPointPen can set its contours
+_bulk_support = {}
+
+
+def _check_bulk_support(glyph_class):
+    """Return whether contours set in bulk on a new glyph of the given class
+    are read back as such."""
+
+    try:
+        glyph = glyph_class()
+        if not (hasattr(glyph, '_shallowLoadedContours') and
+                hasattr(glyph, 'setDataFromSerialization')):
+            return False
+        pen = BulkPointPen(glyph)
+        pen.addContour([(0, 0, 'move', False), (1, 2, 'line', True)])
+        pen.set_contours()
+        return ([[(p.x, p.y, p.segmentType, p.smooth) for p in contour]
+                 for contour in glyph] ==
+                [[(0, 0, 'move', False), (1, 2, 'line', True)]])
+    except Exception:
+        return False
+
+
+def _is_empty_glyph(glyph):
+    """Return whether a defcon glyph has no outlines, anchors, guidelines or
+    image."""
+
+    # the image property would create an image, which is slow
+    image = getattr(glyph, '_image', None)
+    return not (len(glyph) or glyph.components or glyph.anchors or
+                glyph.guidelines or
+                (image is not None and image.fileName is not None))
+
+
 def draw_components(pen, components):
     """Draw .glyphs components onto a pen, adding them to the parent glyph."""
 
     for component in components:
-        pen.addComponent(component.pop('name'),
-                         component.pop('transform', (1, 0, 0, 1, 0, 0)))
+        pen.addComponent(component['name'],
+                         component.get('transform', (1, 0, 0, 1, 0, 0)))
 
 
 def add_anchors_to_glyph(glyph, anchors):
     """Add .glyphs anchors to a glyph."""
 
     for anchor in anchors:
-        x, y = anchor.pop('position')
-        anchor_dict = {'name': anchor.pop('name'), 'x': x, 'y': y}
+        x, y = anchor['position']
+        anchor_dict = {'name': anchor['name'], 'x': x, 'y': y}
         glyph.appendAnchor(glyph.anchorClass(anchorDict=anchor_dict))
 
 
@@ -907,23 +1412,28 @@ def add_glyph_to_groups(kerning_groups, glyph_data):
     for side, group_key in group_keys.items():
         if group_key not in glyph_data:
             continue
-        group = 'public.kern%s.%s' % (side, glyph_data.pop(group_key))
-        kerning_groups[group] = kerning_groups.get(group, []) + [glyph_name]
+        group = 'public.kern%s.%s' % (side, glyph_data[group_key])
+        kerning_groups.setdefault(group, []).append(glyph_name)
 
 
 def add_groups_to_ufo(ufo, kerning_groups):
     """Add kerning groups to an UFO."""
 
-    for name, glyphs in kerning_groups.items():
-        ufo.groups[name] = glyphs
+    ufo.groups.update(kerning_groups)
 
 
-def build_gdef(ufo):
+def build_gdef(ufo, glyph_order=None, glyphinfo_data=None):
     """Build a table GDEF statement for ligature carets."""
     bases, ligatures, marks, carets = set(), set(), set(), {}
     category_key = GLYPHLIB_PREFIX + 'category'
     subCategory_key = GLYPHLIB_PREFIX + 'subCategory'
-    for glyph in ufo:
+    glyphs = list(ufo)
+    if glyphinfo_data is None:
+        glyphinfo_data = glyphsLib.glyphdata.DEFAULT_DATA
+    glyphinfos = glyphsLib.glyphdata.get_glyphs(
+        [glyph.name for glyph in glyphs], glyphinfo_data)
+    for glyph, default_category, default_subCategory in zip(
+            glyphs, glyphinfos.categories, glyphinfos.subCategories):
         has_attaching_anchor = False
         for anchor in glyph.anchors:
             name = anchor.get('name')
@@ -932,15 +1442,14 @@ def build_gdef(ufo):
             if name and name.startswith('caret_') and 'x' in anchor:
                 carets.setdefault(glyph.name, []).append(round(anchor['x']))
         lib = glyph.lib
-        glyphinfo = glyphsLib.glyphdata.get_glyph(glyph.name)
         # first check glyph.lib for category/subCategory overrides; else use
         # global values from GlyphData
         category = lib.get(category_key)
         if category is None:
-            category = glyphinfo.category
+            category = default_category
         subCategory = lib.get(subCategory_key)
         if subCategory is None:
-            subCategory = glyphinfo.subCategory
+            subCategory = default_subCategory
 
         # Glyphs.app assigns glyph classes like this:
         #
@@ -968,9 +1477,9 @@ def build_gdef(ufo):
     if not any((bases, ligatures, marks, carets)):
         return None
     lines = ['table GDEF {', '  # automatic']
-    glyphOrder = ufo.lib[PUBLIC_PREFIX + 'glyphOrder']
-    glyphIndex = lambda glyph: glyphOrder.index(glyph)
-    fmt = lambda g: ('[%s]' % ' '.join(sorted(g, key=glyphIndex))) if g else ''
+    if glyph_order is None:
+        glyph_order = GlyphOrder(ufo.lib[PUBLIC_PREFIX + 'glyphOrder'])
+    fmt = lambda g: ('[%s]' % ' '.join(glyph_order.sorted(g))) if g else ''
     lines.extend([
         '  GlyphClassDef',
         '    %s, # Base' % fmt(bases),
@@ -984,8 +1493,14 @@ def build_gdef(ufo):
     return '\n'.join(lines)
 
 
-def add_features_to_ufo(ufo, feature_prefixes, classes, features):
-    """Write an UFO's OpenType feature file."""
+def add_features_to_ufo(ufo, feature_prefixes, classes, features,
+                        glyph_order=None, glyphinfo_data=None):
+    """Write an UFO's OpenType feature file.
+
+    glyph_order is the GlyphOrder of the font, which is indexed from the
+    public.glyphOrder lib key if not given. glyphinfo_data is used as in
+    build_ufos.
+    """
 
     autostr = lambda automatic: '# automatic\n' if automatic else ''
 
@@ -1017,7 +1532,7 @@ def add_features_to_ufo(ufo, feature_prefixes, classes, features):
         lines.append('} %s;' % name)
         feature_defs.append('\n'.join(lines))
     fea_str = '\n\n'.join(feature_defs)
-    gdef_str = build_gdef(ufo)
+    gdef_str = build_gdef(ufo, glyph_order, glyphinfo_data)
 
     # make sure feature text is a unicode string, for defcon
     full_text = '\n\n'.join(
@@ -16,13 +16,21 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 from fontTools.misc.py23 import basestring
+from array import array
+from collections import OrderedDict
 import datetime
 import logging
 import re
 
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # python 2
+    from collections import MutableMapping
+
 __all__ = [
     'cast_data',
-    'uncast_data'
+    'uncast_data',
+    'KerningTable',
 ]
 
 logger = logging.getLogger(__name__)
@@ -272,18 +280,216 @@ class RWDateTime(RWGlyphs):
         return str(val) + ' +0000'
 
 
+class KerningTable(MutableMapping):
+    """Compact kerning data for all masters of a font.
+
+    Behaves like the nested `{master_id: {left: {right: value}}}` dicts found
+    in .glyphs files, but glyph and class names are interned once in a table
+    shared by all masters, and each master stores its pairs in flat typed
+    arrays. This takes about 12 bytes per pair instead of the 100+ bytes of
+    nested dicts, which matters for fonts with hundreds of thousands of
+    kerning pairs per master.
+
+    The table, its masters and their rows can be edited like dicts; a master
+    or row which is edited is stored in an OrderedDict from then on.
+    """
+
+    def __init__(self, src=()):
+        self._names = []
+        self._name_ids = {}
+        self._masters = OrderedDict()
+        for master_id, master_map in _items(src):
+            self._masters[master_id] = MasterKerning(self, master_map)
+
+    def _intern(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def __getitem__(self, master_id):
+        return self._masters[master_id]
+
+    def __setitem__(self, master_id, master_map):
+        self._masters[master_id] = master_map
+
+    def __delitem__(self, master_id):
+        del self._masters[master_id]
+
+    def __iter__(self):
+        return iter(self._masters)
+
+    def __len__(self):
+        return len(self._masters)
+
+    def __repr__(self):
+        return '<%s: %d masters>' % (type(self).__name__, len(self))
+
+
+class MasterKerning(MutableMapping):
+    """Kerning of a single master, mapping left names to kerning rows.
+
+    Pairs are kept in source order: rows are stored one after the other in
+    `_rights` and `_values`, and `_starts[i]` is the offset of row `i`. Row
+    objects are created on first access, and then reused so that edits made
+    to them are kept.
+    """
+
+    def __init__(self, table, src=()):
+        self._names = table._names
+        self._name_ids = table._name_ids
+        self._lefts = array(str('i'))
+        self._starts = array(str('i'), [0])
+        self._rights = array(str('i'))
+        self._values = array(str('d'))
+        self._rows = {}
+        self._row_objects = {}
+        # the rows by left name, once this master was edited
+        self._dict = None
+        for left, glyph_map in _items(src):
+            for right, value in _items(glyph_map):
+                self._rights.append(table._intern(right))
+                self._values.append(float(num.read(value)))
+            left_id = table._intern(left)
+            self._rows[left_id] = len(self._lefts)
+            self._lefts.append(left_id)
+            self._starts.append(len(self._rights))
+
+    def _row(self, index):
+        row = self._row_objects.get(index)
+        if row is None:
+            row = self._row_objects[index] = KerningRow(
+                self, self._starts[index], self._starts[index + 1])
+        return row
+
+    def _edit(self):
+        if self._dict is None:
+            self._dict = OrderedDict(self.items())
+        return self._dict
+
+    def __getitem__(self, left):
+        if self._dict is not None:
+            return self._dict[left]
+        index = self._rows.get(self._name_ids.get(left))
+        if index is None:
+            raise KeyError(left)
+        return self._row(index)
+
+    def __setitem__(self, left, glyph_map):
+        self._edit()[left] = glyph_map
+
+    def __delitem__(self, left):
+        del self._edit()[left]
+
+    def __iter__(self):
+        if self._dict is not None:
+            return iter(self._dict)
+        names = self._names
+        return (names[left_id] for left_id in self._lefts)
+
+    def __len__(self):
+        if self._dict is not None:
+            return len(self._dict)
+        return len(self._lefts)
+
+    def items(self):
+        if self._dict is not None:
+            return list(self._dict.items())
+        names = self._names
+        return [(names[left_id], self._row(index))
+                for index, left_id in enumerate(self._lefts)]
+
+
+class KerningRow(MutableMapping):
+    """The kerning pairs of a single left glyph or class, mapping right
+    names to values.
+
+    Right names are indexed on the first lookup of a pair.
+    """
+
+    def __init__(self, master, start, end):
+        self._master = master
+        self._start = start
+        self._end = end
+        # positions of the pairs by right name, built on first lookup
+        self._index = None
+        # the values by right name, once this row was edited
+        self._dict = None
+
+    def __getitem__(self, right):
+        if self._dict is not None:
+            return self._dict[right]
+        if self._index is None:
+            names = self._master._names
+            rights = self._master._rights
+            self._index = {}
+            for i in range(self._start, self._end):
+                self._index.setdefault(names[rights[i]], i)
+        i = self._index.get(right)
+        if i is None:
+            raise KeyError(right)
+        return _num_value(self._master._values[i])
+
+    def _edit(self):
+        if self._dict is None:
+            self._dict = OrderedDict(self.items())
+            self._index = None
+        return self._dict
+
+    def __setitem__(self, right, value):
+        self._edit()[right] = value
+
+    def __delitem__(self, right):
+        del self._edit()[right]
+
+    def __iter__(self):
+        if self._dict is not None:
+            return iter(self._dict)
+        names = self._master._names
+        rights = self._master._rights
+        return (names[rights[i]] for i in range(self._start, self._end))
+
+    def __len__(self):
+        if self._dict is not None:
+            return len(self._dict)
+        return self._end - self._start
+
+    def items(self):
+        if self._dict is not None:
+            return list(self._dict.items())
+        names = self._master._names
+        rights = self._master._rights
+        values = self._master._values
+        return [(names[rights[i]], _num_value(values[i]))
+                for i in range(self._start, self._end)]
+
+
+def _items(mapping):
+    return mapping.items() if mapping else ()
+
+
+def _num_value(value):
+    return int(value) if value.is_integer() else value
+
+
 class RWKerning(RWGlyphs):
     """Read/write kerning data structure."""
 
     def read(self, src):
-        """Cast the values in kerning data to ints."""
-        for master_id, master_map in src.items():
-            for left_glyph, glyph_map in master_map.items():
-                for right_glyph, value in glyph_map.items():
-                    glyph_map[right_glyph] = num.read(value)
-        return src
+        """Cast the values in kerning data to numbers, and store them in a
+        compact KerningTable."""
+        return KerningTable(src)
 
     def write(self, val):
+        if isinstance(val, KerningTable):
+            return OrderedDict(
+                (master_id, OrderedDict(
+                    (left, OrderedDict(
+                        (right, num.write(value))
+                        for right, value in glyph_map.items()))
+                    for left, glyph_map in master_map.items()))
+                for master_id, master_map in val.items())
         for master_id, master_map in val.items():
             for left_glyph, glyph_map in master_map.items():
                 for right_glyph, value in glyph_map.items():
@@ -16,21 +16,540 @@
 
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from fontTools import agl
 from fontTools.misc.py23 import unichr
-from glyphsLib import glyphdata_generated
+import hashlib
+import io
+import logging
+import mmap
+import os
+import stat
 import sys
 import struct
+import tempfile
 import unicodedata
+import xml.etree.ElementTree as etree
+import zlib
 
 NARROW_PYTHON_BUILD = sys.maxunicode < 0x10FFFF
 
+logger = logging.getLogger(__name__)
+
 
 Glyph = namedtuple("Glyph", "name,production_name,unicode,category,subCategory")
 
+GlyphColumns = namedtuple(
+    "GlyphColumns", "names,production_names,unicodes,categories,subCategories")
+
+CacheInfo = namedtuple("CacheInfo", "hits,misses,maxsize,currsize")
+
+# maximum number of glyphs kept by get_glyph, oldest lookups are dropped first
+CACHE_MAXSIZE = 65536
+
+_cache = OrderedDict()
+_cache_stats = {"hits": 0, "misses": 0}
+
+# Reverse indexes, from the Unicode codepoint of a glyph as a hexadecimal
+# string ("00E9") and from its production name to its nice name. They are
+# stored in the data file, and built on first use for other data sources.
+REVERSE_INDEX_TABLES = ("NAMES_BY_UNICODE", "NAMES_BY_PRODUCTION_NAME")
+
+_reverse_indexes = {}
+
+DATA_FILE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "GlyphData.bin")
+
+# Layout of the binary data file, all integers being unsigned 32-bit big
+# endian: a header with the magic string, the format version and the offset
+# of each table in DATA_FILE_TABLES order, then the tables. A table holds
+# its number of entries n and of hash slots m, n + 1 offsets to the keys
+# and, except for sets, n + 1 offsets to the values, relative to the start
+# of the table, the m hash slots, then the UTF-8 encoded keys in sorted order
+# and the values in the same order. The slot of a key is given by its CRC-32
+# modulo m, a power of two, followed by linear probing, and holds the index
+# of the key plus one, or zero if it is empty. None is encoded as a single
+# 0xFF byte, which does not occur in UTF-8, and a pair as its two items
+# separated by a null byte.
+DATA_FILE_MAGIC = b"GLDT"
+DATA_FILE_VERSION = 2
+DATA_FILE_TABLES = (
+    ("PRODUCTION_NAMES", "string"),
+    ("IRREGULAR_UNICODE_STRINGS", "string"),
+    ("MISSING_UNICODE_STRINGS", "set"),
+    ("DEFAULT_CATEGORIES", "pair"),
+    ("IRREGULAR_CATEGORIES", "pair"),
+) + tuple((name, "string") for name in REVERSE_INDEX_TABLES)
+
+_NONE_BYTES = b"\xff"
+_UINT32 = struct.Struct(">L")
+
+
+class GlyphDataFile(object):
+    """Glyph data read from a binary data file, see write_data_file.
+
+    The file is memory-mapped, so that processes using the same file share
+    its pages, and the tables are looked up in hash tables. They have
+    the names of the tables of the glyphdata_generated module, with the
+    get and __contains__ methods of dicts and sets.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with io.open(path, "rb") as fp:
+            self._buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        header = struct.Struct(">4sL%dL" % len(DATA_FILE_TABLES))
+        if (len(self._buffer) < header.size or
+                self._buffer[:8] != DATA_FILE_MAGIC +
+                _UINT32.pack(DATA_FILE_VERSION)):
+            self._buffer.close()
+            raise ValueError("Unsupported glyph data file: %s" % path)
+        offsets = header.unpack_from(self._buffer)[2:]
+        for (name, kind), offset in zip(DATA_FILE_TABLES, offsets):
+            setattr(self, name, _DataTable(self._buffer, offset, kind))
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self.path)
+
+    def __reduce__(self):
+        # reopened from its path, e.g. when sent to worker processes
+        return (_open_data_file, (self.path,))
+
+
+class _DataTable(object):
+    """A hash table of a glyph data file."""
+
+    def __init__(self, buf, offset, kind):
+        self._buffer = buf
+        self._offset = offset
+        self._kind = kind
+        self._count, slot_count = struct.unpack_from(">LL", buf, offset)
+        self._mask = slot_count - 1
+        self._keys = offset + 8
+        self._values = self._keys + 4 * (self._count + 1)
+        self._slots = self._values
+        if kind != "set":
+            self._slots += 4 * (self._count + 1)
+
+    def _bytes(self, index_offset, i):
+        start, end = struct.unpack_from(
+            ">LL", self._buffer, index_offset + 4 * i)
+        return self._buffer[self._offset + start:self._offset + end]
+
+    def _find(self, key):
+        key = _encode(key)
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            i = _UINT32.unpack_from(self._buffer, self._slots + 4 * slot)[0]
+            if not i:
+                return None
+            if self._bytes(self._keys, i - 1) == key:
+                return i - 1
+            slot = (slot + 1) & self._mask
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        if i is None:
+            return default
+        if self._kind == "set":
+            return True
+        value = self._bytes(self._values, i)
+        if self._kind == "pair":
+            return tuple(_decode(item) for item in value.split(b"\0"))
+        return _decode(value)
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield _decode(self._bytes(self._keys, i))
+
+
+def _encode(value):
+    if value is None:
+        return _NONE_BYTES
+    return value.encode("utf-8")
+
+
+def _decode(value):
+    if value == _NONE_BYTES:
+        return None
+    return value.decode("utf-8")
+
+
+def write_data_file(data, path):
+    """Write glyph data to a binary file which can be read by GlyphDataFile.
+
+    The data has the tables of the glyphdata_generated module as attributes.
+    The reverse indexes are built from them if they are missing.
+    """
+    tables = []
+    reverse_indexes = _build_reverse_indexes(data)
+    for name, kind in DATA_FILE_TABLES:
+        table = getattr(data, name, None)
+        if table is None:
+            table = reverse_indexes[name]
+        if kind == "set":
+            entries = [(_encode(key), None) for key in table]
+        elif kind == "pair":
+            entries = [(_encode(key), b"\0".join(_encode(v) for v in value))
+                       for key, value in table.items()]
+        else:
+            entries = [(_encode(key), _encode(value))
+                       for key, value in table.items()]
+        tables.append(_pack_table(sorted(entries), kind))
+
+    offset = 8 + 4 * len(tables)
+    header = [DATA_FILE_MAGIC, _UINT32.pack(DATA_FILE_VERSION)]
+    for table in tables:
+        header.append(_UINT32.pack(offset))
+        offset += len(table)
+    with io.open(path, "wb") as fp:
+        fp.write(b"".join(header + tables))
+
+
+def _pack_table(entries, kind):
+    keys = [key for key, _ in entries]
+    columns = [keys]
+    if kind != "set":
+        columns.append([value for _, value in entries])
+    slot_count = 1
+    while slot_count < 2 * len(entries):
+        slot_count *= 2
+    slots = [0] * slot_count
+    for i, key in enumerate(keys):
+        slot = zlib.crc32(key) & (slot_count - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = i + 1
+
+    position = 8 + 4 * (len(columns) * (len(entries) + 1) + slot_count)
+    offsets = []
+    for column in columns:
+        for item in column:
+            offsets.append(position)
+            position += len(item)
+        offsets.append(position)
+    integers = [len(entries), slot_count] + offsets + slots
+    blob = [struct.pack(">%dL" % len(integers), *integers)]
+    for column in columns:
+        blob.extend(column)
+    return b"".join(blob)
+
+
+def _load_default_data():
+    """Return the glyph data file shipped with glyphsLib, or the
+    glyphdata_generated module if it cannot be read."""
+    try:
+        return GlyphDataFile(DATA_FILE_PATH)
+    except (IOError, OSError, ValueError):
+        from glyphsLib import glyphdata_generated
+        return glyphdata_generated
+
+
+DEFAULT_DATA = _load_default_data()
+
+# data files opened by load_glyph_data, by path, so that the get_glyph cache
+# is shared by the data loaded several times from the same files
+_data_files = {}
+
+
+def load_glyph_data(paths, cache_dir=None):
+    """Return the default glyph data, overridden by the glyphs of project
+    GlyphData XML files.
+
+    A glyph of an XML file replaces the default data for its name, and is
+    defined by its production, unicode, category and subCategory attributes.
+    Later files override earlier ones. The merged data is written as a data
+    file to cache_dir (by default, a glyphsLib directory of the user's cache
+    directory), named after a hash of the XML files and the default data, and
+    later calls with the same files open it directly. It is not cached if
+    cache_dir is writable by other users.
+    """
+    hasher = hashlib.sha1(_UINT32.pack(DATA_FILE_VERSION))
+    if isinstance(DEFAULT_DATA, GlyphDataFile):
+        hasher.update(DEFAULT_DATA._buffer[:])
+    contents = []
+    for path in paths:
+        with io.open(path, "rb") as fp:
+            content = fp.read()
+        contents.append(content)
+        hasher.update(_UINT32.pack(len(content)))
+        hasher.update(content)
+
+    if cache_dir is None:
+        cache_dir = _default_cache_dir()
+    if not _make_private_dir(cache_dir):
+        logger.warn("Not caching glyph data in %s, which is not a directory "
+                    "private to the current user" % cache_dir)
+        return _merge_glyph_data(contents)
+    path = os.path.join(cache_dir, "GlyphData-%s.bin" % hasher.hexdigest())
+    try:
+        return _open_data_file(path)
+    except (IOError, OSError, ValueError):
+        pass
+
+    data = _merge_glyph_data(contents)
+    # written next to its final path and renamed, so that concurrent builds
+    # never read a partially written file
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        write_data_file(data, temp_path)
+        try:
+            os.rename(temp_path, path)
+        except OSError:  # on Windows, if written by a concurrent build
+            if not os.path.exists(path):
+                raise
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return _open_data_file(path)
+
+
+def _merge_glyph_data(contents):
+    """Return the default glyph data overridden by GlyphData XML contents."""
+    data = _MergedData(DEFAULT_DATA)
+    for content in contents:
+        for glyph in etree.fromstring(content).findall("glyph"):
+            data.override(glyph.attrib)
+    return data
+
+
+def _default_cache_dir():
+    """Return the per-user directory where merged glyph data is cached."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = (os.environ.get("XDG_CACHE_HOME") or
+                os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "glyphsLib")
+
 
-def get_glyph(name, data=glyphdata_generated):
+def _make_private_dir(path):
+    """Create a directory only accessible to the current user if it does not
+    exist, and return whether it can be trusted: a directory (not a link)
+    owned by the current user, which other users can't write to.
+    """
+    try:
+        os.makedirs(path, 0o700)
+    except OSError:  # existing, or created by a concurrent build
+        pass
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(st.st_mode):
+        return False
+    if not hasattr(os, "getuid"):
+        # on Windows, the default directory is private to the user
+        return True
+    return (st.st_uid == os.getuid() and
+            not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _open_data_file(path):
+    data = _data_files.get(path)
+    if data is None:
+        data = _data_files[path] = GlyphDataFile(path)
+    return data
+
+
+class _MergedData(object):
+    """Glyph data tables copied from a data source, to be overridden."""
+
+    def __init__(self, base):
+        for name, kind in DATA_FILE_TABLES:
+            if name in REVERSE_INDEX_TABLES:
+                continue
+            table = getattr(base, name)
+            if kind == "set":
+                setattr(self, name, set(table))
+            else:
+                setattr(self, name, {key: table.get(key) for key in table})
+
+    def override(self, attrs):
+        """Replace the data of a glyph with the attributes of its GlyphData
+        XML element."""
+        name = attrs["name"]
+        prodname = attrs.get("production", name)
+        if prodname != name:
+            self.PRODUCTION_NAMES[name] = prodname
+        else:
+            self.PRODUCTION_NAMES.pop(name, None)
+        unistr = attrs.get("unicode")
+        unistr = unichr(int(unistr, 16)) if unistr else None
+        self.IRREGULAR_UNICODE_STRINGS.pop(name, None)
+        self.MISSING_UNICODE_STRINGS.discard(name)
+        if unistr is None:
+            self.MISSING_UNICODE_STRINGS.add(name)
+        elif unistr != agl.toUnicode(prodname):
+            self.IRREGULAR_UNICODE_STRINGS[name] = unistr
+        self.IRREGULAR_CATEGORIES[name] = (
+            attrs.get("category"), attrs.get("subCategory"))
+
+
+def get_glyph(name, data=DEFAULT_DATA):
+    """Return the Glyph info for a glyph name, looked up in data.
+
+    Results are cached by name and data source, see cache_info and
+    clear_cache. Lookups in unhashable data sources are not cached.
+    """
+    if not _is_hashable(data):
+        return _build_glyph(name, data)
+    key = (name, data)
+    glyph = _cache.get(key)
+    if glyph is not None:
+        _cache_stats["hits"] += 1
+        return glyph
+    _cache_stats["misses"] += 1
+    glyph = _build_glyph(name, data)
+    _add_to_cache(key, glyph)
+    return glyph
+
+
+def get_glyphs(names, data=DEFAULT_DATA):
+    """Return the Glyph infos for a list of glyph names, looked up in data, as
+    a GlyphColumns tuple of lists in the order of the names.
+
+    Results are shared with the get_glyph cache. The glyphs missing from it
+    are resolved together, so that the category rules of a base name (e.g.
+    "a" for "a.sc" and "a.alt") and of a Unicode string are applied once.
+    """
+    glyphs = []
+    base_categories, unicode_categories = {}, {}
+    cached = _is_hashable(data)
+    for name in names:
+        if not cached:
+            glyphs.append(_build_glyph(
+                name, data, base_categories, unicode_categories))
+            continue
+        key = (name, data)
+        glyph = _cache.get(key)
+        if glyph is not None:
+            _cache_stats["hits"] += 1
+        else:
+            _cache_stats["misses"] += 1
+            glyph = _build_glyph(
+                name, data, base_categories, unicode_categories)
+            _add_to_cache(key, glyph)
+        glyphs.append(glyph)
+    if not glyphs:
+        return GlyphColumns([], [], [], [], [])
+    return GlyphColumns(*[list(column) for column in zip(*glyphs)])
+
+
+def _is_hashable(data):
+    """Return whether a data source can be used as a cache key, which is not
+    the case of e.g. a namedtuple of dicts."""
+    try:
+        hash(data)
+    except TypeError:
+        return False
+    return True
+
+
+def _add_to_cache(key, glyph):
+    if len(_cache) >= CACHE_MAXSIZE:
+        _cache.popitem(last=False)
+    _cache[key] = glyph
+
+
+def cache_info():
+    """Return the hits, misses, maximum and current size of the get_glyph
+    cache."""
+    return CacheInfo(_cache_stats["hits"], _cache_stats["misses"],
+                     CACHE_MAXSIZE, len(_cache))
+
+
+def clear_cache():
+    """Clear the get_glyph cache and its statistics.
+
+    Needed when the contents of a data source passed to get_glyph change.
+    """
+    _cache.clear()
+    _cache_stats["hits"] = _cache_stats["misses"] = 0
+    _reverse_indexes.clear()
+
+
+def get_name_by_unicode(codepoint, data=DEFAULT_DATA):
+    """Return the nice name of the glyph for a Unicode codepoint, looked up in
+    data, or None if there is none.
+    """
+    name = _get_reverse_index(data, "NAMES_BY_UNICODE").get(
+        "%04X" % codepoint)
+    if name is None:
+        # glyphs named after the Adobe Glyph List are not in the data
+        name = agl.UV2AGL.get(codepoint)
+        if (name is not None and
+                get_glyph(name, data).unicode != unichr(codepoint)):
+            name = None
+    return name
+
+
+def get_name_by_production_name(production_name, data=DEFAULT_DATA):
+    """Return the nice name of the glyph with a production name, looked up in
+    data, or None if there is none.
+    """
+    name = _get_reverse_index(data, "NAMES_BY_PRODUCTION_NAME").get(
+        production_name)
+    if name is None and production_name not in data.PRODUCTION_NAMES:
+        # the production name of the other glyphs is their nice name
+        name = production_name
+    return name
+
+
+def _get_reverse_index(data, table_name):
+    table = getattr(data, table_name, None)
+    if table is None:
+        if not _is_hashable(data):
+            return _build_reverse_indexes(data)[table_name]
+        indexes = _reverse_indexes.get(data)
+        if indexes is None:
+            indexes = _reverse_indexes[data] = _build_reverse_indexes(data)
+        table = indexes[table_name]
+    return table
+
+
+def _build_reverse_indexes(data):
+    """Return the reverse index tables of data by name. Names are taken in
+    sorted order, the first one being kept for a key."""
+    by_production_name = {}
+    for name in sorted(data.PRODUCTION_NAMES):
+        by_production_name.setdefault(data.PRODUCTION_NAMES.get(name), name)
+
+    # names which are not in these tables have no Unicode string, or are
+    # their own production name, following the Adobe Glyph List
+    names = set(data.PRODUCTION_NAMES)
+    names.update(data.IRREGULAR_UNICODE_STRINGS)
+    names.update(data.IRREGULAR_CATEGORIES)
+    by_unicode = {}
+    base_categories, unicode_categories = {}, {}
+    for name in sorted(names):
+        glyph = _build_glyph(name, data, base_categories, unicode_categories)
+        codepoint = _get_codepoint(glyph.unicode)
+        if codepoint is not None:
+            by_unicode.setdefault("%04X" % codepoint, name)
+    return {"NAMES_BY_UNICODE": by_unicode,
+            "NAMES_BY_PRODUCTION_NAME": by_production_name}
+
+
+def _get_codepoint(unistr):
+    """Return the codepoint of a Unicode string of a single character, or
+    None."""
+    if not unistr:
+        return None
+    utf32_str = unistr.encode("utf-32-be")
+    if len(utf32_str) != 4:
+        return None
+    return struct.unpack(">L", utf32_str)[0]
+
+
+def _build_glyph(name, data, base_categories=None, unicode_categories=None):
     prodname = data.PRODUCTION_NAMES.get(name, name)
     unistr = data.IRREGULAR_UNICODE_STRINGS.get(name)
     if unistr is None:
@@ -39,7 +558,8 @@ def get_glyph(name, data=glyphdata_generated):
         unistr_result = unistr
     else:
         unistr_result = None
-    category, subCategory = _get_category(name, unistr, data)
+    category, subCategory = _get_category(
+        name, unistr, data, base_categories, unicode_categories)
     return Glyph(name, prodname, unistr_result, category, subCategory)
 
 
@@ -60,7 +580,13 @@ def _get_unicode_category(unistr):
     return unicodedata.ucd_3_2_0.category(first_char)
 
 
-def _get_category(name, unistr, data=glyphdata_generated):
+def _get_category(name, unistr, data=DEFAULT_DATA, base_categories=None,
+                  unicode_categories=None):
+    """Return the category and subCategory of a glyph.
+
+    base_categories and unicode_categories are optional dicts in which the
+    categories given by base names and Unicode strings are memoized.
+    """
     cat = data.IRREGULAR_CATEGORIES.get(name)
     if cat is not None:
         return cat
@@ -68,6 +594,31 @@ def _get_category(name, unistr, data=glyphdata_generated):
     basename = name.split(".", 1)[0]  # "A.alt27" --> "A"
     if not basename:  # handle ".notdef", ".null"
         basename = name
+    if base_categories is None:
+        cat = _get_base_category(basename, data)
+    elif basename in base_categories:
+        cat = base_categories[basename]
+    else:
+        cat = base_categories[basename] = _get_base_category(basename, data)
+    if cat is not None:
+        return cat
+
+    if unicode_categories is None:
+        cat = data.DEFAULT_CATEGORIES.get(
+            _get_unicode_category(unistr), (None, None))
+    elif unistr in unicode_categories:
+        cat = unicode_categories[unistr]
+    else:
+        cat = unicode_categories[unistr] = data.DEFAULT_CATEGORIES.get(
+            _get_unicode_category(unistr), (None, None))
+    if "_" in basename:
+        return (cat[0], "Ligature")
+    return cat
+
+
+def _get_base_category(basename, data):
+    """Return the category given by the base name of a glyph, or None if it
+    depends on the glyph's Unicode string."""
     cat = data.IRREGULAR_CATEGORIES.get(basename)
     if cat is not None:
         return cat
@@ -80,8 +631,4 @@ def _get_category(name, unistr, data=glyphdata_generated):
         return ("Symbol", "Geometry")
     if basename.startswith("uniF9"):
         return ("Letter", "Compatibility")
-    ucat = _get_unicode_category(unistr)
-    cat = data.DEFAULT_CATEGORIES.get(ucat, (None, None))
-    if "_" in basename:
-        return (cat[0], "Ligature")
-    return cat
+    return None
@@ -0,0 +1,192 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import hashlib
+import json
+import logging
+import os
+from io import open
+from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from fontTools.misc.py23 import tounicode, unicode
+
+from glyphsLib.glyphdata import get_glyph
+from glyphsLib.util import build_ufo_path, write_ufo
+
+__all__ = ['glyph_hashes', 'write_ufo_incrementally']
+
+logger = logging.getLogger(__name__)
+
+# increment when changing what is hashed, so that old manifests are ignored
+MANIFEST_VERSION = 1
+
+
+def glyph_hashes(data, master_id, include_backgrounds=True,
+                 glyphinfo_data=None):
+    """Return a dict of content hashes of the .glyphs glyphs for a master.
+
+    The hash of a glyph covers its metadata and its layers belonging to the
+    given master, including the ones associated with it. If
+    include_backgrounds is False, as when building with the same option, it
+    leaves out background layers. If glyphinfo_data is given, as when building
+    with project GlyphData files, it also covers the production name and
+    categories of the glyph in that data.
+    """
+
+    hashes = OrderedDict()
+    for glyph in data['glyphs']:
+        content = dict(glyph)
+        layers = [
+            layer for layer in glyph['layers']
+            if layer.get('associatedMasterId', layer['layerId']) == master_id]
+        if not include_backgrounds:
+            layers = [
+                {k: v for k, v in layer.items() if k != 'background'}
+                for layer in layers if 'associatedMasterId' not in layer]
+        content['layers'] = layers
+        if glyphinfo_data is not None:
+            content['glyphInfo'] = list(
+                get_glyph(glyph['glyphname'], glyphinfo_data))
+        hashes[glyph['glyphname']] = _hash(content)
+    return hashes
+
+
+def write_ufo_incrementally(ufo, out_dir, hashes):
+    """Write a UFO, only rewriting the files of a previous build which changed.
+
+    A manifest of the given glyph content hashes (see glyph_hashes) and of the
+    font-wide data is stored next to the UFO. If a manifest from a previous
+    build is found, only glyphs whose hash changed, or which use such glyphs
+    as components, are written, and glyphs which no longer exist are removed.
+    Font-wide files are only written if their data changed. Otherwise, the
+    UFO is written from scratch.
+    """
+
+    from ufoLib import UFOWriter
+    import glyphsLib
+
+    out_path = build_ufo_path(
+        out_dir, ufo.info.familyName, ufo.info.styleName)
+    manifest_path = os.path.splitext(out_path)[0] + '.manifest.json'
+    manifest = _read_manifest(manifest_path)
+    font_hashes = _font_hashes(ufo)
+    if (manifest is None or not os.path.isdir(out_path) or
+            manifest.get('version') != MANIFEST_VERSION or
+            manifest.get('glyphsLib') != glyphsLib.__version__):
+        old_font_hashes, old_hashes = None, None
+    else:
+        old_font_hashes, old_hashes = manifest['font'], manifest['glyphs']
+
+    # remove the manifest first, so that it never describes a UFO which was
+    # only partially written
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    if old_hashes is None:
+        write_ufo(ufo, out_dir)
+    else:
+        logger.info('Updating %s' % out_path)
+        changed = set(
+            name for name, value in hashes.items()
+            if old_hashes.get(name) != value)
+        changed.update(_component_users(ufo, changed))
+        writer = UFOWriter(out_path, formatVersion=3)
+        if font_hashes['fontinfo'] != old_font_hashes.get('fontinfo'):
+            writer.writeInfo(ufo.info)
+        if font_hashes['groups'] != old_font_hashes.get('groups'):
+            writer.writeGroups(ufo.groups)
+        if font_hashes['kerning'] != old_font_hashes.get('kerning'):
+            writer.writeKerning(ufo.kerning)
+        if font_hashes['lib'] != old_font_hashes.get('lib'):
+            writer.writeLib(dict(ufo.lib))
+        if (font_hashes['features'] != old_font_hashes.get('features') and
+                ufo.features.text is not None):
+            writer.writeFeatures(ufo.features.text)
+        glyph_set = writer.getGlyphSet()
+        for name in sorted(set(old_hashes) - set(hashes)):
+            if name in glyph_set:
+                glyph_set.deleteGlyph(name)
+        for name in sorted(changed):
+            glyph = ufo[name]
+            glyph_set.writeGlyph(name, glyph, glyph.drawPoints)
+        glyph_set.writeContents()
+        writer.setModificationTime()
+        logger.info('%d glyphs written' % len(changed))
+        ufo.path = out_path
+
+    manifest = OrderedDict([
+        ('version', MANIFEST_VERSION),
+        ('glyphsLib', glyphsLib.__version__),
+        ('font', font_hashes),
+        ('glyphs', hashes)])
+    with open(manifest_path, 'w', encoding='utf-8') as fp:
+        fp.write(tounicode(json.dumps(manifest, indent=0)))
+    return out_path
+
+
+def _read_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as fp:
+            return json.load(fp)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _font_hashes(ufo):
+    """Return hashes of the font-wide data of a UFO, by file name."""
+
+    return OrderedDict([
+        ('fontinfo', _hash(ufo.info.getDataForSerialization())),
+        ('groups', _hash(dict(ufo.groups))),
+        ('kerning', _hash(sorted(ufo.kerning.items()))),
+        ('lib', _hash(dict(ufo.lib))),
+        ('features', _hash(ufo.features.text))])
+
+
+def _component_users(ufo, glyph_names):
+    """Return the glyphs which use any of the given glyphs as a component,
+    directly or through other components.
+    """
+
+    users = {}
+    for glyph in ufo:
+        for component in glyph.components:
+            users.setdefault(component.baseGlyph, []).append(glyph.name)
+    result = set()
+    stack = list(glyph_names)
+    while stack:
+        for user in users.get(stack.pop(), ()):
+            if user not in result:
+                result.add(user)
+                stack.append(user)
+    return result
+
+
+def _hash(obj):
+    text = json.dumps(obj, sort_keys=True, default=_to_json)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _to_json(obj):
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    return unicode(obj)
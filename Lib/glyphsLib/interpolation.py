@@ -17,17 +17,22 @@ from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
 from collections import OrderedDict, namedtuple
+import copy
 import logging
 import os
 import xml.etree.ElementTree as etree
 
+from ufoLib import fontInfoAttributesVersion3
+
 from glyphsLib.builder import (
     set_custom_params, GLYPHS_PREFIX, build_stylemap_names
 )
-from glyphsLib.util import build_ufo_path, write_ufo, clean_ufo, clear_data
+from glyphsLib.util import (
+    build_ufo_path, write_ufo, clean_ufo, unused_data, track_data)
 
 __all__ = [
-    'interpolate', 'build_designspace', 'apply_instance_data'
+    'interpolate', 'interpolate_in_memory', 'build_designspace',
+    'apply_instance_data'
 ]
 
 logger = logging.getLogger(__name__)
@@ -73,14 +78,20 @@ WIDTH_CODES = {
 }
 
 
-def interpolate(ufos, master_dir, out_dir, instance_data, debug=False):
+def interpolate(ufos, master_dir, out_dir, instance_data, debug=False,
+                write_masters=True):
     """Create MutatorMath designspace and generate instances.
     Returns instance UFOs, or unused instance data if debug is True.
+
+    The masters are first written to master_dir, unless write_masters is
+    False, in which case they must have been written there already.
     """
     from mutatorMath.ufo import build
 
+    if debug:
+        instance_data = track_data(instance_data)
     designspace_path, instance_files = build_designspace(
-        ufos, master_dir, out_dir, instance_data)
+        ufos, master_dir, out_dir, instance_data, write_masters=write_masters)
 
     logger.info('Building instances')
     for path, _ in instance_files:
@@ -89,13 +100,17 @@ def interpolate(ufos, master_dir, out_dir, instance_data, debug=False):
 
     instance_ufos = apply_instance_data(instance_files)
     if debug:
-        return clear_data(instance_data)
+        return unused_data(instance_data)
     return instance_ufos
 
 
-def build_designspace(masters, master_dir, out_dir, instance_data):
+def build_designspace(masters, master_dir, out_dir, instance_data,
+                      write_masters=True):
     """Just create MutatorMath designspace without generating instances.
 
+    The masters are first written to master_dir, unless write_masters is
+    False, in which case they must have been written there already.
+
     Returns the path of the resulting designspace document and a list of
     (instance_path, instance_data) tuples which map instance UFO filenames to
     Glyphs data for that instance.
@@ -106,8 +121,9 @@ def build_designspace(masters, master_dir, out_dir, instance_data):
     assert all(m.info.familyName == base_family for m in masters), \
         'Masters must all have same family'
 
-    for font in masters:
-        write_ufo(font, master_dir)
+    if write_masters:
+        for font in masters:
+            write_ufo(font, master_dir)
 
     # needed so that added masters and instances have correct relative paths
     tmp_path = os.path.join(master_dir, 'tmp.designspace')
@@ -265,10 +281,7 @@ def add_masters_to_writer(ufos, regular, axes, writer):
         # Since glyphsLib will switch to DesignSpaceDocument once that is
         # integrated into fonttools, it's not worth fixing upstream.
         # https://github.com/googlei18n/glyphsLib/issues/165
-        location = OrderedDict()
-        for axis in axes:
-            location[axis] = font.lib.get(
-                GLYPHS_PREFIX + axis + 'Value', DEFAULT_LOCS[axis])
+        location = get_master_location(font, axes)
         is_regular = (font is regular)
         writer.addSource(
             path=font.path, name='%s %s' % (family, style),
@@ -277,6 +290,61 @@ def add_masters_to_writer(ufos, regular, axes, writer):
             copyLib=is_regular)
 
 
+def get_master_location(font, axes):
+    """Return the location of a master UFO, as an OrderedDict in axis order.
+    """
+    # MutatorMath.DesignSpaceDocumentWriter iterates over the location
+    # dictionary, which is non-deterministic so it can cause test failures.
+    # We therefore use an OrderedDict to which we insert in axis order.
+    # Since glyphsLib will switch to DesignSpaceDocument once that is
+    # integrated into fonttools, it's not worth fixing upstream.
+    # https://github.com/googlei18n/glyphsLib/issues/165
+    location = OrderedDict()
+    for axis in axes:
+        location[axis] = font.lib.get(
+            GLYPHS_PREFIX + axis + 'Value', DEFAULT_LOCS[axis])
+    return location
+
+
+def get_instance_attributes(family_name, axes, instance, out_dir):
+    """Return the attributes of an instance from Glyphs data, as keyword
+    arguments for DesignSpaceDocumentWriter.startInstance.
+    """
+    familyName, postScriptFontName = None, None
+    for p in instance.get('customParameters', ()):
+        param, value = p['name'], p['value']
+        if param == 'familyName':
+            familyName = value
+        elif param == 'postscriptFontName':
+            # Glyphs uses "postscriptFontName", not "postScriptFontName"
+            postScriptFontName = value
+    if familyName is None:
+        familyName = family_name
+
+    styleName = instance.get('name')
+    # see get_master_location for why this is an OrderedDict
+    location = OrderedDict()
+    for axis in axes:
+        location[axis] = instance.get(
+            'interpolation' + axis.title(), DEFAULT_LOCS[axis])
+    styleMapFamilyName, styleMapStyleName = build_stylemap_names(
+        family_name=familyName,
+        style_name=styleName,
+        is_bold=instance.get('isBold', False),
+        is_italic=instance.get('isItalic', False),
+        linked_style=instance.get('linkStyle')
+    )
+    return dict(
+        name=' '.join((familyName, styleName)),
+        location=location,
+        familyName=familyName,
+        styleName=styleName,
+        postScriptFontName=postScriptFontName,
+        styleMapFamilyName=styleMapFamilyName,
+        styleMapStyleName=styleMapStyleName,
+        fileName=build_ufo_path(out_dir, familyName, styleName))
+
+
 def add_instances_to_writer(writer, family_name, axes, instances, out_dir):
     """Add instances from Glyphs data to a MutatorMath document writer.
 
@@ -286,47 +354,10 @@ def add_instances_to_writer(writer, family_name, axes, instances, out_dir):
     """
     ofiles = []
     for instance in instances:
-        familyName, postScriptFontName = None, None
-        for p in instance.get('customParameters', ()):
-            param, value = p['name'], p['value']
-            if param == 'familyName':
-                familyName = value
-            elif param == 'postscriptFontName':
-                # Glyphs uses "postscriptFontName", not "postScriptFontName"
-                postScriptFontName = value
-        if familyName is None:
-            familyName = family_name
-
-        styleName = instance.get('name')
-        ufo_path = build_ufo_path(out_dir, familyName, styleName)
-        ofiles.append((ufo_path, instance))
-        # MutatorMath.DesignSpaceDocumentWriter iterates over the location
-        # dictionary, which is non-deterministic so it can cause test failures.
-        # We therefore use an OrderedDict to which we insert in axis order.
-        # Since glyphsLib will switch to DesignSpaceDocument once that is
-        # integrated into fonttools, it's not worth fixing upstream.
-        # https://github.com/googlei18n/glyphsLib/issues/165
-        location = OrderedDict()
-        for axis in axes:
-            location[axis] = instance.get(
-                'interpolation' + axis.title(), DEFAULT_LOCS[axis])
-        styleMapFamilyName, styleMapStyleName = build_stylemap_names(
-            family_name=familyName,
-            style_name=styleName,
-            is_bold=instance.get('isBold', False),
-            is_italic=instance.get('isItalic', False),
-            linked_style=instance.get('linkStyle')
-        )
-        writer.startInstance(
-            name=' '.join((familyName, styleName)),
-            location=location,
-            familyName=familyName,
-            styleName=styleName,
-            postScriptFontName=postScriptFontName,
-            styleMapFamilyName=styleMapFamilyName,
-            styleMapStyleName=styleMapStyleName,
-            fileName=ufo_path)
-
+        attributes = get_instance_attributes(
+            family_name, axes, instance, out_dir)
+        ofiles.append((attributes['fileName'], instance))
+        writer.startInstance(**attributes)
         writer.writeInfo()
         writer.writeKerning()
         writer.endInstance()
@@ -334,6 +365,113 @@ def add_instances_to_writer(writer, family_name, axes, instances, out_dir):
     return ofiles
 
 
+def interpolate_in_memory(masters, out_dir, instance_data, debug=False):
+    """Generate instances from master UFOs in memory, and write them.
+
+    This gives the same instances as interpolate, without writing the masters
+    and a designspace for MutatorMath to read back, or reading the written
+    instances again to apply the instance data: each instance is built from
+    the masters as they are, and written once.
+
+    Returns instance UFOs, or unused instance data if debug is True.
+    """
+    from mutatorMath.objects.location import Location
+    from mutatorMath.ufo.instance import InstanceWriter
+
+    if debug:
+        instance_data = track_data(instance_data)
+    base_family = masters[0].info.familyName
+    assert all(m.info.familyName == base_family for m in masters), \
+        'Masters must all have same family'
+
+    instances = list(filter(is_instance_active, instance_data.get('data', [])))
+    regular = find_regular_master(
+        masters=masters,
+        regularName=instance_data.get('Variation Font Origin'))
+    axes = get_axes(masters, regular, instances)
+    # the axes as read by MutatorMath from a designspace
+    mutator_axes = {}
+    for axis in axes.values():
+        mutator_axes[axis.name] = {
+            'name': axis.name, 'tag': axis.tag,
+            'minimum': float(axis.minimum), 'maximum': float(axis.maximum),
+            'default': float(axis.default),
+            'map': [(float(a), float(b)) for a, b in axis.map]}
+
+    sources = {}
+    for font in masters:
+        name = '%s %s' % (font.info.familyName, font.info.styleName)
+        location = Location(**{
+            axis: float(value)
+            for axis, value in get_master_location(font, axes).items()})
+        sources[name] = font, location
+        if font is regular:
+            regular_name = name
+
+    logger.info('Building instances')
+    instance_ufos = []
+    unicodes = glyph_names = None
+    for instance in instances:
+        attributes = get_instance_attributes(
+            base_family, axes, instance, out_dir)
+        path = attributes['fileName']
+        writer = InstanceWriter(path, ufoVersion=3, roundGeometry=True,
+                                axes=mutator_axes)
+        writer.setSources(sources)
+        if unicodes is None:
+            # the same for all instances
+            unicodes = writer.makeUnicodeMapFromSources()
+            glyph_names = writer.getAvailableGlyphnames()
+        writer.setFamilyName(attributes['familyName'])
+        writer.setStyleName(attributes['styleName'])
+        if attributes['postScriptFontName'] is not None:
+            writer.setPostScriptFontName(attributes['postScriptFontName'])
+        writer.setStyleMapFamilyName(attributes['styleMapFamilyName'])
+        writer.setStyleMapStyleName(attributes['styleMapStyleName'])
+        writer.setLocation(Location(**{
+            axis: float(value)
+            for axis, value in attributes['location'].items()}))
+        for glyph_name in glyph_names:
+            try:
+                writer.addGlyph(glyph_name, unicodes.get(glyph_name))
+            except AssertionError:
+                pass
+        writer.addKerning()
+        writer.addInfo(copySourceName=regular_name)
+        # copied info values are shared with the regular master, and may be
+        # extended in place by the custom parameters of the instance; they
+        # are reset first, as defcon ignores values equal to the current one
+        info = writer.font.info
+        for attr in fontInfoAttributesVersion3:
+            value = getattr(info, attr, None)
+            if (isinstance(value, (list, dict)) and
+                    value is getattr(regular.info, attr)):
+                setattr(info, attr, None)
+                setattr(info, attr, copy.deepcopy(value))
+        if regular.features.text is not None:
+            writer.font.features.text = regular.features.text
+        writer.setGroups(
+            regular.groups,
+            getattr(regular, 'kerningGroupConversionRenameMaps', None))
+        writer.setLib(copy.deepcopy(dict(regular.lib)))
+        failed = writer.getFailed()
+        if failed:
+            logger.warn('Errors calculating %d glyphs of %s: %s' % (
+                len(failed), path, ', '.join(sorted(failed))))
+
+        ufo = writer.font
+        set_weight_class(ufo, instance)
+        set_width_class(ufo, instance)
+        set_custom_params(ufo, data=instance)
+        clean_ufo(path)
+        ufo.save(path, formatVersion=3)
+        instance_ufos.append(ufo)
+
+    if debug:
+        return unused_data(instance_data)
+    return instance_ufos
+
+
 def _set_class_from_instance(ufo, data, key, codes):
     class_name = data.get(key)
     if class_name:
@@ -0,0 +1,147 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import logging
+
+__all__ = ['load_kerning']
+
+logger = logging.getLogger(__name__)
+
+GLYPHS_LEFT_CLASS_PREFIX = '@MMK_L_'
+GLYPHS_RIGHT_CLASS_PREFIX = '@MMK_R_'
+UFO_LEFT_GROUP_PREFIX = 'public.kern1.'
+UFO_RIGHT_GROUP_PREFIX = 'public.kern2.'
+
+
+def load_kerning(ufo, kerning_data):
+    """Add .glyphs kerning to an UFO, whose kerning groups must already be
+    loaded.
+    """
+
+    warning_msg = 'Non-existent glyph class %s found in kerning rules.'
+    groups = ufo.groups
+    left_prefix_len = len(GLYPHS_LEFT_CLASS_PREFIX)
+    right_prefix_len = len(GLYPHS_RIGHT_CLASS_PREFIX)
+    class_glyph_pairs = []
+    # collected first and added at once, as each assignment to the kerning
+    # of a defcon font posts a notification
+    kerning = {}
+
+    for left, pairs in kerning_data.items():
+        left_is_class = (left.startswith(GLYPHS_LEFT_CLASS_PREFIX) and
+                         len(left) > left_prefix_len)
+        if left_is_class:
+            left = UFO_LEFT_GROUP_PREFIX + left[left_prefix_len:]
+            if left not in groups:
+                logger.warn(warning_msg % left)
+                continue
+        for right, kerning_val in pairs.items():
+            right_is_class = (right.startswith(GLYPHS_RIGHT_CLASS_PREFIX) and
+                              len(right) > right_prefix_len)
+            if right_is_class:
+                right = UFO_RIGHT_GROUP_PREFIX + right[right_prefix_len:]
+                if right not in groups:
+                    logger.warn(warning_msg % right)
+                    continue
+            if left_is_class != right_is_class:
+                if left_is_class:
+                    pair = (left, right, True)
+                else:
+                    pair = (right, left, False)
+                class_glyph_pairs.append(pair)
+            kerning[left, right] = kerning_val
+    ufo.kerning.update(kerning)
+
+    remove_conflicting_rules(ufo, class_glyph_pairs)
+
+
+def remove_conflicting_rules(ufo, class_glyph_pairs):
+    """Remove conflicts between class-to-glyph and glyph-to-class kerning
+    rules.
+
+    The rules are given as (class name, glyph name, is_left_class) tuples, in
+    source order. A glyph pair covered by both a left-class rule and a
+    right-class rule with different values, and not kerned on its own, is
+    kept in the rule which comes last. The other rule is replaced with rules
+    for each of its class members except the conflicting ones.
+
+    A glyph is expected to be in at most one kerning group per side, so the
+    only rules which can conflict with a left-class rule (L, g) are
+    right-class rules (h, R) with h in L and R the group of g, and the other
+    way around. Rules are indexed by this pair of groups, so that resolving
+    conflicts takes time proportional to the number of rules, plus the size of
+    the classes of the rules which have to be broken up.
+    """
+
+    left_group_of, right_group_of = {}, {}
+    for name, members in ufo.groups.items():
+        if name.startswith(UFO_LEFT_GROUP_PREFIX):
+            group_of = left_group_of
+        elif name.startswith(UFO_RIGHT_GROUP_PREFIX):
+            group_of = right_group_of
+        else:
+            continue
+        for member in members:
+            group_of[member] = name
+
+    # rules already processed, by (left group, right group) of the glyph
+    # pairs they cover, as (glyph, members still covered or None if all of
+    # them, rule) tuples
+    seen_left, seen_right = {}, {}
+    for classname, glyph, is_left_class in reversed(class_glyph_pairs):
+        if is_left_class:
+            original_pair = (classname, glyph)
+            groups_key = (classname, right_group_of.get(glyph))
+            candidates = seen_right.get(groups_key, ())
+        else:
+            original_pair = (glyph, classname)
+            groups_key = (left_group_of.get(glyph), classname)
+            candidates = seen_left.get(groups_key, ())
+        val = ufo.kerning[original_pair]
+        rule = original_pair + (val,)
+
+        conflicts = {}
+        for other_glyph, covered, existing_rule in candidates:
+            if covered is not None and glyph not in covered:
+                continue
+            pair = ((other_glyph, glyph) if is_left_class
+                    else (glyph, other_glyph))
+            if existing_rule[-1] != val and pair not in ufo.kerning:
+                conflicts[other_glyph] = existing_rule
+
+        covered = None
+        if conflicts:
+            covered = set()
+            for member in ufo.groups[classname]:
+                pair = (member, glyph) if is_left_class else (glyph, member)
+                existing_rule = conflicts.get(member)
+                if existing_rule is not None:
+                    logger.warn(
+                        'Conflicting kerning rules found in %s master for '
+                        'glyph pair "%s, %s" (%s and %s), removing pair from '
+                        'latter rule' %
+                        ((ufo.info.styleName,) + pair + (existing_rule, rule)))
+                else:
+                    covered.add(member)
+            del ufo.kerning[original_pair]
+            ufo.kerning.update(
+                ((member, glyph) if is_left_class else (glyph, member), val)
+                for member in ufo.groups[classname] if member in covered)
+
+        seen = seen_left if is_left_class else seen_right
+        seen.setdefault(groups_key, []).append((glyph, covered, rule))
@@ -0,0 +1,298 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A lightweight in-memory UFO model.
+
+These objects implement the part of the defcon API which the builder uses to
+populate fonts, without defcon's notifications, dirty tracking or validation.
+They can be passed to to_ufos as font_factory=glyphsLib.ufomodel.Font, when
+the masters are only written to disk or handed to a compiler.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from ufoLib import fontInfoAttributesVersion3
+
+__all__ = ['Font', 'Info', 'Features', 'Glyph', 'Contour', 'Point',
+           'Component', 'Anchor', 'GlyphPointPen']
+
+
+class Font(object):
+    """A font with a single layer of glyphs."""
+
+    __slots__ = ('info', 'lib', 'groups', 'kerning', 'features', 'path',
+                 '_glyphs')
+
+    def __init__(self):
+        self.info = Info()
+        self.lib = {}
+        self.groups = {}
+        self.kerning = {}
+        self.features = Features()
+        self.path = None
+        self._glyphs = {}
+
+    def newGlyph(self, name):
+        glyph = Glyph(name, self)
+        self._glyphs[name] = glyph
+        return glyph
+
+    def keys(self):
+        return self._glyphs.keys()
+
+    def __contains__(self, name):
+        return name in self._glyphs
+
+    def __getitem__(self, name):
+        return self._glyphs[name]
+
+    def __delitem__(self, name):
+        del self._glyphs[name]
+
+    def __iter__(self):
+        return iter(list(self._glyphs.values()))
+
+    def __len__(self):
+        return len(self._glyphs)
+
+    def save(self, path, formatVersion=3):
+        """Save the font to a new UFO, which is always written from scratch.
+        Only UFO 3 is supported.
+        """
+        from glyphsLib.writer import save_ufo
+
+        assert formatVersion == 3, 'Only UFO 3 can be written'
+        save_ufo(self, path)
+
+    def getDataForSerialization(self):
+        return {
+            'info': self.info.getDataForSerialization(),
+            'lib': self.lib,
+            'groups': self.groups,
+            'kerning': self.kerning,
+            'features': self.features.text,
+            'glyphs': [glyph.getDataForSerialization() for glyph in self],
+        }
+
+    def setDataFromSerialization(self, data):
+        self.info.setDataFromSerialization(data['info'])
+        self.lib = data['lib']
+        self.groups = data['groups']
+        self.kerning = data['kerning']
+        self.features.text = data['features']
+        self._glyphs = {}
+        for glyph_data in data['glyphs']:
+            self.newGlyph(glyph_data['name']).setDataFromSerialization(
+                glyph_data)
+
+
+class Info(object):
+    """Font info, with an attribute for each UFO 3 fontinfo.plist key."""
+
+    __slots__ = tuple(sorted(fontInfoAttributesVersion3))
+
+    # attributes initialized to empty lists, as done by defcon
+    _list_attrs = (
+        'guidelines', 'postscriptBlueValues', 'postscriptOtherBlues',
+        'postscriptFamilyBlues', 'postscriptFamilyOtherBlues',
+        'postscriptStemSnapH', 'postscriptStemSnapV')
+
+    def __init__(self):
+        for attr in self.__slots__:
+            setattr(self, attr, [] if attr in self._list_attrs else None)
+
+    def getDataForSerialization(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__
+                if getattr(self, attr) is not None}
+
+    def setDataFromSerialization(self, data):
+        for attr in self.__slots__:
+            setattr(self, attr, data.get(attr))
+
+
+class Features(object):
+    __slots__ = ('text',)
+
+    def __init__(self):
+        self.text = None
+
+
+class Glyph(object):
+    """A glyph, which iterates over its contours like a defcon glyph."""
+
+    __slots__ = ('name', 'font', 'unicodes', 'width', 'height', 'note', 'lib',
+                 'contours', 'components', 'anchors', 'guidelines', 'image')
+
+    anchorClass = property(lambda self: Anchor)
+    componentClass = property(lambda self: Component)
+
+    def __init__(self, name=None, font=None):
+        self.name = name
+        self.font = font
+        self.unicodes = []
+        self.width = 0
+        self.height = 0
+        self.note = None
+        self.lib = {}
+        self.contours = []
+        self.components = []
+        self.anchors = []
+        self.guidelines = []
+        self.image = None
+
+    def _get_unicode(self):
+        return self.unicodes[0] if self.unicodes else None
+
+    def _set_unicode(self, value):
+        self.unicodes = [] if value is None else [value]
+
+    unicode = property(_get_unicode, _set_unicode)
+
+    def __iter__(self):
+        return iter(self.contours)
+
+    def __len__(self):
+        return len(self.contours)
+
+    def __getitem__(self, index):
+        return self.contours[index]
+
+    def appendContour(self, contour):
+        self.contours.append(contour)
+
+    def appendComponent(self, component):
+        self.components.append(component)
+
+    def appendAnchor(self, anchor):
+        self.anchors.append(anchor)
+
+    def getPointPen(self):
+        return GlyphPointPen(self)
+
+    def drawPoints(self, pointPen):
+        for contour in self.contours:
+            contour.drawPoints(pointPen)
+        for component in self.components:
+            component.drawPoints(pointPen)
+
+    def getDataForSerialization(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__
+                if attr != 'font'}
+
+    def setDataFromSerialization(self, data):
+        for attr in self.__slots__:
+            if attr in data and attr != 'font':
+                setattr(self, attr, data[attr])
+
+
+class Contour(object):
+    __slots__ = ('points', 'identifier')
+
+    def __init__(self, identifier=None):
+        self.points = []
+        self.identifier = identifier
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, index):
+        return self.points[index]
+
+    @property
+    def open(self):
+        return not self.points or self.points[0].segmentType == 'move'
+
+    def drawPoints(self, pointPen):
+        pointPen.beginPath(identifier=self.identifier)
+        for point in self.points:
+            pointPen.addPoint(
+                (point.x, point.y), segmentType=point.segmentType,
+                smooth=point.smooth, name=point.name,
+                identifier=point.identifier)
+        pointPen.endPath()
+
+
+class Point(object):
+    __slots__ = ('x', 'y', 'segmentType', 'smooth', 'name', 'identifier')
+
+    def __init__(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None):
+        self.x, self.y = pt
+        self.segmentType = segmentType
+        self.smooth = smooth
+        self.name = name
+        self.identifier = identifier
+
+
+class Component(object):
+    __slots__ = ('baseGlyph', 'transformation', 'identifier')
+
+    def __init__(self, baseGlyph=None, transformation=(1, 0, 0, 1, 0, 0),
+                 identifier=None):
+        self.baseGlyph = baseGlyph
+        self.transformation = transformation
+        self.identifier = identifier
+
+    def drawPoints(self, pointPen):
+        pointPen.addComponent(self.baseGlyph, self.transformation,
+                              identifier=self.identifier)
+
+
+class Anchor(dict):
+    """An anchor, stored as a dict like in defcon and ufoLib."""
+
+    __slots__ = ()
+
+    def __init__(self, anchorDict=None):
+        super(Anchor, self).__init__(anchorDict or {})
+
+    name = property(lambda self: self.get('name'))
+    x = property(lambda self: self.get('x'))
+    y = property(lambda self: self.get('y'))
+
+
+class GlyphPointPen(object):
+    """A point pen adding contours and components to a glyph."""
+
+    def __init__(self, glyph):
+        self.glyph = glyph
+        self.contour = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.contour = Contour(identifier)
+
+    def endPath(self):
+        self.glyph.appendContour(self.contour)
+        self.contour = None
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None, **kwargs):
+        self.contour.points.append(
+            Point(pt, segmentType, smooth, name, identifier))
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None,
+                     **kwargs):
+        self.glyph.appendComponent(
+            Component(baseGlyphName, transformation, identifier))
+
+    def addContour(self, points):
+        """Add a contour from a list of (x, y, segmentType, smooth)."""
+        contour = Contour()
+        contour.points = [Point((x, y), segment_type, smooth)
+                          for x, y, segment_type, smooth in points]
+        self.glyph.appendContour(contour)
@@ -16,6 +16,7 @@
 import logging
 import os
 import shutil
+from collections import OrderedDict
 from fontTools.misc.textTools import num2binary
 
 logger = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ def build_ufo_path(out_dir, family_name, style_name):
 
 
 def write_ufo(ufo, out_dir):
-    """Write a UFO."""
+    """Write a UFO, and return its path."""
 
     out_path = build_ufo_path(
         out_dir, ufo.info.familyName, ufo.info.styleName)
@@ -39,6 +40,7 @@ def write_ufo(ufo, out_dir):
     logger.info('Writing %s' % out_path)
     clean_ufo(out_path)
     ufo.save(out_path)
+    return out_path
 
 
 def clean_ufo(path):
@@ -48,6 +50,110 @@ def clean_ufo(path):
         shutil.rmtree(path)
 
 
+class TrackingDict(OrderedDict):
+    """A dict which records the keys that were read from it, and those whose
+    values were used as a whole (see get_whole)."""
+
+    def __init__(self, *args, **kwargs):
+        self.read_keys = set()
+        self.whole_keys = set()
+        super(TrackingDict, self).__init__(*args, **kwargs)
+
+    def __getitem__(self, key):
+        self.read_keys.add(key)
+        return super(TrackingDict, self).__getitem__(key)
+
+    def get(self, key, default=None):
+        self.read_keys.add(key)
+        return super(TrackingDict, self).get(key, default)
+
+    def items(self):
+        self.read_keys.update(self.keys())
+        return super(TrackingDict, self).items()
+
+    def values(self):
+        self.read_keys.update(self.keys())
+        return super(TrackingDict, self).values()
+
+
+class GlyphOrder(object):
+    """A glyph order, with constant time lookup of glyph positions.
+
+    The initial names are kept as given, duplicates included, with a glyph
+    positioned at its first occurrence. Glyphs are only ever appended, so
+    positions never change once assigned.
+    """
+
+    def __init__(self, names=()):
+        self.names = list(names)
+        self._index = {}
+        for i, name in enumerate(self.names):
+            self._index.setdefault(name, i)
+
+    def append(self, name):
+        if name not in self._index:
+            self._index[name] = len(self.names)
+            self.names.append(name)
+
+    def extend(self, names):
+        for name in names:
+            self.append(name)
+
+    def index(self, name):
+        try:
+            return self._index[name]
+        except KeyError:
+            raise ValueError('%r is not in glyph order' % name)
+
+    def sorted(self, names):
+        """Return the given glyph names sorted by glyph order."""
+        return sorted(names, key=self.index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+def track_data(data):
+    """Return a copy of data in which every dict records the keys read from it.
+
+    Only containers are copied, other values are shared with the original data.
+    """
+
+    if isinstance(data, dict):
+        return TrackingDict(
+            (key, track_data(val)) for key, val in data.items())
+    elif isinstance(data, list):
+        return [track_data(val) for val in data]
+    return data
+
+
+def get_whole(data, key, default=None):
+    """Return data[key], or default if key is missing, for a value which is
+    used as a whole: if data is tracked, everything stored under key counts
+    as read by unused_data, without having to be read item by item.
+    """
+
+    if isinstance(data, TrackingDict):
+        data.whole_keys.add(key)
+    return data.get(key, default)
+
+
+def mark_read(data):
+    """Count everything in data as read if it is tracked (see track_data),
+    for data which is left out on purpose."""
+
+    if isinstance(data, TrackingDict):
+        keys = list(OrderedDict.keys(data))
+        data.read_keys.update(keys)
+        data.whole_keys.update(keys)
+
+
 def clear_data(data):
     """Clear empty list or dict attributes in data.
 
@@ -55,22 +161,77 @@ def clear_data(data):
     loaded into an UFO."""
 
     if isinstance(data, dict):
-        for key, val in data.items():
+        for key, val in list(data.items()):
             if not clear_data(val):
                 del data[key]
         return data
     elif isinstance(data, list):
-        i = 0
-        while i < len(data):
-            val = data[i]
-            if not clear_data(val):
-                del data[i]
-            else:
-                i += 1
+        # filtered in one go, deleting items one by one is quadratic
+        data[:] = [val for val in data if clear_data(val)]
         return data
     return True
 
 
+def unused_data(data):
+    """Return the data which was not read from tracked data (see track_data),
+    without empty lists or dicts.
+
+    Containers stored under read keys are only stripped of the data read from
+    them, unless they were used as a whole (see get_whole); items of lists
+    count as read with the list itself, unless they are containers. The
+    tracked data is left untouched, and dicts are returned as OrderedDicts.
+    """
+
+    result = _unused_data(data, True)
+    if result is _NOTHING:
+        return OrderedDict() if isinstance(data, dict) else []
+    return result
+
+
+# returned by _unused_data when no data is left, as None is valid data
+_NOTHING = object()
+
+
+def _unused_data(data, tracked):
+    """Return unused data, or _NOTHING if nothing is left of it.
+
+    Everything in data counts as unused if tracked is False, i.e. if it was
+    stored under a key which was not read.
+    """
+
+    if isinstance(data, dict):
+        is_tracking = isinstance(data, TrackingDict)
+        result = OrderedDict()
+        # walk tracking dicts without recording reads: on Python 2,
+        # OrderedDict.items goes through the tracked __getitem__
+        keys = OrderedDict.__iter__(data) if is_tracking else iter(data)
+        for key in keys:
+            val = dict.__getitem__(data, key)
+            if tracked and is_tracking and key in data.read_keys:
+                # containers may still hold data which was not read, unless
+                # they were used as a whole
+                if (not isinstance(val, (dict, list)) or
+                        key in data.whole_keys):
+                    continue
+                val = _unused_data(val, True)
+            else:
+                val = _unused_data(val, False)
+            if val is not _NOTHING:
+                result[key] = val
+        return result or _NOTHING
+    elif isinstance(data, list):
+        result = []
+        for val in data:
+            # items of lists count as read with the list itself, unless
+            # they are containers
+            if not tracked or isinstance(val, (dict, list)):
+                val = _unused_data(val, tracked)
+                if val is not _NOTHING:
+                    result.append(val)
+        return result or _NOTHING
+    return data
+
+
 def cast_to_number_or_bool(inputstr):
     """Cast a string to int, float or bool. Return original string if it can't be
     converted.
@@ -0,0 +1,224 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import logging
+import os
+
+from fontTools.misc.py23 import tobytes
+
+from glyphsLib.util import build_ufo_path, clean_ufo
+
+__all__ = ['write_ufo', 'save_ufo', 'glif_data']
+
+logger = logging.getLogger(__name__)
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>'
+DEFAULT_LAYER_NAME = 'public.default'
+
+# component transformation attributes and their default values, in order
+TRANSFORMATION_INFO = (
+    ('xScale', 1), ('xyScale', 0), ('yxScale', 0), ('yScale', 1),
+    ('xOffset', 0), ('yOffset', 0))
+
+
+def write_ufo(ufo, out_dir):
+    """Write a UFO without going through defcon's save, and return its path.
+
+    The written files are the same as the ones written by util.write_ufo.
+    """
+
+    out_path = build_ufo_path(
+        out_dir, ufo.info.familyName, ufo.info.styleName)
+
+    logger.info('Writing %s' % out_path)
+    clean_ufo(out_path)
+    save_ufo(ufo, out_path)
+    return out_path
+
+
+def save_ufo(ufo, path):
+    """Save a UFO (format 3) to a new path.
+
+    Font-wide files are written by ufoLib, while .glif files are formatted
+    directly from the glyphs, without ufoLib's validation or defcon's change
+    tracking.
+    """
+
+    from ufoLib import UFOWriter
+    from ufoLib.glifLib import glyphNameToFileName
+
+    writer = UFOWriter(path, formatVersion=3)
+    writer.writeInfo(ufo.info)
+    writer.writeGroups(ufo.groups)
+    writer.writeKerning(ufo.kerning)
+    writer.writeLib(dict(ufo.lib))
+    if ufo.features.text is not None:
+        writer.writeFeatures(ufo.features.text)
+
+    # fonts without layers, such as glyphsLib.ufomodel ones, only have glyphs
+    # in the default layer, with no layer info
+    layer = ufo.layers.defaultLayer if hasattr(ufo, 'layers') else None
+    layer_name = DEFAULT_LAYER_NAME if layer is None else layer.name
+    glyph_set = writer.getGlyphSet(layerName=layer_name, defaultLayer=True)
+    # lowercased, as file names clash on case-insensitive file systems
+    existing_file_names = set()
+    for glyph_name in sorted(ufo.keys()):
+        file_name = glyphNameToFileName(glyph_name, existing_file_names)
+        existing_file_names.add(file_name.lower())
+        glyph_set.contents[glyph_name] = file_name
+        with open(os.path.join(glyph_set.dirName, file_name), 'wb') as fp:
+            fp.write(glif_data(ufo[glyph_name]))
+    glyph_set.writeContents()
+    # an object without layer info attributes gives an empty layerinfo.plist,
+    # as written by defcon for a layer without color or lib
+    glyph_set.writeLayerInfo(object() if layer is None else layer)
+    writer.writeLayerContents([layer_name])
+    writer.setModificationTime()
+    ufo.path = path
+
+
+def glif_data(glyph):
+    """Return the .glif (format 2) data of a glyph, as UTF-8 encoded bytes
+    formatted the same way as by ufoLib.
+    """
+
+    lines = [XML_DECLARATION, '<glyph name="%s" format="2">' % (
+        _escape_attr(glyph.name))]
+
+    width, height = glyph.width, glyph.height
+    if width and height:
+        lines.append('  <advance height="%r" width="%r"/>' % (height, width))
+    elif width:
+        lines.append('  <advance width="%r"/>' % width)
+    elif height:
+        lines.append('  <advance height="%r"/>' % height)
+
+    seen = set()
+    for code in glyph.unicodes:
+        if code not in seen:
+            seen.add(code)
+            lines.append('  <unicode hex="%04X"/>' % code)
+
+    if glyph.note:
+        lines.append('  <note>%s</note>' % (
+            _escape_text('\n' + glyph.note.strip() + '\n')))
+
+    for guideline in glyph.guidelines:
+        lines.append('  <guideline%s/>' % _attrs(guideline, (
+            ('x', True), ('y', True), ('angle', True), ('name', False),
+            ('color', False), ('identifier', False))))
+
+    for anchor in glyph.anchors:
+        lines.append('  <anchor%s/>' % _attrs(anchor, (
+            ('x', True), ('y', True), ('name', False), ('color', False),
+            ('identifier', False))))
+
+    pen = GlifPointPen()
+    glyph.drawPoints(pen)
+    if pen.lines:
+        lines.append('  <outline>')
+        lines.extend(pen.lines)
+        lines.append('  </outline>')
+    else:
+        lines.append('  <outline>\n  </outline>')
+
+    if glyph.lib:
+        lines.append(_lib_data(glyph.lib))
+
+    lines.append('</glyph>\n')
+    return tobytes('\n'.join(lines), encoding='utf-8')
+
+
+class GlifPointPen(object):
+    """A point pen collecting the lines of the <outline> of a .glif file."""
+
+    def __init__(self):
+        self.lines = []
+        self._contour_start = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._contour_start = len(self.lines)
+        if identifier is None:
+            self.lines.append('    <contour>')
+        else:
+            self.lines.append(
+                '    <contour identifier="%s">' % _escape_attr(identifier))
+
+    def endPath(self):
+        if len(self.lines) == self._contour_start + 1:
+            self.lines[-1] += '\n  </contour>'
+        else:
+            self.lines.append('    </contour>')
+
+    def addPoint(self, pt, segmentType=None, smooth=None, name=None,
+                 identifier=None, **kwargs):
+        line = '      <point x="%r" y="%r"' % (pt[0], pt[1])
+        if segmentType is not None and segmentType != 'offcurve':
+            line += ' type="%s"' % segmentType
+        if smooth:
+            line += ' smooth="yes"'
+        if name is not None:
+            line += ' name="%s"' % _escape_attr(name)
+        if identifier is not None:
+            line += ' identifier="%s"' % _escape_attr(identifier)
+        self.lines.append(line + '/>')
+
+    def addComponent(self, glyphName, transformation, identifier=None,
+                     **kwargs):
+        line = '    <component base="%s"' % _escape_attr(glyphName)
+        for (attr, default), value in zip(TRANSFORMATION_INFO, transformation):
+            if value != default:
+                line += ' %s="%r"' % (attr, value)
+        if identifier is not None:
+            line += ' identifier="%s"' % _escape_attr(identifier)
+        self.lines.append(line + '/>')
+
+
+def _attrs(obj, keys):
+    """Format the attributes of a guideline or anchor, in the given order.
+    Numeric attributes are formatted with repr.
+    """
+
+    result = ''
+    for key, is_number in keys:
+        value = obj.get(key)
+        if value is None:
+            continue
+        value = repr(value) if is_number else _escape_attr(value)
+        result += ' %s="%s"' % (key, value)
+    return result
+
+
+def _lib_data(lib):
+    # let ufoLib's plist support format the lib, as nested in a glyph element
+    from ufoLib import etree, plistlib
+
+    root = etree.Element('glyph')
+    element = etree.SubElement(root, 'lib')
+    element.append(plistlib.totree(dict(lib), indent_level=2))
+    data = etree.tostring(root, encoding='utf-8', pretty_print=True)
+    return data.decode('utf-8')[len('<glyph>\n'):-len('\n</glyph>\n')]
+
+
+def _escape_text(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _escape_attr(text):
+    return (_escape_text(text).replace('"', '&quot;').replace('\n', '&#10;')
+            .replace('\r', '&#13;').replace('\t', '&#9;'))
@@ -0,0 +1,122 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time building and writing master UFOs from a synthetic .glyphs font.
+
+Usage: python MetaTools/benchmark_builder.py [GLYPHS [MASTERS [NODES]]]
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import datetime
+import filecmp
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+from glyphsLib.builder import to_ufos
+import glyphsLib.util
+import glyphsLib.writer
+
+
+def generate_data(glyph_count, master_count, node_count):
+    """Return .glyphs data with glyphs made of one closed path each, plus a
+    composite glyph for every tenth glyph.
+    """
+
+    masters = [{'id': 'master%d' % i, 'ascender': 800, 'capHeight': 700,
+                'descender': -200, 'xHeight': 500, 'weight': 'Weight%d' % i}
+               for i in range(master_count)]
+    glyphs = []
+    for i in range(glyph_count):
+        name = 'glyph%05d' % i
+        layers = []
+        for j, master in enumerate(masters):
+            nodes = [[(k * 7 + j) % 1000, (k * 13) % 700,
+                      'curve' if k % 3 == 2 else 'offcurve'
+                      if k % 3 else 'line', k % 3 == 0]
+                     for k in range(node_count)]
+            layer = {'layerId': master['id'], 'width': 500 + j,
+                     'paths': [{'closed': True, 'nodes': nodes}],
+                     'anchors': [{'name': 'top', 'position': (250, 700)}]}
+            if i % 10 == 9:
+                layer['components'] = [
+                    {'name': 'glyph%05d' % (i - 1),
+                     'transform': (1, 0, 0, 1, 10, 0)}]
+            layers.append(layer)
+        glyphs.append({'glyphname': name, 'layers': layers,
+                       'unicode': 0xE000 + i})
+    return {
+        '.appVersion': 895,
+        'date': datetime.datetime(2017, 1, 1),
+        'familyName': 'Benchmark',
+        'fontMaster': masters,
+        'glyphs': glyphs,
+        'unitsPerEm': 1000,
+        'versionMajor': 1,
+        'versionMinor': 0,
+    }
+
+
+def same_files(dir1, dir2):
+    comparison = filecmp.dircmp(dir1, dir2)
+    if comparison.left_only or comparison.right_only:
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(
+        dir1, dir2, comparison.common_files, shallow=False)
+    if mismatch or errors:
+        return False
+    return all(same_files(os.path.join(dir1, d), os.path.join(dir2, d))
+               for d in comparison.common_dirs)
+
+
+def time_it(label, func, repeat=3):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('%-30s %8.3f s' % (label, best))
+    return best
+
+
+def main(args):
+    glyph_count, master_count, node_count = (
+        [int(a) for a in args] + [2000, 2, 40][len(args):])
+    print('%d glyphs, %d masters, %d nodes per glyph' % (
+        glyph_count, master_count, node_count))
+    data = generate_data(glyph_count, master_count, node_count)
+    time_it('to_ufos', lambda: to_ufos(data))
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        defcon_dir = os.path.join(tmpdir, 'defcon')
+        fast_dir = os.path.join(tmpdir, 'fast')
+        os.mkdir(defcon_dir)
+        os.mkdir(fast_dir)
+        # the fonts are rebuilt for each run, since defcon only saves what
+        # changed when saving a font a second time
+        time_it('write masters (defcon)', lambda: [
+            glyphsLib.util.write_ufo(ufo, defcon_dir)
+            for ufo in to_ufos(data)])
+        time_it('write masters (writer)', lambda: [
+            glyphsLib.writer.write_ufo(ufo, fast_dir)
+            for ufo in to_ufos(data)])
+        print('(both include to_ufos)')
+        print('identical output:', same_files(defcon_dir, fast_dir))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
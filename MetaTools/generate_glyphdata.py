@@ -19,26 +19,44 @@ from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 from fontTools.misc.py23 import *
 
+import argparse
 import io
+import os
 import fontTools.agl
 import json
 import urllib
 import textwrap
 import xml.etree.ElementTree as etree
 
-from collections import Counter, defaultdict, namedtuple
-from glyphsLib.glyphdata import get_glyph, _get_unicode_category, _get_category
+from collections import Counter, defaultdict
+from glyphsLib.glyphdata import (
+    get_glyph, get_name_by_unicode, get_name_by_production_name,
+    write_data_file, GlyphDataFile, _get_unicode_category, _get_category,
+    DATA_FILE_PATH)
 
 
-# Data tables which we put into the generated Python file.
+GLYPHS_INFO_FILES = ("GlyphData.xml", "GlyphData_Ideographs.xml")
+
+
+# Data tables which we put into the generated Python file and into the
+# binary data file read by default by glyphsLib.glyphdata, which also
+# holds reverse indexes built from them.
 # See comments in generate_python_source() below for documentation.
-GlyphData = namedtuple('GlyphData', [
-    'PRODUCTION_NAMES',
-    'IRREGULAR_UNICODE_STRINGS',
-    'MISSING_UNICODE_STRINGS',
-    'DEFAULT_CATEGORIES',
-    'IRREGULAR_CATEGORIES',
-])
+# Not a namedtuple, which would be unhashable: glyphsLib.glyphdata only
+# caches lookups, and the reverse indexes checked by test_data, for hashable
+# data sources.
+class GlyphData(object):
+    __slots__ = (
+        'PRODUCTION_NAMES',
+        'IRREGULAR_UNICODE_STRINGS',
+        'MISSING_UNICODE_STRINGS',
+        'DEFAULT_CATEGORIES',
+        'IRREGULAR_CATEGORIES',
+    )
+
+    def __init__(self, *tables):
+        for name, table in zip(self.__slots__, tables):
+            setattr(self, name, table)
 
 
 def fetch_url(url):
@@ -65,9 +83,21 @@ def fetch_data_version():
 
 
 def fetch_all_glyphs():
+    return parse_glyphs([fetch(filename) for filename in GLYPHS_INFO_FILES])
+
+
+def read_all_glyphs(paths):
+    contents = []
+    for path in paths:
+        with io.open(path, "rb") as fp:
+            contents.append(fp.read())
+    return parse_glyphs(contents)
+
+
+def parse_glyphs(xml_contents):
     glyphs = {}
-    for filename in ("GlyphData.xml", "GlyphData_Ideographs.xml"):
-        for glyph in etree.fromstring(fetch(filename)).findall("glyph"):
+    for content in xml_contents:
+        for glyph in etree.fromstring(content).findall("glyph"):
             glyphName = glyph.attrib["name"]
             assert glyphName not in glyphs, "multiple entries for " + glyphName
             glyphs[glyphName] = glyph.attrib
@@ -147,7 +177,8 @@ def test_data(glyphs, data):
 
     Makes sure that the implementation of glyphsLib.glyphdata.get_glyph(),
     if it were to work on the generated GlyphData, will produce the exact
-    same results as the original data files.
+    same results as the original data files, and that the reverse lookups
+    find glyphs with the same production name and Unicode string.
     """
     for _, glyph in sorted(glyphs.items()):
         name = glyph["name"]
@@ -163,6 +194,14 @@ def test_data(glyphs, data):
         assert category == g.category, (name, category, g.category)
         assert subCategory == g.subCategory, (name, subCategory, g.subCategory)
 
+        found = get_name_by_production_name(prod, data=data)
+        assert get_glyph(found, data=data).production_name == prod, (
+            name, prod, found)
+        if unicode is not None and len(unicode) == 1:
+            found = get_name_by_unicode(ord(unicode), data=data)
+            assert get_glyph(found, data=data).unicode == unicode, (
+                name, unicode, found)
+
 
 def nonesorter(a):
     # Python 2 sorts None before any string (even empty string), while
@@ -173,7 +212,7 @@ def nonesorter(a):
     return "" if a is None else a
 
 
-def generate_python_source(data, out):
+def generate_python_source(data, out, data_version, license_text):
     out.write(
         "# -*- coding: utf-8 -*-\n"
         "#\n"
@@ -183,9 +222,9 @@ def generate_python_source(data, out):
         "# upstream data from https://github.com/schriftgestalt/GlyphsInfo/\n"
         "# taken at commit hash %s.\n"
         "#\n"
-        % fetch_data_version())
+        % data_version)
 
-    for paragraph in fetch("LICENSE").strip().split("\n\n"):
+    for paragraph in license_text.strip().split("\n\n"):
         out.write("#\n")
         for line in textwrap.wrap(paragraph):
             out.write("# ")
@@ -243,10 +282,63 @@ def generate_python_source(data, out):
     out.write("}\n\n")
 
     
-if __name__ == "__main__":
-    outpath = "Lib/glyphsLib/glyphdata_generated.py"
-    glyphs = fetch_all_glyphs()
+def parse_options(args=None):
+    parser = argparse.ArgumentParser(
+        description="Generate the glyph data of glyphsLib from the GlyphsInfo "
+                    "data files, fetched from GitHub unless local copies "
+                    "are given.")
+    parser.add_argument("xml_files", metavar="XML", nargs="*",
+                        help="Local GlyphData XML files, usually %s." %
+                             " and ".join(GLYPHS_INFO_FILES))
+    parser.add_argument("--license", metavar="FILE",
+                        help="License of the local data files. (default: "
+                             "the LICENSE file next to the first XML file)")
+    parser.add_argument("--data-version", metavar="HASH",
+                        help="GlyphsInfo commit hash of the local data files, "
+                             "recorded in the Python output.")
+    parser.add_argument("--python-output", metavar="PATH",
+                        default="Lib/glyphsLib/glyphdata_generated.py",
+                        help="Output path of the Python module, written "
+                             "unless empty. (default: %(default)s)")
+    parser.add_argument("--binary-output", metavar="PATH",
+                        default=os.path.relpath(DATA_FILE_PATH),
+                        help="Output path of the binary data file. "
+                             "(default: %(default)s)")
+    options = parser.parse_args(args)
+    if options.xml_files:
+        if options.license is None:
+            options.license = os.path.join(
+                os.path.dirname(options.xml_files[0]), "LICENSE")
+        if options.python_output and not os.path.exists(options.license):
+            parser.error("no license file found for the local data files")
+        if options.python_output and options.data_version is None:
+            parser.error("--data-version is needed for the Python output")
+    return options
+
+
+def main(args=None):
+    options = parse_options(args)
+    if options.xml_files:
+        glyphs = read_all_glyphs(options.xml_files)
+    else:
+        glyphs = fetch_all_glyphs()
     data = build_data(glyphs)
     test_data(glyphs, data)
-    with io.open(outpath, "w", encoding="utf-8") as out:
-        generate_python_source(data, out)
+
+    if options.python_output:
+        if options.xml_files:
+            with io.open(options.license, "r", encoding="utf-8") as fp:
+                license_text = fp.read()
+            data_version = options.data_version
+        else:
+            license_text = fetch("LICENSE")
+            data_version = fetch_data_version()
+        with io.open(options.python_output, "w", encoding="utf-8") as out:
+            generate_python_source(data, out, data_version, license_text)
+
+    write_data_file(data, options.binary_output)
+    test_data(glyphs, GlyphDataFile(options.binary_output))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,18 +18,27 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 import collections
-import datetime
+import copy
+import os
+import shutil
+import tempfile
 import unittest
 # unittest.mock is only available for python 3+
 from mock import patch
 import mock
 
-from defcon import Font
+from defcon import Font, Glyph
 from fontTools.misc.loggingTools import CapturingLogHandler
-from glyphsLib import builder
+from glyphsLib import anchors, builder
+from glyphsLib.casting import KerningTable
 from glyphsLib.builder import build_style_name, set_custom_params,\
-    to_ufos, GLYPHS_PREFIX, PUBLIC_PREFIX, GLYPHLIB_PREFIX, draw_paths, \
-    set_default_params, parse_glyphs_filter, build_stylemap_names
+    to_ufos, iter_ufos, GLYPHS_PREFIX, PUBLIC_PREFIX, GLYPHLIB_PREFIX, draw_paths, \
+    set_default_params, parse_glyphs_filter, build_stylemap_names, \
+    compile_custom_params, apply_custom_params, load_glyphinfo_data, \
+    UFO2FT_FILTERS_KEY
+
+from helpers import generate_minimal_data, generate_two_master_data, \
+    add_glyph
 
 
 class BuildStyleNameTest(unittest.TestCase):
@@ -342,6 +351,42 @@ class SetCustomParamsTest(unittest.TestCase):
         self.assertEqual(rec3['rangeGaspBehavior'], [0, 1, 2, 3])
 
 
+    @patch('glyphsLib.builder.parse_glyphs_filter')
+    def test_compiled_params_shared(self, mock_parse_glyphs_filter):
+        mock_parse_glyphs_filter.return_value = {'name': 'RoundCorner'}
+        plan = compile_custom_params(
+            [('Filter', 'RoundCorner'), ('winDescent', -200),
+             ('Use Typo Metrics', True), ('disablesNiceNames', True)],
+            self.ufo.info)
+        ufos = [self.ufo, Font()]
+        for ufo in ufos:
+            apply_custom_params(ufo, plan)
+        self.assertEqual(mock_parse_glyphs_filter.call_count, 1)
+        for ufo in ufos:
+            self.assertEqual(ufo.lib[UFO2FT_FILTERS_KEY],
+                             [{'name': 'RoundCorner'}])
+            self.assertEqual(ufo.info.openTypeOS2WinDescent, 200)
+            self.assertEqual(ufo.info.openTypeOS2Selection, [7])
+            self.assertEqual(ufo.lib[GLYPHS_PREFIX + 'useNiceNames'], 0)
+
+    def test_compiled_values_not_shared(self):
+        plan = compile_custom_params(
+            [('codePageRanges', [1252]), ('Filter', 'RoundCorner'),
+             ('GASP Table', {'8': 2, '65535': 15})],
+            self.ufo.info)
+        ufos = [self.ufo, Font()]
+        for ufo in ufos:
+            apply_custom_params(ufo, plan)
+        ufos[0].info.openTypeOS2CodePageRanges.append(1)
+        ufos[0].info.openTypeGaspRangeRecords[0]['rangeMaxPPEM'] = 9
+        ufos[0].lib[UFO2FT_FILTERS_KEY][0]['name'] = 'Other'
+        self.assertEqual(ufos[1].info.openTypeOS2CodePageRanges, [0])
+        self.assertEqual(
+            ufos[1].info.openTypeGaspRangeRecords[0]['rangeMaxPPEM'], 8)
+        self.assertEqual(ufos[1].lib[UFO2FT_FILTERS_KEY],
+                         [{'name': 'RoundCorner'}])
+
+
 class ParseGlyphsFilterTest(unittest.TestCase):
     def test_complete_parameter(self):
         inputstr = 'Transformations;LSB:+23;RSB:-22;SlantCorrection:true;OffsetX:10;OffsetY:-10;Origin:0;exclude:uni0334,uni0335 uni0336'
@@ -417,32 +462,6 @@ class ParseGlyphsFilterTest(unittest.TestCase):
 
 
 class ToUfosTest(unittest.TestCase):
-    def generate_minimal_data(self):
-        return {
-            '.appVersion': 895,
-            'date': datetime.datetime.today(),
-            'familyName': 'MyFont',
-            'fontMaster': [{
-                'ascender': 0,
-                'capHeight': 0,
-                'descender': 0,
-                'id': 'id',
-                'xHeight': 0,
-            }],
-            'glyphs': [],
-            'unitsPerEm': 1000,
-            'versionMajor': 1,
-            'versionMinor': 0,
-        }
-
-    def add_glyph(self, data, glyphname):
-        glyph = {
-            'glyphname': glyphname,
-            'layers': [{'layerId': data['fontMaster'][0]['id'], 'width': 0}]
-        }
-        data['glyphs'].append(glyph)
-        return glyph
-
     def add_anchor(self, data, glyphname, anchorname, x, y):
         for glyph in data['glyphs']:
             if glyph['glyphname'] == glyphname:
@@ -455,7 +474,7 @@ class ToUfosTest(unittest.TestCase):
         some cases that additional redundant data is not set.
         """
 
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         family_name = data['familyName']
         ufos = to_ufos(data)
         self.assertEqual(len(ufos), 1)
@@ -473,7 +492,7 @@ class ToUfosTest(unittest.TestCase):
     def test_warn_no_version(self):
         """Test that a warning is printed when app version is missing."""
 
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         del data['.appVersion']
         with CapturingLogHandler(builder.logger, "WARNING") as captor:
             to_ufos(data)
@@ -487,7 +506,7 @@ class ToUfosTest(unittest.TestCase):
         a kerning rule, that rule is used for the pair.
         """
 
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
 
         # generate classes 'A': ['A', 'a'] and 'V': ['V', 'v']
         for glyph_name in ('A', 'a', 'V', 'v'):
@@ -519,10 +538,36 @@ class ToUfosTest(unittest.TestCase):
         # due to conflict with (a, kern2.V, 100)
         self.assertEqual(ufo.kerning['A', 'v'], -100)
 
+    def test_load_kerning_table(self):
+        """Test that compact kerning tables are loaded like nested dicts."""
+
+        data = generate_minimal_data()
+        for glyph_name in ('A', 'a', 'V', 'v'):
+            data['glyphs'].append({
+                'glyphname': glyph_name, 'layers': [],
+                'rightKerningGroup': glyph_name.upper(),
+                'leftKerningGroup': glyph_name.upper()})
+        data['kerning'] = KerningTable({
+            data['fontMaster'][0]['id']: collections.OrderedDict((
+                ('@MMK_L_A', collections.OrderedDict((
+                    ('@MMK_R_V', '-250'),
+                    ('v', '-100'),
+                ))),
+                ('a', collections.OrderedDict((
+                    ('@MMK_R_V', '100'),
+                ))),
+            ))})
+
+        ufo = to_ufos(data)[0]
+        self.assertEqual(dict(ufo.kerning), {
+            ('public.kern1.A', 'public.kern2.V'): -250,
+            ('a', 'public.kern2.V'): 100,
+            ('A', 'v'): -100})
+
     def test_propagate_anchors(self):
         """Test anchor propagation for some relatively complicated cases."""
 
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
 
         glyphs = (
             ('sad', [], [('bottom', 50, -50), ('top', 50, 150)]),
@@ -571,54 +616,420 @@ class ToUfosTest(unittest.TestCase):
                 self.assertEqual(anchor.name, 'bottom_2')
                 self.assertEqual(anchor.x, 150)
 
+    def add_component(self, data, glyphname, base_name, x=0, y=0):
+        for glyph in data['glyphs']:
+            if glyph['glyphname'] == glyphname:
+                for layer in glyph['layers']:
+                    layer.setdefault('components', []).append(
+                        {'name': base_name, 'transform': (1, 0, 0, 1, x, y)})
+
+    def test_propagate_anchors_deep_components(self):
+        data = generate_minimal_data()
+        # bases are listed after the glyphs using them
+        for i in reversed(range(3000)):
+            add_glyph(data, 'g%d' % i)
+            if i:
+                self.add_component(data, 'g%d' % i, 'g%d' % (i - 1), x=1)
+        self.add_anchor(data, 'g0', 'top', 0, 100)
+        ufo = to_ufos(data)[0]
+        self.assertEqual([(a.name, a.x, a.y) for a in ufo['g2999'].anchors],
+                         [('top', 2999, 100)])
+
+    def test_propagate_anchors_component_cycle(self):
+        data = generate_minimal_data()
+        for name in ('a', 'b', 'c'):
+            add_glyph(data, name)
+        self.add_anchor(data, 'a', 'top', 0, 100)
+        self.add_component(data, 'b', 'a', x=10)
+        self.add_component(data, 'a', 'b')
+        self.add_component(data, 'c', 'b', x=10)
+        with CapturingLogHandler(anchors.logger, 'WARNING') as captor:
+            ufo = to_ufos(data)[0]
+        # reported from whichever glyph of the cycle the font yields first
+        captor.assertRegex(
+            r'Component cycle found \((a -> b -> a|b -> a -> b)\)')
+        self.assertEqual([(a.name, a.x) for a in ufo['b'].anchors],
+                         [('top', 10)])
+        self.assertEqual([(a.name, a.x) for a in ufo['c'].anchors],
+                         [('top', 20)])
+
+    def test_propagate_anchors_missing_base(self):
+        data = generate_minimal_data()
+        for name in ('a', 'b'):
+            add_glyph(data, name)
+        self.add_anchor(data, 'a', 'top', 0, 100)
+        self.add_component(data, 'b', 'missing')
+        self.add_component(data, 'b', 'a', x=10)
+        with CapturingLogHandler(anchors.logger, 'WARNING') as captor:
+            ufo = to_ufos(data)[0]
+        captor.assertRegex('Glyph b has a component of missing glyph missing')
+        self.assertEqual([(a.name, a.x) for a in ufo['b'].anchors],
+                         [('top', 10)])
+
+    def test_propagate_anchors_masters(self):
+        data = generate_two_master_data()
+        ufos = to_ufos(data)
+        self.assertEqual(
+            [[(a.name, a.x, a.y) for a in ufo['aacute'].anchors]
+             for ufo in ufos],
+            [[('top', 250, 500)], [('top', 251, 500)]])
+
+        # the masters have different anchors, so they are planned apart
+        data['glyphs'][0]['layers'][1]['anchors'].append(
+            {'name': 'bottom', 'position': (250, 0)})
+        ufos = to_ufos(data)
+        self.assertEqual(
+            [[(a.name, a.x, a.y) for a in ufo['aacute'].anchors]
+             for ufo in ufos],
+            [[('top', 250, 500)], [('bottom', 250, 0), ('top', 251, 500)]])
+        ufos = list(iter_ufos(data))
+        self.assertEqual(
+            [[(a.name, a.x, a.y) for a in ufo['aacute'].anchors]
+             for ufo in ufos],
+            [[('top', 250, 500)], [('bottom', 250, 0), ('top', 251, 500)]])
+
+    def test_iter_ufos_shares_plans(self):
+        data = generate_two_master_data()
+        data['customParameters'] = [
+            {'name': 'Filter', 'value': 'RoundCorner'}]
+        expected = to_ufos(data)
+        with patch('glyphsLib.anchors.glyph_anchor_plan',
+                   wraps=anchors.glyph_anchor_plan) as mock_plan, \
+                patch('glyphsLib.builder.parse_glyphs_filter',
+                      wraps=parse_glyphs_filter) as mock_filter:
+            ufos = list(iter_ufos(data))
+        # planned and compiled for the first master only
+        self.assertEqual(mock_plan.call_count, len(expected[0]))
+        self.assertEqual(mock_filter.call_count, 1)
+        for ufo, expected_ufo in zip(ufos, expected):
+            self.assertEqual(ufo.getDataForSerialization(),
+                             expected_ufo.getDataForSerialization())
+
+    def test_skip_backgrounds(self):
+        data = generate_two_master_data()
+        for glyph in data['glyphs']:
+            layer = glyph['layers'][0]
+            layer['background'] = {'paths': layer['paths']}
+            glyph['layers'].append({
+                'associatedMasterId': 'bold', 'layerId': 'alt',
+                'name': 'Alternate', 'width': 600,
+                'paths': layer['paths']})
+        layer_data_key = 'com.typemytype.robofont.layerData'
+        for workers in (None, 2, 3):
+            ufos = to_ufos(data, workers=workers)
+            self.assertEqual(
+                sorted(ufos[0]['a'].lib[layer_data_key]), ['background'])
+            self.assertEqual(
+                sorted(ufos[1]['a'].lib[layer_data_key]), ['Alternate'])
+            ufos = to_ufos(data, workers=workers, include_backgrounds=False)
+            self.assertFalse(any(layer_data_key in glyph.lib
+                                 for ufo in ufos for glyph in ufo))
+        # left out on purpose, so not reported as unused
+        for include_backgrounds in (True, False):
+            self.assertEqual(
+                to_ufos(data, debug=True,
+                        include_backgrounds=include_backgrounds), {})
+
+    def test_glyph_data_files(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'GlyphData.xml')
+        with open(path, 'wb') as fp:
+            fp.write(b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                     b'<glyphData>\n'
+                     b'<glyph name="a" production="uni0061" unicode="0061" '
+                     b'category="Mark" subCategory="Nonspacing" />\n'
+                     b'</glyphData>\n')
+        data = generate_two_master_data()
+        # the merged glyph data is cached in the user's cache directory
+        with patch('glyphsLib.glyphdata._default_cache_dir',
+                   return_value=os.path.join(tmpdir, 'glyphsLib')):
+            for workers in (None, 2, 3):
+                ufos = to_ufos(data, workers=workers, glyph_data_files=[path])
+                for ufo in ufos:
+                    self.assertEqual(ufo['a'].width, 0)
+                    self.assertEqual(
+                        ufo.lib[PUBLIC_PREFIX + 'postscriptNames']['a'],
+                        'uni0061')
+                    self.assertIn('[a acutecomb], # Mark', ufo.features.text)
+            self.assertEqual(len(
+                os.listdir(os.path.join(tmpdir, 'glyphsLib'))), 1)
+
+            # data loaded by the caller is used as is
+            glyphinfo_data = load_glyphinfo_data([path])
+            with patch('glyphsLib.glyphdata.load_glyph_data') as mock_load:
+                ufo = next(iter_ufos(data, glyphinfo_data=glyphinfo_data))
+                self.assertEqual(ufo['a'].width, 0)
+                ufo = to_ufos(data, glyphinfo_data=glyphinfo_data)[0]
+                self.assertEqual(ufo['a'].width, 0)
+                self.assertEqual(mock_load.call_count, 0)
+
+        ufo = to_ufos(data)[0]
+        self.assertEqual(ufo['a'].width, 500)
+        self.assertIn('[acutecomb], # Mark', ufo.features.text)
+
+    def test_parallel_masters(self):
+        data = generate_two_master_data()
+        expected = to_ufos(data)
+        ufos = to_ufos(data, workers=2)
+        self.assertEqual(len(ufos), 2)
+        for ufo, expected_ufo in zip(ufos, expected):
+            self.assertEqual(ufo.getDataForSerialization(),
+                             expected_ufo.getDataForSerialization())
+        self.assertEqual(ufos[1].kerning['a', 'aacute'], 5)
+        self.assertEqual(
+            [(a.name, a.x, a.y) for a in ufos[1]['aacute'].anchors],
+            [('top', 251, 500)])
+
+    def test_parallel_glyphs(self):
+        data = generate_two_master_data()
+        data['glyphs'][0]['production'] = 'uni0061'
+        expected = to_ufos(data)
+        ufos = to_ufos(data, workers=3)
+        for ufo, expected_ufo in zip(ufos, expected):
+            self.assertEqual(ufo.getDataForSerialization(),
+                             expected_ufo.getDataForSerialization())
+        self.assertEqual(ufos[0].lib['public.postscriptNames'],
+                         {'a': 'uni0061'})
+
+    def test_chunk_glyph_layers(self):
+        glyph_layers = [
+            ('id', name, {'paths': [{'nodes': [None] * nodes}]}, {})
+            for name, nodes in (('a', 9), ('b', 0), ('c', 4), ('d', 4))]
+        chunks = builder.chunk_glyph_layers(glyph_layers, 2)
+        self.assertEqual([[name for _, name, _, _ in chunk]
+                          for chunk in chunks], [['a', 'b'], ['c', 'd']])
+        self.assertEqual(builder.chunk_glyph_layers([], 2), [])
+
+    def test_load_glyph_in_bulk(self):
+        data = generate_two_master_data()
+        data['glyphs'][0]['unicode'] = 0x61
+        ufo = to_ufos(data)[0]
+        glyph = ufo['aacute']
+        self.assertEqual(ufo.unicodeData.glyphNameForUnicode(0x61), 'a')
+        self.assertEqual(
+            [(p.x, p.y, p.segmentType) for p in glyph[0]],
+            [(100, 100, 'line'), (0, 0, 'line'), (100, 0, 'line')])
+        self.assertEqual(
+            [(c.baseGlyph, c.transformation) for c in glyph.components],
+            [('a', (1, 0, 0, 1, 0, 0)), ('acutecomb', (1, 0, 0, 1, 150, 0))])
+        self.assertTrue(glyph.dirty)
+        self.assertEqual(glyph.bounds, (0, 0, 250, 100))
+
+    def test_load_glyph_without_bulk_support(self):
+        data = generate_two_master_data()
+        expected = to_ufos(data)[0]
+        with patch('glyphsLib.builder.BulkPointPen.supports',
+                   return_value=False):
+            ufo = to_ufos(data)[0]
+
+        def outlines(glyph):
+            return (glyph.width,
+                    [[(p.x, p.y, p.segmentType, p.smooth) for p in contour]
+                     for contour in glyph],
+                    [(c.baseGlyph, c.transformation)
+                     for c in glyph.components],
+                    [(a.name, a.x, a.y) for a in glyph.anchors])
+
+        self.assertEqual(sorted(ufo.keys()), sorted(expected.keys()))
+        for glyph in ufo:
+            self.assertEqual(outlines(glyph), outlines(expected[glyph.name]))
+        self.assertEqual(
+            [(p.x, p.y, p.segmentType) for p in ufo['aacute'][0]],
+            [(100, 100, 'line'), (0, 0, 'line'), (100, 0, 'line')])
+
+    def test_bulk_point_pen_keeps_glyph_data(self):
+        points = [(0, 0, 'line', False), (100, 0, 'line', False),
+                  (100, 100, 'line', False)]
+        glyph = Font().newGlyph('a')
+        pen = builder.BulkPointPen(glyph)
+        pen.addContour(points)
+        pen.set_contours()
+        # set in bulk, and only loaded when accessed
+        self.assertEqual(len(glyph._shallowLoadedContours), 1)
+
+        # anchors and guidelines set before the contours are kept
+        glyph = Font().newGlyph('a')
+        glyph.appendAnchor(glyph.anchorClass(
+            anchorDict={'name': 'top', 'x': 50, 'y': 100}))
+        glyph.appendGuideline({'x': 10, 'name': 'stem'})
+        pen = builder.BulkPointPen(glyph)
+        pen.addContour(points)
+        pen.set_contours()
+        self.assertEqual([(p.x, p.y, p.segmentType) for p in glyph[0]],
+                         [(x, y, t) for x, y, t, _ in points])
+        self.assertEqual([a.name for a in glyph.anchors], ['top'])
+        self.assertEqual([g.name for g in glyph.guidelines], ['stem'])
+
+    def test_bulk_point_pen_supports(self):
+        self.assertTrue(builder.BulkPointPen.supports(Font().newGlyph('a')))
+
+        class LegacyGlyph(Glyph):
+            def setDataFromSerialization(self, data):
+                pass
+
+        self.assertFalse(builder.BulkPointPen.supports(LegacyGlyph()))
+
+    def test_iter_ufos(self):
+        data = generate_two_master_data()
+        expected = to_ufos(data)
+        with patch('glyphsLib.builder.build_ufos',
+                   wraps=builder.build_ufos) as mock_build_ufos:
+            ufos = iter_ufos(data)
+            ufo = next(ufos)
+            # the second master is only built when it is asked for
+            self.assertEqual(mock_build_ufos.call_count, 1)
+            self.assertEqual(ufo.getDataForSerialization(),
+                             expected[0].getDataForSerialization())
+            ufo = next(ufos)
+            self.assertEqual(mock_build_ufos.call_count, 2)
+            self.assertEqual(ufo.getDataForSerialization(),
+                             expected[1].getDataForSerialization())
+            self.assertEqual(list(ufos), [])
+
+    def test_iter_ufos_parallel_built_ahead(self):
+        data = generate_two_master_data()
+        master = data['fontMaster'][1]
+        for i in range(4):
+            data['fontMaster'].append(dict(master, id='id%d' % i))
+        submitted, terminated = [], []
+
+        class Result(object):
+            def __init__(self, func, args):
+                self.func, self.args = func, args
+
+            def get(self):
+                return self.func(*self.args)
+
+        class Pool(object):
+            def __init__(self, processes, initializer=None):
+                pass
+
+            def apply_async(self, func, args):
+                submitted.append(args)
+                return Result(func, args)
+
+            def terminate(self):
+                terminated.append(True)
+
+            def join(self):
+                pass
+
+        with patch('multiprocessing.Pool', Pool):
+            ufos = iter_ufos(data, workers=2)
+            next(ufos)
+            # the first master is yielded, and the next two are pending
+            self.assertEqual(len(submitted), 3)
+            next(ufos)
+            self.assertEqual(len(submitted), 4)
+            self.assertEqual(len(list(ufos)), 4)
+            self.assertEqual(len(submitted), 6)
+            self.assertEqual(terminated, [True])
+
+            # closing the generator early stops the pool without building
+            # the remaining masters
+            del submitted[:], terminated[:]
+            ufos = iter_ufos(data, workers=2)
+            next(ufos)
+            ufos.close()
+            self.assertEqual(len(submitted), 3)
+            self.assertEqual(terminated, [True])
+
+    def test_data_unchanged(self):
+        data = generate_two_master_data()
+        data['customParameters'] = [
+            {'name': 'glyphOrder', 'value': ['aacute', 'a']}]
+        original = copy.deepcopy(data)
+        first = to_ufos(data, include_instances=True)
+        self.assertEqual(data, original)
+        second = to_ufos(data, include_instances=True)
+        for ufo, other in zip(first[0], second[0]):
+            self.assertEqual(ufo.getDataForSerialization(),
+                             other.getDataForSerialization())
+        self.assertEqual(first[1], second[1])
+
+    def test_debug(self):
+        data = generate_two_master_data()
+        data['glyphs'][0]['layers'][0]['foo'] = 'bar'
+        data['fontMaster'][1]['baz'] = [1, 2]
+        data['instances'] = [{
+            'name': 'Bold', 'interpolationWeight': 150,
+            'customParameters': [{'name': 'weightClass', 'value': 700}]}]
+        original = copy.deepcopy(data)
+        unused = to_ufos(data, debug=True)
+        self.assertEqual(data, original)
+        self.assertEqual(unused, {
+            'fontMaster': [{'baz': [1, 2]}],
+            'glyphs': [{'layers': [{'foo': 'bar'}]}]})
+
+    def test_debug_values_used_whole(self):
+        data = generate_two_master_data()
+        layer = data['glyphs'][0]['layers'][0]
+        layer['hints'] = [{'horizontal': True, 'origin': (0, 0)}]
+        layer['annotations'] = [{'type': 1, 'position': (10, 10)}]
+        data['userData'] = {'com.example': {'key': 'value'}}
+        data['fontMaster'][0]['userData'] = {'com.example': [{'a': 1}]}
+        data['customParameters'] = [
+            {'name': 'GASP Table', 'value': {'8': 2, '65535': 15}}]
+        data['glyphs'][0]['layers'][0]['foo'] = 'bar'
+        self.assertEqual(to_ufos(data, debug=True),
+                         {'glyphs': [{'layers': [{'foo': 'bar'}]}]})
+
+    def test_debug_unused_none_and_empty_values(self):
+        data = generate_minimal_data()
+        data['fontMaster'][0]['foo'] = None
+        data['fontMaster'][0]['bar'] = [[], {}]
+        self.assertEqual(to_ufos(data, debug=True),
+                         {'fontMaster': [{'foo': None}]})
+
     def test_postscript_name_from_data(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'foo')['production'] = 'f_o_o.alt1'
+        data = generate_minimal_data()
+        add_glyph(data, 'foo')['production'] = 'f_o_o.alt1'
         ufo = to_ufos(data)[0]
         postscriptNames = ufo.lib.get('public.postscriptNames')
         self.assertEqual(postscriptNames, {'foo': 'f_o_o.alt1'})
 
     def test_postscript_name_from_glyph_name(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         # in GlyphData (and AGLFN) without a 'production' name
-        self.add_glyph(data, 'A')
+        add_glyph(data, 'A')
         # not in GlyphData, no production name
-        self.add_glyph(data, 'foobar')
+        add_glyph(data, 'foobar')
         # in GlyphData with a 'production' name
-        self.add_glyph(data, 'C-fraktur')
+        add_glyph(data, 'C-fraktur')
         ufo = to_ufos(data)[0]
         postscriptNames = ufo.lib.get('public.postscriptNames')
         self.assertEqual(postscriptNames, {'C-fraktur': 'uni212D'})
 
     def test_category(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'foo')['category'] = 'Mark'
-        self.add_glyph(data, 'bar')
+        data = generate_minimal_data()
+        add_glyph(data, 'foo')['category'] = 'Mark'
+        add_glyph(data, 'bar')
         ufo = to_ufos(data)[0]
         category_key = GLYPHLIB_PREFIX + 'category'
         self.assertEqual(ufo['foo'].lib.get(category_key), 'Mark')
         self.assertFalse(category_key in ufo['bar'].lib)
 
     def test_subCategory(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'foo')['subCategory'] = 'Nonspacing'
-        self.add_glyph(data, 'bar')
+        data = generate_minimal_data()
+        add_glyph(data, 'foo')['subCategory'] = 'Nonspacing'
+        add_glyph(data, 'bar')
         ufo = to_ufos(data)[0]
         subCategory_key = GLYPHLIB_PREFIX + 'subCategory'
         self.assertEqual(ufo['foo'].lib.get(subCategory_key), 'Nonspacing')
         self.assertFalse(subCategory_key in ufo['bar'].lib)
 
     def test_mark_nonspacing_zero_width(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
 
-        self.add_glyph(data, 'dieresiscomb')['layers'][0]['width'] = 100
+        add_glyph(data, 'dieresiscomb')['layers'][0]['width'] = 100
 
-        foo = self.add_glyph(data, 'foo')
+        foo = add_glyph(data, 'foo')
         foo['category'] = 'Mark'
         foo['subCategory'] = 'Nonspacing'
         foo['layers'][0]['width'] = 200
 
-        bar = self.add_glyph(data, 'bar')
+        bar = add_glyph(data, 'bar')
         bar['category'] = 'Mark'
         bar['subCategory'] = 'Nonspacing'
         bar['layers'][0]['width'] = 0
@@ -634,11 +1045,11 @@ class ToUfosTest(unittest.TestCase):
         self.assertFalse(originalWidth_key in ufo['bar'].lib)
 
     def test_GDEF(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         for glyph in ('space', 'A', 'A.alt',
                       'wigglylinebelowcomb', 'wigglylinebelowcomb.alt',
                       'fi', 'fi.alt', 't_e_s_t', 't_e_s_t.alt'):
-            self.add_glyph(data, glyph)
+            add_glyph(data, glyph)
         self.add_anchor(data, 'A', 'bottom', 300, -10)
         self.add_anchor(data, 'wigglylinebelowcomb', '_bottom', 100, 40)
         self.add_anchor(data, 'fi', 'caret_1', 150, 0)
@@ -660,32 +1071,32 @@ class ToUfosTest(unittest.TestCase):
         ])
 
     def test_GDEF_base_with_attaching_anchor(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'A.alt')
+        data = generate_minimal_data()
+        add_glyph(data, 'A.alt')
         self.add_anchor(data, 'A.alt', 'top', 400, 1000)
         self.assertIn('[A.alt], # Base', to_ufos(data)[0].features.text)
 
     def test_GDEF_base_with_nonattaching_anchor(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'A.alt')
+        data = generate_minimal_data()
+        add_glyph(data, 'A.alt')
         self.add_anchor(data, 'A.alt', '_top', 400, 1000)
         self.assertEqual('', to_ufos(data)[0].features.text)
 
     def test_GDEF_ligature_with_attaching_anchor(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'fi')
+        data = generate_minimal_data()
+        add_glyph(data, 'fi')
         self.add_anchor(data, 'fi', 'top', 400, 1000)
         self.assertIn('[fi], # Liga', to_ufos(data)[0].features.text)
 
     def test_GDEF_ligature_with_nonattaching_anchor(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'fi')
+        data = generate_minimal_data()
+        add_glyph(data, 'fi')
         self.add_anchor(data, 'fi', '_top', 400, 1000)
         self.assertEqual('', to_ufos(data)[0].features.text)
 
     def test_GDEF_mark(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'eeMatra-gurmukhi')
+        data = generate_minimal_data()
+        add_glyph(data, 'eeMatra-gurmukhi')
         self.assertIn('[eeMatra-gurmukhi], # Mark',
                       to_ufos(data)[0].features.text)
 
@@ -693,24 +1104,36 @@ class ToUfosTest(unittest.TestCase):
         # Some Glyphs sources happen to contain fractional caret positions.
         # In the Adobe feature file syntax (and binary OpenType GDEF tables),
         # caret positions must be integers.
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'fi')
+        data = generate_minimal_data()
+        add_glyph(data, 'fi')
         self.add_anchor(data, 'fi', 'caret_1', 499.9876, 0)
         self.assertIn('LigatureCaretByPos fi 500;',
                       to_ufos(data)[0].features.text)
 
     def test_GDEF_custom_category_subCategory(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'foo')['subCategory'] = 'Ligature'
+        data = generate_minimal_data()
+        add_glyph(data, 'foo')['subCategory'] = 'Ligature'
         self.add_anchor(data, 'foo', 'top', 400, 1000)
-        bar = self.add_glyph(data, 'bar')
+        bar = add_glyph(data, 'bar')
         bar['category'], bar['subCategory'] = 'Mark', 'Nonspacing'
-        baz = self.add_glyph(data, 'baz')
+        baz = add_glyph(data, 'baz')
         baz['category'], baz['subCategory'] = 'Mark', 'Spacing Combining'
         features = to_ufos(data)[0].features.text
         self.assertIn('[foo], # Liga', features)
         self.assertIn('[bar baz], # Mark', features)
 
+    def test_GDEF_glyph_order(self):
+        data = generate_minimal_data()
+        data['customParameters'] = (
+            {'name': 'glyphOrder', 'value': ['C', 'A', 'C']},)
+        for glyph in ('A', 'B', 'C'):
+            add_glyph(data, glyph)
+            self.add_anchor(data, glyph, 'top', 400, 1000)
+        ufo = to_ufos(data)[0]
+        self.assertEqual(ufo.lib[PUBLIC_PREFIX + 'glyphOrder'],
+                         ['C', 'A', 'C', 'B'])
+        self.assertIn('[C A B], # Base', ufo.features.text)
+
     def test_set_blue_values(self):
         """Test that blue values are set correctly from alignment zones."""
 
@@ -718,7 +1141,7 @@ class ToUfosTest(unittest.TestCase):
         expected_blue_values = [-200, -185, -15, 0, 500, 515]
         expected_other_blues = [-315, -300, 385, 400]
 
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['fontMaster'][0]['alignmentZones'] = data_in
         ufo = to_ufos(data)[0]
 
@@ -726,34 +1149,34 @@ class ToUfosTest(unittest.TestCase):
         self.assertEqual(ufo.info.postscriptOtherBlues, expected_other_blues)
 
     def test_set_glyphOrder_no_custom_param(self):
-        data = self.generate_minimal_data()
-        self.add_glyph(data, 'C')
-        self.add_glyph(data, 'B')
-        self.add_glyph(data, 'A')
-        self.add_glyph(data, 'Z')
+        data = generate_minimal_data()
+        add_glyph(data, 'C')
+        add_glyph(data, 'B')
+        add_glyph(data, 'A')
+        add_glyph(data, 'Z')
         glyphOrder = to_ufos(data)[0].lib[PUBLIC_PREFIX + 'glyphOrder']
         self.assertEqual(glyphOrder, ['C', 'B', 'A', 'Z'])
 
     def test_set_glyphOrder_with_custom_param(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['customParameters'] = (
             {'name': 'glyphOrder', 'value': ['A', 'B', 'C']},)
-        self.add_glyph(data, 'C')
-        self.add_glyph(data, 'B')
-        self.add_glyph(data, 'A')
+        add_glyph(data, 'C')
+        add_glyph(data, 'B')
+        add_glyph(data, 'A')
         # glyphs outside glyphOrder are appended at the end
-        self.add_glyph(data, 'Z')
+        add_glyph(data, 'Z')
         glyphOrder = to_ufos(data)[0].lib[PUBLIC_PREFIX + 'glyphOrder']
         self.assertEqual(glyphOrder, ['A', 'B', 'C', 'Z'])
 
     def test_missing_date(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         del data['date']
         ufo = to_ufos(data)[0]
         self.assertIsNone(ufo.info.openTypeHeadCreated)
 
     def test_variation_font_origin(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         name = 'Variation Font Origin'
         value = 'Light'
         data['customParameters'] = (
@@ -769,7 +1192,7 @@ class ToUfosTest(unittest.TestCase):
         self.assertEqual(instances[name], value)
 
     def test_family_name_none(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['instances'] = [
             {
                 'name': 'Regular1'
@@ -801,7 +1224,7 @@ class ToUfosTest(unittest.TestCase):
             self.assertEqual(ufo.info.familyName, 'MyFont')
 
     def test_family_name_same_as_default(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['instances'] = [
             {
                 'name': 'Regular1'
@@ -834,7 +1257,7 @@ class ToUfosTest(unittest.TestCase):
             self.assertEqual(ufo.info.familyName, 'MyFont')
 
     def test_family_name_custom(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['instances'] = [
             {
                 'name': 'Regular1'
@@ -866,40 +1289,40 @@ class ToUfosTest(unittest.TestCase):
             self.assertEqual(ufo.info.familyName, 'CustomFamily')
 
     def test_lib_no_weight(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         ufo = to_ufos(data)[0]
         self.assertFalse(GLYPHS_PREFIX + 'weight' in ufo.lib)
 
     def test_lib_weight(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['fontMaster'][0]['weight'] = 'Bold'
         ufo = to_ufos(data)[0]
         self.assertEqual(ufo.lib[GLYPHS_PREFIX + 'weight'], 'Bold')
 
     def test_lib_no_width(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         ufo = to_ufos(data)[0]
         self.assertFalse(GLYPHS_PREFIX + 'width' in ufo.lib)
 
     def test_lib_width(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['fontMaster'][0]['width'] = 'Condensed'
         ufo = to_ufos(data)[0]
         self.assertEqual(ufo.lib[GLYPHS_PREFIX + 'width'], 'Condensed')
 
     def test_lib_no_custom(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         ufo = to_ufos(data)[0]
         self.assertFalse(GLYPHS_PREFIX + 'custom' in ufo.lib)
 
     def test_lib_custom(self):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['fontMaster'][0]['custom'] = 'FooBar'
         ufo = to_ufos(data)[0]
         self.assertEqual(ufo.lib[GLYPHS_PREFIX + 'custom'], 'FooBar')
 
     def _run_guideline_test(self, data_in, expected):
-        data = self.generate_minimal_data()
+        data = generate_minimal_data()
         data['glyphs'].append({
             'glyphname': 'a',
             'layers': [{'layerId': data['fontMaster'][0]['id'], 'width': 0,
@@ -1019,6 +1442,25 @@ class DrawPathsTest(unittest.TestCase):
         first_segment_type = points[0][2]
         self.assertEqual(first_segment_type, 'qcurve')
 
+    def test_draw_paths_add_contour(self):
+        contours = [
+            {'closed': True, 'nodes': [
+                (0, 0, 'line', False),
+                (1, 1, 'offcurve', False),
+                (2, 2, 'curve', True)]},
+            {'closed': False, 'nodes': [
+                (3, 3, 'line', True),
+                (4, 4, 'line', False)]}]
+
+        pen = _PointDataPen()
+        pen.addContour = pen.contours.append
+        draw_paths(pen, contours)
+
+        self.assertEqual(pen.contours, [
+            [(2, 2, 'curve', True), (0, 0, 'line', False),
+             (1, 1, None, False)],
+            [(3, 3, 'move', False), (4, 4, 'line', False)]])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -16,8 +16,10 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
+import collections
+import pickle
 import unittest
-from glyphsLib.casting import cast_data, num, node, custom_params
+from glyphsLib.casting import cast_data, num, node, custom_params, kerning
 from copy import deepcopy
 
 
@@ -121,5 +123,63 @@ class RWCustomParamsTest(unittest.TestCase):
         self.assertEqual(custom_params.write(src), expected)
 
 
+class RWKerningTest(unittest.TestCase):
+
+    def raw_kerning(self):
+        od = collections.OrderedDict
+        return od((
+            ('m01', od((
+                ('@MMK_L_A', od((('@MMK_R_V', '-250'), ('v', '-100.5')))),
+                ('a', od((('@MMK_R_V', '100'),))),
+            ))),
+            ('m02', od((
+                ('a', od((('@MMK_R_V', '120'), ('v', '0')))),
+            ))),
+        ))
+
+    def test_read(self):
+        table = kerning.read(self.raw_kerning())
+        self.assertEqual(list(table), ['m01', 'm02'])
+        self.assertEqual(list(table['m01']), ['@MMK_L_A', 'a'])
+        self.assertEqual(
+            list(table['m01']['@MMK_L_A'].items()),
+            [('@MMK_R_V', -250), ('v', -100.5)])
+        self.assertEqual(table['m02']['a']['v'], 0)
+        self.assertIsInstance(table['m02']['a']['@MMK_R_V'], int)
+        self.assertEqual(table, {
+            'm01': {'@MMK_L_A': {'@MMK_R_V': -250, 'v': -100.5},
+                    'a': {'@MMK_R_V': 100}},
+            'm02': {'a': {'@MMK_R_V': 120, 'v': 0}}})
+
+    def test_missing_keys(self):
+        table = kerning.read(self.raw_kerning())
+        self.assertNotIn('m03', table)
+        self.assertNotIn('@MMK_L_A', table['m02'])
+        self.assertNotIn('A', table['m01']['a'])
+        with self.assertRaises(KeyError):
+            table['m01']['b']
+
+    def test_edit(self):
+        table = kerning.read(self.raw_kerning())
+        row = table['m01']['@MMK_L_A']
+        row['v'] = -90
+        row['w'] = -80
+        del table['m01']['@MMK_L_A']['@MMK_R_V']
+        table['m01']['b'] = {'v': 10}
+        del table['m01']['a']
+        table['m02']['a']['v'] += 5
+        table['m03'] = {'a': {'v': 1}}
+        self.assertEqual(table, {
+            'm01': {'@MMK_L_A': {'v': -90, 'w': -80}, 'b': {'v': 10}},
+            'm02': {'a': {'@MMK_R_V': 120, 'v': 5}},
+            'm03': {'a': {'v': 1}}})
+        self.assertEqual(list(table['m01']), ['@MMK_L_A', 'b'])
+        self.assertEqual(pickle.loads(pickle.dumps(table)), table)
+
+    def test_write(self):
+        table = kerning.read(self.raw_kerning())
+        self.assertEqual(kerning.write(deepcopy(table)), self.raw_kerning())
+
+
 if __name__ == '__main__':
     unittest.main()
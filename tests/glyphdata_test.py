@@ -16,7 +16,17 @@
 
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
-from glyphsLib.glyphdata import get_glyph
+from glyphsLib import glyphdata_generated
+from glyphsLib.glyphdata import (
+    get_glyph, get_glyphs, cache_info, clear_cache, get_name_by_unicode,
+    get_name_by_production_name, load_glyph_data, write_data_file,
+    GlyphDataFile,
+    DEFAULT_DATA, DATA_FILE_PATH, DATA_FILE_TABLES, REVERSE_INDEX_TABLES)
+from collections import namedtuple
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
 
 
@@ -62,6 +72,213 @@ class GlyphDataTest(unittest.TestCase):
         self.assertEqual(cat("o_f_f_i.foo"), ("Letter", "Ligature"))
         self.assertEqual(cat("ain_alefMaksura-ar.fina"), ("Letter", "Ligature"))
 
+    def test_cache(self):
+        clear_cache()
+        glyph = get_glyph("eacute")
+        self.assertIs(get_glyph("eacute"), glyph)
+        info = cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 1, 1))
+        clear_cache()
+        self.assertEqual(cache_info()[:2], (0, 0))
+        self.assertEqual(cache_info().currsize, 0)
+
+    def test_cache_by_data_source(self):
+        class Data(object):
+            pass
+
+        for attr in ("IRREGULAR_UNICODE_STRINGS", "MISSING_UNICODE_STRINGS",
+                     "IRREGULAR_CATEGORIES", "DEFAULT_CATEGORIES"):
+            setattr(Data, attr, getattr(glyphdata_generated, attr))
+        Data.PRODUCTION_NAMES = {"eacute": "uni00E9"}
+
+        self.assertEqual(get_glyph("eacute").production_name, "eacute")
+        self.assertEqual(get_glyph("eacute", Data).production_name, "uni00E9")
+        Data.PRODUCTION_NAMES = {}
+        clear_cache()
+        self.assertEqual(get_glyph("eacute", Data).production_name, "eacute")
+
+    def test_unhashable_data_source(self):
+        Data = namedtuple("Data", (
+            "PRODUCTION_NAMES", "IRREGULAR_UNICODE_STRINGS",
+            "MISSING_UNICODE_STRINGS", "IRREGULAR_CATEGORIES",
+            "DEFAULT_CATEGORIES"))
+        data = Data(
+            {"eacute": "uni00E9"}, {}, set(),
+            {"eacute": ("Letter", "Lowercase")}, {})
+
+        clear_cache()
+        glyph = get_glyph("eacute", data)
+        self.assertEqual(glyph.production_name, "uni00E9")
+        self.assertEqual(glyph.category, "Letter")
+        self.assertEqual(get_glyphs(["eacute"], data).production_names,
+                         ["uni00E9"])
+        self.assertEqual(get_name_by_unicode(0xE9, data), "eacute")
+        self.assertEqual(get_name_by_production_name("uni00E9", data),
+                         "eacute")
+        self.assertEqual(cache_info().currsize, 0)
+
+    def test_get_glyphs(self):
+        names = [".notdef", "eacute", "Abreveacute", "fi.alt", "fi", "s_t",
+                 "hib-ko", "one.foo", "one_two.foo", "eacute"]
+        clear_cache()
+        glyphs = get_glyphs(names)
+        self.assertEqual(glyphs.names, names)
+        self.assertEqual(
+            list(zip(*glyphs)),
+            [tuple(get_glyph(name)) for name in names])
+        self.assertEqual(glyphs.production_names[2], "uni1EAE")
+        self.assertEqual(glyphs.unicodes[1], "é")
+        self.assertEqual(glyphs.categories[6], "Letter")
+        self.assertEqual(glyphs.subCategories[8], "Ligature")
+        # the second "eacute" and the get_glyph calls hit the cache
+        self.assertEqual(cache_info()[:2], (len(names) + 1, len(names) - 1))
+
+    def test_name_by_unicode(self):
+        for data in (DEFAULT_DATA, glyphdata_generated):
+            name = lambda c: get_name_by_unicode(c, data)
+            self.assertEqual(name(0x00E9), "eacute")
+            self.assertEqual(name(0x0410), "A-cy")
+            self.assertEqual(name(0x1EAE), "Abreveacute")
+            self.assertEqual(name(0x1D4D3), "Dboldscript-math")
+            self.assertEqual(name(0xFB01), "fi")
+            self.assertEqual(name(0x000D), "CR")
+            self.assertEqual(name(0x2206), "increment")
+            self.assertIsNone(name(0x10FFFF))
+
+    def test_name_by_production_name(self):
+        for data in (DEFAULT_DATA, glyphdata_generated):
+            name = lambda n: get_name_by_production_name(n, data)
+            self.assertEqual(name("uni0410"), "A-cy")
+            self.assertEqual(name("uni1EAE"), "Abreveacute")
+            self.assertEqual(name("u1D4D3"), "Dboldscript-math")
+            self.assertEqual(name("eacute"), "eacute")
+            self.assertEqual(name("o_f_f_i.foo"), "o_f_f_i.foo")
+            # a nice name with another production name
+            self.assertIsNone(name("A-cy"))
+
+    def test_get_glyphs_empty(self):
+        self.assertEqual(get_glyphs([]), ([], [], [], [], []))
+
+
+class GlyphDataFileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_default_data(self):
+        self.assertIsInstance(DEFAULT_DATA, GlyphDataFile)
+        self.assertEqual(DEFAULT_DATA.path, DATA_FILE_PATH)
+
+    def test_same_as_generated_module(self):
+        for name, kind in DATA_FILE_TABLES:
+            if name in REVERSE_INDEX_TABLES:
+                continue
+            expected = getattr(glyphdata_generated, name)
+            table = getattr(DEFAULT_DATA, name)
+            self.assertEqual(len(table), len(expected))
+            self.assertEqual(set(table), set(expected))
+            if kind != "set":
+                for key, value in expected.items():
+                    self.assertEqual(table.get(key), value)
+
+    def test_write_data_file(self):
+        class Data(object):
+            PRODUCTION_NAMES = {"eacute": "uni00E9", "Ắ": "uni1EAE"}
+            IRREGULAR_UNICODE_STRINGS = {"CR": "\r"}
+            MISSING_UNICODE_STRINGS = {".notdef"}
+            DEFAULT_CATEGORIES = {None: ("Letter", None),
+                                  "Ll": ("Letter", "Lowercase")}
+            IRREGULAR_CATEGORIES = {}
+
+        path = os.path.join(self.tmpdir, "GlyphData.bin")
+        write_data_file(Data, path)
+        data = GlyphDataFile(path)
+        self.assertEqual(list(data.PRODUCTION_NAMES), ["eacute", "Ắ"])
+        self.assertEqual(data.PRODUCTION_NAMES.get("Ắ"), "uni1EAE")
+        self.assertIsNone(data.PRODUCTION_NAMES.get("e"))
+        self.assertEqual(data.IRREGULAR_UNICODE_STRINGS.get("CR"), "\r")
+        self.assertIn(".notdef", data.MISSING_UNICODE_STRINGS)
+        self.assertNotIn(".null", data.MISSING_UNICODE_STRINGS)
+        self.assertEqual(data.DEFAULT_CATEGORIES.get(None), ("Letter", None))
+        self.assertEqual(data.DEFAULT_CATEGORIES.get("Ll"),
+                         ("Letter", "Lowercase"))
+        self.assertEqual(data.IRREGULAR_CATEGORIES.get("a", "x"), "x")
+        self.assertEqual(len(data.IRREGULAR_CATEGORIES), 0)
+        glyph = get_glyph("eacute", data)
+        self.assertEqual(glyph.production_name, "uni00E9")
+        self.assertEqual((glyph.category, glyph.subCategory),
+                         ("Letter", "Lowercase"))
+        self.assertEqual(list(data.NAMES_BY_UNICODE), ["000D", "00E9", "1EAE"])
+        self.assertEqual(data.NAMES_BY_PRODUCTION_NAME.get("uni00E9"),
+                         "eacute")
+
+    def test_load_glyph_data(self):
+        paths = []
+        for i, glyphs in enumerate((
+                '<glyph name="eacute" production="uni00E9" unicode="00E9" '
+                'category="Letter" subCategory="Lowercase" />'
+                '<glyph name="foo" unicode="E000" category="Symbol" />',
+                '<glyph name="A-cy" unicode="0410" category="Letter" '
+                'subCategory="Uppercase" />'
+                '<glyph name="foo" production="uniE000" unicode="E001" />')):
+            paths.append(os.path.join(self.tmpdir, "GlyphData%d.xml" % i))
+            with open(paths[-1], "wb") as fp:
+                fp.write(('<glyphData>%s</glyphData>' % glyphs).encode())
+        cache_dir = os.path.join(self.tmpdir, "cache")
+        data = load_glyph_data(paths, cache_dir)
+
+        self.assertEqual(
+            tuple(get_glyph("eacute", data)),
+            ("eacute", "uni00E9", "é", "Letter", "Lowercase"))
+        self.assertEqual(
+            tuple(get_glyph("A-cy", data)),
+            ("A-cy", "A-cy", "А", "Letter", "Uppercase"))
+        # replaced by the later file
+        self.assertEqual(
+            tuple(get_glyph("foo", data)),
+            ("foo", "uniE000", "\uE001", None, None))
+        self.assertEqual(get_glyph("Abreveacute", data),
+                         get_glyph("Abreveacute"))
+        self.assertEqual(get_name_by_unicode(0xE001, data), "foo")
+        self.assertEqual(get_name_by_production_name("uni0410", data),
+                         "uni0410")
+
+        # compiled once, then shared
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertIs(load_glyph_data(paths, cache_dir), data)
+        self.assertIs(pickle.loads(pickle.dumps(data)), data)
+        other = load_glyph_data(paths[:1], cache_dir)
+        self.assertEqual(get_glyph("foo", other).unicode, "\uE000")
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "POSIX permissions")
+    def test_load_glyph_data_shared_cache_dir(self):
+        path = os.path.join(self.tmpdir, "GlyphData.xml")
+        with open(path, "wb") as fp:
+            fp.write(b'<glyphData><glyph name="foo" unicode="E000" />'
+                     b'</glyphData>')
+        cache_dir = os.path.join(self.tmpdir, "cache")
+        os.mkdir(cache_dir)
+        os.chmod(cache_dir, 0o777)
+        # not cached in a directory other users can write to
+        data = load_glyph_data([path], cache_dir)
+        self.assertEqual(get_glyph("foo", data).unicode, "\uE000")
+        self.assertEqual(os.listdir(cache_dir), [])
+
+        # created private to the user
+        cache_dir = os.path.join(self.tmpdir, "private")
+        load_glyph_data([path], cache_dir)
+        self.assertEqual(os.stat(cache_dir).st_mode & 0o777, 0o700)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+    def test_invalid_file(self):
+        path = os.path.join(self.tmpdir, "GlyphData.bin")
+        with open(path, "wb") as fp:
+            fp.write(b"GLDT\0\0\0\x63")
+        self.assertRaises(ValueError, GlyphDataFile, path)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,100 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Data builders and helpers shared by the tests."""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+import datetime
+import os
+
+
+def generate_minimal_data():
+    """Return the minimal .glyphs data needed to build a font."""
+
+    return {
+        '.appVersion': 895,
+        'date': datetime.datetime.today(),
+        'familyName': 'MyFont',
+        'fontMaster': [{
+            'ascender': 0,
+            'capHeight': 0,
+            'descender': 0,
+            'id': 'id',
+            'xHeight': 0,
+        }],
+        'glyphs': [],
+        'unitsPerEm': 1000,
+        'versionMajor': 1,
+        'versionMinor': 0,
+    }
+
+
+def add_glyph(data, glyphname):
+    """Add a glyph with an empty layer in the first master, and return it."""
+
+    glyph = {
+        'glyphname': glyphname,
+        'layers': [{'layerId': data['fontMaster'][0]['id'], 'width': 0}]
+    }
+    data['glyphs'].append(glyph)
+    return glyph
+
+
+def generate_two_master_data():
+    """Return .glyphs data of two masters with a base glyph, a mark and a
+    composite glyph, kerning groups and kerning."""
+
+    data = generate_minimal_data()
+    data['fontMaster'].append({
+        'ascender': 800, 'capHeight': 700, 'descender': -200,
+        'id': 'bold', 'xHeight': 500, 'weight': 'Bold'})
+    data['features'] = [{'name': 'liga', 'code': 'sub f i by fi;'}]
+    for name, anchors, components in (
+            ('a', [('top', 250, 500)], []),
+            ('acutecomb', [('_top', 100, 500)], []),
+            ('aacute', [], [('a', 0, 0), ('acutecomb', 150, 0)])):
+        layers = []
+        for i, master in enumerate(data['fontMaster']):
+            layers.append({
+                'layerId': master['id'], 'width': 500 + i * 100,
+                'anchors': [{'name': n, 'position': (x + i, y)}
+                            for n, x, y in anchors],
+                'components': [{'name': n, 'transform': (1, 0, 0, 1, x, y)}
+                               for n, x, y in components],
+                'paths': [{'closed': True, 'nodes': [
+                    [0, 0, 'line', False], [100 + i, 0, 'line', False],
+                    [100 + i, 100, 'line', False]]}]})
+        data['glyphs'].append({
+            'glyphname': name, 'layers': layers,
+            'leftKerningGroup': name, 'rightKerningGroup': name})
+    data['kerning'] = {
+        'id': {'@MMK_L_a': {'@MMK_R_a': -10}},
+        'bold': {'@MMK_L_a': {'@MMK_R_a': -20}, 'a': {'aacute': 5}}}
+    return data
+
+
+def read_files(path):
+    """Return the contents of the files in a directory tree, by path relative
+    to it."""
+
+    result = {}
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            with open(file_path, 'rb') as fp:
+                result[os.path.relpath(file_path, path)] = fp.read()
+    return result
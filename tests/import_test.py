@@ -0,0 +1,102 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+import json
+import subprocess
+import sys
+import unittest
+
+import glyphsLib
+
+
+# modules which may be imported by `import glyphsLib`, the others being
+# imported on first use
+STARTUP_MODULES = {'glyphsLib'}
+
+# modules which should be left out of the startup path, in whole packages
+HEAVY_PACKAGES = ('glyphsLib.', 'fontTools', 'defcon', 'ufoLib',
+                  'mutatorMath', 'xml.etree', 'multiprocessing')
+
+
+def imported_modules(statement):
+    """Return the modules imported by a statement run in a new interpreter,
+    which were not imported by the interpreter startup."""
+
+    code = (
+        'import json, sys\n'
+        'before = set(sys.modules)\n'
+        '%s\n'
+        'print(json.dumps(sorted(set(sys.modules) - before)))\n' % statement)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    return json.loads(output.decode('utf-8').splitlines()[-1])
+
+
+class ImportTest(unittest.TestCase):
+    def assertLightweight(self, modules):
+        heavy = [m for m in modules
+                 if m not in STARTUP_MODULES and m.startswith(HEAVY_PACKAGES)]
+        self.assertEqual(heavy, [])
+
+    @unittest.skipIf(sys.version_info < (3, 7),
+                     'module __getattr__ needs Python 3.7')
+    def test_import_budget(self):
+        modules = imported_modules('import glyphsLib')
+        self.assertIn('glyphsLib', modules)
+        self.assertLightweight(modules)
+
+    @unittest.skipIf(sys.version_info < (3, 7),
+                     'module __getattr__ needs Python 3.7')
+    def test_cli_version_budget(self):
+        modules = imported_modules(
+            'import glyphsLib.__main__\n'
+            'try:\n'
+            '    glyphsLib.__main__.parse_options(["--version"])\n'
+            'except SystemExit:\n'
+            '    pass')
+        self.assertLightweight(
+            [m for m in modules if m != 'glyphsLib.__main__'])
+
+    def test_load_does_not_import_builder(self):
+        modules = imported_modules('import glyphsLib; glyphsLib.loads("{}")')
+        self.assertIn('glyphsLib.parser', modules)
+        if sys.version_info >= (3, 7):
+            self.assertNotIn('glyphsLib.builder', modules)
+
+    def test_lazy_attributes(self):
+        from glyphsLib.builder import to_ufos
+        from glyphsLib.parser import load
+
+        self.assertIs(glyphsLib.to_ufos, to_ufos)
+        self.assertIs(glyphsLib.load, load)
+        self.assertIn('to_ufos', dir(glyphsLib))
+        self.assertRaises(AttributeError, getattr, glyphsLib, 'missing')
+
+    def test_lazy_submodules(self):
+        modules = imported_modules(
+            'import glyphsLib\n'
+            'assert glyphsLib.builder.to_ufos is glyphsLib.to_ufos\n'
+            'assert glyphsLib.glyphdata.get_glyph\n'
+            'assert "casting" in dir(glyphsLib)')
+        self.assertIn('glyphsLib.builder', modules)
+        self.assertIn('glyphsLib.glyphdata', modules)
+        if sys.version_info >= (3, 7):
+            self.assertNotIn('glyphsLib.writer', modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
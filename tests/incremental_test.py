@@ -0,0 +1,166 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+from ufoLib.glifLib import GlyphSet
+
+import glyphsLib
+import glyphsLib.__main__
+from glyphsLib.builder import to_ufos
+from glyphsLib.glyphdata import load_glyph_data
+from glyphsLib.incremental import glyph_hashes, write_ufo_incrementally
+
+from helpers import generate_minimal_data, add_glyph
+
+
+class WriteUfoIncrementallyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def generate_data(self):
+        data = generate_minimal_data()
+        for name, x, components in (
+                ('a', 100, []), ('acutecomb', 50, []),
+                ('aacute', 0, ['a', 'acutecomb']), ('b', 200, [])):
+            layer = add_glyph(data, name)['layers'][0]
+            layer['width'] = 500
+            layer['components'] = [{'name': n} for n in components]
+            if x:
+                layer['paths'] = [{'closed': True, 'nodes': [
+                    [0, 0, 'line', False], [x, 0, 'line', False],
+                    [x, 100, 'line', False]]}]
+        return data
+
+    def write(self, data, include_backgrounds=True, glyph_data_files=None):
+        ufo, = to_ufos(data, include_backgrounds=include_backgrounds,
+                       glyph_data_files=glyph_data_files)
+        glyphinfo_data = None
+        if glyph_data_files:
+            glyphinfo_data = load_glyph_data(glyph_data_files)
+        with patch.object(GlyphSet, 'writeGlyph',
+                          autospec=True,
+                          side_effect=GlyphSet.writeGlyph) as write_glyph:
+            path = write_ufo_incrementally(
+                ufo, self.tmpdir,
+                glyph_hashes(data, 'id', include_backgrounds, glyphinfo_data))
+        written = sorted(call[0][1] for call in write_glyph.call_args_list)
+        return path, written
+
+    def read_glyphs(self, path):
+        glyphs_dir = os.path.join(path, 'glyphs')
+        result = {}
+        for filename in os.listdir(glyphs_dir):
+            with open(os.path.join(glyphs_dir, filename), 'rb') as fp:
+                result[filename] = fp.read()
+        return result
+
+    def test_first_build(self):
+        path, written = self.write(self.generate_data())
+        self.assertEqual(written, ['a', 'aacute', 'acutecomb', 'b'])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.tmpdir, 'MyFont-Regular.manifest.json')))
+        self.assertEqual(path, os.path.join(self.tmpdir, 'MyFont-Regular.ufo'))
+
+    def test_unchanged(self):
+        data = self.generate_data()
+        path, _ = self.write(data)
+        _, written = self.write(data)
+        self.assertEqual(written, [])
+
+    def test_changed_glyph_and_component_users(self):
+        data = self.generate_data()
+        path, _ = self.write(data)
+        data['glyphs'][0]['layers'][0]['width'] = 600
+        _, written = self.write(data)
+        self.assertEqual(written, ['a', 'aacute'])
+
+        expected_dir = os.path.join(self.tmpdir, 'expected')
+        os.mkdir(expected_dir)
+        ufo, = to_ufos(data)
+        ufo.save(os.path.join(expected_dir, 'MyFont-Regular.ufo'))
+        self.assertEqual(
+            self.read_glyphs(path),
+            self.read_glyphs(os.path.join(expected_dir, 'MyFont-Regular.ufo')))
+
+    def test_removed_glyph(self):
+        data = self.generate_data()
+        path, _ = self.write(data)
+        del data['glyphs'][-1]
+        _, written = self.write(data)
+        self.assertEqual(written, [])
+        self.assertNotIn('b.glif', self.read_glyphs(path))
+
+    def test_backgrounds(self):
+        data = self.generate_data()
+        data['glyphs'][-1]['layers'][0]['background'] = {'width': 100}
+        self.write(data)
+        _, written = self.write(data, include_backgrounds=False)
+        self.assertEqual(written, ['b'])
+        # backgrounds are not part of the build, so changing them rewrites
+        # nothing
+        data['glyphs'][-1]['layers'][0]['background'] = {'width': 200}
+        _, written = self.write(data, include_backgrounds=False)
+        self.assertEqual(written, [])
+
+    def test_glyph_data_files(self):
+        data = self.generate_data()
+        path = os.path.join(self.tmpdir, 'GlyphData.xml')
+        with patch('glyphsLib.glyphdata._default_cache_dir',
+                   return_value=os.path.join(self.tmpdir, 'cache')):
+            for category, expected in (('Letter', ['a', 'aacute', 'acutecomb',
+                                                   'b']),
+                                       ('Letter', []),
+                                       ('Mark', ['b'])):
+                with open(path, 'wb') as fp:
+                    fp.write(('<glyphData><glyph name="b" category="%s" '
+                              'subCategory="Nonspacing" /></glyphData>' %
+                              category).encode())
+                _, written = self.write(data, glyph_data_files=[path])
+                self.assertEqual(written, expected)
+
+
+    def test_build_instances(self):
+        data = self.generate_data()
+        master_dir = os.path.join(self.tmpdir, 'masters')
+        with patch('glyphsLib._load', return_value=data):
+            glyphsLib.build_instances(
+                'MyFont.glyphs', master_dir,
+                os.path.join(self.tmpdir, 'instances'), in_memory=True,
+                incremental=True)
+        self.assertTrue(os.path.exists(
+            os.path.join(master_dir, 'MyFont-Regular.manifest.json')))
+
+    def test_main_instances(self):
+        with patch('glyphsLib.build_instances') as build_instances:
+            glyphsLib.__main__.main(
+                ['-g', 'MyFont.glyphs', '-n', '-i', '--fast-write'])
+        _, kwargs = build_instances.call_args
+        self.assertTrue(kwargs['incremental'])
+        self.assertTrue(kwargs['fast_write'])
+
+
+if __name__ == '__main__':
+    unittest.main()
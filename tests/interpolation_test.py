@@ -26,11 +26,14 @@ import xml.etree.ElementTree as etree
 
 import defcon
 from fontTools.misc.py23 import open
-from glyphsLib.builder import GLYPHS_PREFIX
+from glyphsLib.builder import GLYPHS_PREFIX, UFO2FT_FILTERS_KEY
 from glyphsLib.interpolation import (
-    build_designspace, set_weight_class, set_width_class, build_stylemap_names
+    build_designspace, set_weight_class, set_width_class, build_stylemap_names,
+    interpolate, interpolate_in_memory
 )
 
+from helpers import read_files
+
 
 def makeFamily(familyName):
     m1 = makeMaster(familyName, "Regular", weight=90.0)
@@ -409,5 +412,107 @@ class SetWeightWidthClassesTest(unittest.TestCase):
         self.assertTrue(ufo.info.openTypeOS2WeightClass is None)
 
 
+class InterpolateInMemoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def make_family(self):
+        masters, instances = makeFamily("In Memory")
+        for i, master in enumerate(masters):
+            master.info.unitsPerEm = 1000
+            master.info.ascender = 700 + 100 * i
+            master.features.text = "feature liga {} liga;"
+            master.groups["public.kern1.a"] = ["a"]
+            master.kerning["public.kern1.a", "b"] = -10 - 30 * i
+            glyph = master.newGlyph("a")
+            glyph.unicode = 0x61
+            glyph.width = 500 + 100 * i
+            pen = glyph.getPen()
+            pen.moveTo((0, 0))
+            pen.lineTo((100 + 50 * i, 0))
+            pen.lineTo((100, 700))
+            pen.closePath()
+            master.newGlyph("b").width = 300 + 20 * i
+        instances["data"][1]["customParameters"].append(
+            {"name": "postscriptFontName", "value": "InMemory-SemiBold"})
+        return masters, instances
+
+    def test_same_as_interpolate(self):
+        masters, instances = self.make_family()
+        expected_dir = os.path.join(self.tmp_dir, "expected")
+        interpolate(masters, os.path.join(self.tmp_dir, "masters"),
+                    expected_dir, instances)
+
+        masters, instances = self.make_family()
+        out_dir = os.path.join(self.tmp_dir, "out")
+        ufos = interpolate_in_memory(masters, out_dir, instances)
+
+        self.assertEqual(read_files(out_dir),
+                         read_files(expected_dir))
+        self.assertEqual([ufo.info.styleName for ufo in ufos],
+                         ["Regular", "Semibold", "Bold", "Black"])
+        self.assertEqual(ufos[1].path, os.path.join(
+            out_dir, "InMemory-Semibold.ufo"))
+
+    def test_instance_data(self):
+        masters, instances = self.make_family()
+        ufos = interpolate_in_memory(masters, self.tmp_dir, instances)
+        bold = ufos[2]
+        self.assertEqual(bold.info.openTypeOS2WeightClass, 700)
+        self.assertEqual(bold.info.styleMapStyleName, "bold")
+        self.assertEqual(bold.info.postscriptFontName, None)
+        self.assertEqual(ufos[1].info.postscriptFontName,
+                         "InMemory-SemiBold")
+        self.assertEqual(bold["a"].unicode, 0x61)
+        self.assertEqual(bold["b"].width, 312)
+        self.assertEqual(bold.kerning["public.kern1.a", "b"], -28)
+        # masters are left untouched and unwritten
+        self.assertIsNone(masters[0].path)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), [
+            "InMemory-Black.ufo", "InMemory-Bold.ufo",
+            "InMemory-Regular.ufo", "InMemory-Semibold.ufo"])
+
+    def test_master_values_not_shared(self):
+        def make_family():
+            masters, instances = self.make_family()
+            for master in masters:
+                master.info.openTypeOS2Selection = [8]
+                master.lib[UFO2FT_FILTERS_KEY] = [{"name": "eraseOpenCorners"}]
+            for instance in instances["data"]:
+                instance["customParameters"].extend([
+                    {"name": "Use Typo Metrics", "value": True},
+                    {"name": "Filter", "value": "RemoveOverlap"}])
+            return masters, instances
+
+        masters, instances = make_family()
+        expected_dir = os.path.join(self.tmp_dir, "expected")
+        interpolate(masters, os.path.join(self.tmp_dir, "masters"),
+                    expected_dir, instances)
+
+        masters, instances = make_family()
+        out_dir = os.path.join(self.tmp_dir, "out")
+        ufos = interpolate_in_memory(masters, out_dir, instances)
+
+        self.assertEqual(read_files(out_dir),
+                         read_files(expected_dir))
+        for ufo in ufos:
+            self.assertEqual(ufo.info.openTypeOS2Selection, [8, 7])
+            self.assertEqual(ufo.lib[UFO2FT_FILTERS_KEY], [
+                {"name": "eraseOpenCorners"}, {"name": "RemoveOverlap"}])
+        self.assertEqual(masters[0].info.openTypeOS2Selection, [8])
+        self.assertEqual(masters[0].lib[UFO2FT_FILTERS_KEY],
+                         [{"name": "eraseOpenCorners"}])
+
+    def test_debug(self):
+        masters, instances = self.make_family()
+        instances["data"][0]["unknownKey"] = 1
+        unused = interpolate_in_memory(
+            masters, self.tmp_dir, instances, debug=True)
+        self.assertEqual(unused, {"data": [{"unknownKey": 1}]})
+
+
 if __name__ == "__main__":
     sys.exit(unittest.main())
@@ -0,0 +1,82 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+import unittest
+
+from defcon import Font
+from fontTools.misc.loggingTools import CapturingLogHandler
+
+from glyphsLib import kerning
+from glyphsLib.kerning import load_kerning
+
+
+class LoadKerningTest(unittest.TestCase):
+    def make_ufo(self):
+        ufo = Font()
+        ufo.info.styleName = 'Regular'
+        ufo.groups.update({
+            'public.kern1.A': ['A', 'Aacute'],
+            'public.kern1.O': ['O'],
+            'public.kern2.V': ['V', 'W'],
+            'public.kern2.a': ['a', 'aacute']})
+        return ufo
+
+    def test_class_glyph_conflict(self):
+        ufo = self.make_ufo()
+        with CapturingLogHandler(kerning.logger, 'WARNING') as captor:
+            load_kerning(ufo, {
+                '@MMK_L_A': {'W': -50},
+                'Aacute': {'@MMK_R_V': -20}})
+        # the later rule wins, the earlier one is split into glyph pairs
+        self.assertEqual(dict(ufo.kerning), {
+            ('A', 'W'): -50,
+            ('Aacute', 'public.kern2.V'): -20})
+        self.assertEqual(len(captor.records), 1)
+        self.assertIn('"Aacute, W"', captor.records[0].getMessage())
+
+    def test_explicit_pair_prevents_conflict(self):
+        ufo = self.make_ufo()
+        load_kerning(ufo, {
+            '@MMK_L_A': {'W': -50},
+            'Aacute': {'@MMK_R_V': -20, 'W': -30}})
+        self.assertEqual(dict(ufo.kerning), {
+            ('public.kern1.A', 'W'): -50,
+            ('Aacute', 'public.kern2.V'): -20,
+            ('Aacute', 'W'): -30})
+
+    def test_same_value_is_no_conflict(self):
+        ufo = self.make_ufo()
+        load_kerning(ufo, {
+            '@MMK_L_O': {'a': -10},
+            'O': {'@MMK_R_a': -10}})
+        self.assertEqual(dict(ufo.kerning), {
+            ('public.kern1.O', 'a'): -10,
+            ('O', 'public.kern2.a'): -10})
+
+    def test_non_existent_class(self):
+        ufo = self.make_ufo()
+        with CapturingLogHandler(kerning.logger, 'WARNING') as captor:
+            load_kerning(ufo, {
+                '@MMK_L_X': {'a': -10},
+                'A': {'@MMK_R_Y': -10, '@MMK_R_a': 5}})
+        self.assertEqual(dict(ufo.kerning), {('A', 'public.kern2.a'): 5})
+        self.assertEqual(len(captor.records), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+import os
+import shutil
+import tempfile
+import unittest
+
+from glyphsLib.builder import to_ufos
+from glyphsLib.ufomodel import Font
+from glyphsLib.util import write_ufo
+
+from helpers import generate_two_master_data, read_files
+
+
+class UfoModelTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def generate_data(self):
+        data = generate_two_master_data()
+        for glyph, unicode in zip(data['glyphs'], (0x61, 0x301, 0xE1)):
+            glyph['unicode'] = unicode
+            del glyph['rightKerningGroup']
+            for layer in glyph['layers']:
+                # a curve, for off-curve points
+                nodes = layer['paths'][0]['nodes']
+                nodes[1][2] = 'offcurve'
+                nodes[2][2:] = ['curve', True]
+        data['kerning'] = {'bold': {'a': {'@MMK_R_a': -10}}}
+        data['features'] = [{'name': 'liga', 'code': 'sub a by aacute;'}]
+        return data
+
+    def write_all(self, ufos, name):
+        out_dir = os.path.join(self.tmpdir, name)
+        os.mkdir(out_dir)
+        for ufo in ufos:
+            write_ufo(ufo, out_dir)
+        return read_files(out_dir)
+
+    def test_same_files_as_defcon(self):
+        data = self.generate_data()
+        ufos = to_ufos(data, font_factory=Font)
+        self.assertTrue(all(isinstance(ufo, Font) for ufo in ufos))
+        self.assertEqual(self.write_all(ufos, 'model'),
+                         self.write_all(to_ufos(data), 'defcon'))
+        self.assertEqual(ufos[0].path, os.path.join(
+            self.tmpdir, 'model', 'MyFont-Regular.ufo'))
+
+    def test_parallel(self):
+        data = self.generate_data()
+        expected = self.write_all(to_ufos(data, font_factory=Font), 'serial')
+        for workers in (2, 3):
+            self.assertEqual(
+                self.write_all(
+                    to_ufos(data, workers=workers, font_factory=Font),
+                    'workers%d' % workers),
+                expected)
+
+    def test_glyphs(self):
+        ufo, _ = to_ufos(self.generate_data(), font_factory=Font)
+        glyph = ufo['aacute']
+        self.assertIs(glyph.font, ufo)
+        self.assertEqual(glyph.unicode, 0xE1)
+        self.assertEqual(
+            [(p.x, p.y, p.segmentType, p.smooth) for p in glyph[0]],
+            [(100, 100, 'curve', True), (0, 0, 'line', False),
+             (100, 0, None, False)])
+        self.assertEqual(
+            [(c.baseGlyph, c.transformation) for c in glyph.components],
+            [('a', (1, 0, 0, 1, 0, 0)), ('acutecomb', (1, 0, 0, 1, 150, 0))])
+        # propagated from the components
+        self.assertEqual([(a.name, a.x, a.y) for a in glyph.anchors],
+                         [('top', 250, 500)])
+        self.assertEqual(ufo.kerning, {})
+        self.assertEqual(ufo.groups['public.kern2.a'], ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
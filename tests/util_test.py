@@ -0,0 +1,60 @@
+# Copyright 2016 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import unittest
+from glyphsLib.util import track_data, unused_data, get_whole, mark_read
+
+
+class UnusedDataTest(unittest.TestCase):
+    def generate_data(self):
+        return track_data({
+            'name': 'Regular',
+            'weight': 400,
+            'userData': {'com.example': {'key': 'value'}},
+            'layers': [{'layerId': 'a', 'foo': 'bar'}],
+            'hidden': {'key': 'value'},
+        })
+
+    def test_nothing_read(self):
+        data = self.generate_data()
+        self.assertEqual(unused_data(data), {
+            'name': 'Regular',
+            'weight': 400,
+            'userData': {'com.example': {'key': 'value'}},
+            'layers': [{'layerId': 'a', 'foo': 'bar'}],
+            'hidden': {'key': 'value'},
+        })
+
+    def test_partly_read(self):
+        data = self.generate_data()
+        data['name']
+        data.get('weight')
+        get_whole(data, 'userData')
+        data['layers'][0]['layerId']
+        mark_read(data['hidden'])
+        self.assertEqual(unused_data(data), {'layers': [{'foo': 'bar'}]})
+
+    def test_does_not_record_reads(self):
+        data = self.generate_data()
+        unused_data(data)
+        self.assertEqual(data.read_keys, set())
+        self.assertEqual(data['layers'][0].read_keys, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# coding=UTF-8
+#
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from defcon import Font
+
+from glyphsLib.builder import to_ufos
+from glyphsLib.writer import glif_data, save_ufo, write_ufo
+
+from helpers import generate_minimal_data, read_files
+
+
+class WriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def assertSameAsDefcon(self, ufo):
+        defcon_path = os.path.join(self.tmpdir, 'defcon.ufo')
+        path = os.path.join(self.tmpdir, 'writer.ufo')
+        ufo.save(defcon_path)
+        save_ufo(Font(defcon_path), path)
+        self.assertEqual(read_files(path), read_files(defcon_path))
+
+    def test_glif_data(self):
+        ufo = Font()
+        glyph = ufo.newGlyph('A&"<>')
+        glyph.width = 500
+        glyph.height = 100.5
+        glyph.unicodes = [65, 65, 66]
+        glyph.note = ' a & b\nc '
+        glyph.appendGuideline({'x': 1, 'y': 2, 'angle': 45.0, 'name': 'g'})
+        glyph.appendAnchor({'x': 1, 'y': 2.5, 'name': 'top'})
+        pen = glyph.getPointPen()
+        pen.beginPath(identifier='empty')
+        pen.endPath()
+        pen.beginPath()
+        pen.addPoint((0, 0), 'move', name='start')
+        pen.addPoint((1.5, 2))
+        pen.addPoint((3, 3), 'curve', smooth=True)
+        pen.endPath()
+        pen.addComponent('a', (0.5, 0, 0, 1, 10, -3))
+        glyph.lib['x'] = {
+            'a': 'multi\nline', 'd': datetime.datetime(2017, 1, 2)}
+        ufo.newGlyph('a')
+        self.assertSameAsDefcon(ufo)
+        self.assertEqual(glif_data(ufo['a']), (
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b'<glyph name="a" format="2">\n'
+            b'  <outline>\n'
+            b'  </outline>\n'
+            b'</glyph>\n'))
+
+    def test_write_masters(self):
+        data = generate_minimal_data()
+        data['fontMaster'][0].update(
+            {'ascender': 800, 'capHeight': 700, 'descender': -200,
+             'xHeight': 500})
+        data.update({
+            'glyphs': [
+                {'glyphname': 'a', 'unicode': 0x61, 'leftKerningGroup': 'a',
+                 'layers': [{'layerId': 'id', 'width': 500,
+                             'anchors': [{'name': 'top',
+                                          'position': (250, 500)}],
+                             'paths': [{'closed': True, 'nodes': [
+                                 [0, 0, 'line', False],
+                                 [100, 0, 'offcurve', False],
+                                 [100, 100, 'curve', True]]}]}]},
+                {'glyphname': 'A', 'unicode': 0x41, 'color': 3,
+                 'layers': [{'layerId': 'id', 'width': 600,
+                             'components': [{'name': 'a'}]}]}],
+            'kerning': {'id': {'A': {'@MMK_R_a': -10}}},
+            'features': [{'name': 'liga', 'code': 'sub a by A;'}],
+        })
+        ufo, = to_ufos(data)
+        path = write_ufo(ufo, self.tmpdir)
+        self.assertEqual(path, os.path.join(self.tmpdir, 'MyFont-Regular.ufo'))
+        self.assertEqual(ufo.path, path)
+        defcon_path = os.path.join(self.tmpdir, 'defcon.ufo')
+        defcon_ufo, = to_ufos(data)
+        defcon_ufo.save(defcon_path)
+        self.assertEqual(read_files(path), read_files(defcon_path))
+
+    def test_file_name_clashes(self):
+        ufo = Font()
+        for name in ('A', 'a_', 'a'):
+            ufo.newGlyph(name)
+        path = os.path.join(self.tmpdir, 'writer.ufo')
+        save_ufo(ufo, path)
+        file_names = [name.lower() for name in
+                      os.listdir(os.path.join(path, 'glyphs'))]
+        self.assertEqual(len(file_names), len(set(file_names)))
+        self.assertEqual(sorted(Font(path).keys()), ['A', 'a', 'a_'])
+
+
+if __name__ == '__main__':
+    unittest.main()